@@ -0,0 +1,101 @@
+"""
+Streaming responses for stored blobs, with HTTP Range support.
+
+PDF viewers fetch large documents in pieces (`Range: bytes=0-65535`); each
+piece is read from the blob store on its own, so a partial request never reads
+the whole file. Multi-range requests are answered with the full body, which
+RFC 9110 permits.
+"""
+from urllib.parse import quote
+
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
+
+from backend import etags
+from database.blob_store import BlobStore
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_byte_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    The (start, end) byte positions, end inclusive, of a single-range `Range`
+    header; None if the whole body should be sent.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else max(start, size - 1)
+            if start > end:
+                return None
+        else:
+            # Suffix range: the last N bytes.
+            suffix = int(last)
+            if suffix == 0:
+                raise RangeNotSatisfiable()
+            start, end = max(size - suffix, 0), size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def _content_disposition(disposition: str, filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+def blob_response(
+    store: BlobStore,
+    key: str,
+    *,
+    media_type: str,
+    filename: str | None = None,
+    range_header: str | None = None,
+    if_range: str | None = None,
+    if_none_match: str | None = None,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    size = store.size(key)
+    if size is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    etag = f'"{key}"'
+    response_headers = {"Accept-Ranges": "bytes", "ETag": etag, **(headers or {})}
+    if etags.etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=response_headers)
+    if filename:
+        response_headers["Content-Disposition"] = _content_disposition("inline", filename)
+
+    # A stale If-Range means the client's pieces belong to other content: send it all.
+    if if_range is not None and if_range.strip() != etag:
+        range_header = None
+    try:
+        byte_range = parse_byte_range(range_header, size)
+    except RangeNotSatisfiable:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+
+    status_code = 200
+    start, end = 0, size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = 206
+        response_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response_headers["Content-Length"] = str(end - start + 1)
+
+    # A sync iterator: Starlette pulls each chunk in a worker thread.
+    body = store.iter_range(key, start, end) if size else iter(())
+    return StreamingResponse(body, status_code=status_code, media_type=media_type, headers=response_headers)
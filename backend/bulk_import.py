@@ -0,0 +1,140 @@
+"""
+Parsing and chunked loading for bulk request imports.
+
+Records come from a JSON array, an NDJSON stream (one request per line) or a
+CSV stream. In CSV every row carries the request columns plus an optional order
+line (`line_description`, `line_unit_price`, `line_quantity`, `line_unit`,
+`line_stated_total_price`); adjacent rows sharing the same `ref` value are
+merged into one request. Rows are numbered from 1 in input order (CSV rows by
+file line, so the header is line 1).
+"""
+import csv
+import json
+from typing import Any, Iterable, Iterator, TextIO
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from backend import crud
+from backend.schemas import BulkImportResponse, BulkRowError, ProcurementRequestCreate
+
+IMPORT_CHUNK_SIZE = 1000
+
+CSV_LINE_COLUMNS = {
+    "line_description": "description",
+    "line_unit_price": "unit_price",
+    "line_quantity": "quantity",
+    "line_unit": "unit",
+    "line_stated_total_price": "stated_total_price",
+}
+
+
+class RecordParseError(ValueError):
+    pass
+
+
+def iter_json_records(items: list[Any]) -> Iterator[tuple[int, Any]]:
+    for index, item in enumerate(items, start=1):
+        yield index, item
+
+
+def iter_ndjson_records(stream: TextIO) -> Iterator[tuple[int, Any]]:
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, RecordParseError(f"Invalid JSON: {e.msg}")
+
+
+def _without_blanks(row: dict) -> dict:
+    # Empty CSV cells mean "not given" so schema defaults and optional fields apply.
+    return {key: value for key, value in row.items() if key and value not in ("", None)}
+
+
+def iter_csv_records(stream: TextIO) -> Iterator[tuple[int, Any]]:
+    reader = csv.DictReader(stream)
+    current: dict | None = None
+    current_ref = None
+    current_row = 0
+
+    for row in reader:
+        row_number = reader.line_num
+        values = _without_blanks(row)
+        ref = values.pop("ref", None)
+        line = {CSV_LINE_COLUMNS[key]: values.pop(key) for key in list(values) if key in CSV_LINE_COLUMNS}
+
+        if current is None or ref is None or ref != current_ref:
+            if current is not None:
+                yield current_row, current
+            current = {**values, "order_lines": []}
+            current_ref = ref
+            current_row = row_number
+
+        if line:
+            current["order_lines"].append(line)
+
+    if current is not None:
+        yield current_row, current
+
+
+def _format_validation_error(error: ValidationError) -> list[str]:
+    messages = []
+    for detail in error.errors(include_url=False):
+        location = ".".join(str(part) for part in detail["loc"])
+        messages.append(f"{location}: {detail['msg']}" if location else detail["msg"])
+    return messages
+
+
+def _validate(record: Any) -> ProcurementRequestCreate:
+    if isinstance(record, RecordParseError):
+        raise record
+    if not isinstance(record, dict):
+        raise RecordParseError("Each record must be a JSON object")
+    return ProcurementRequestCreate.model_validate(record)
+
+
+def _insert_chunk(db: Session, chunk: list[tuple[int, ProcurementRequestCreate]], result: BulkImportResponse):
+    try:
+        result.created_ids.extend(crud.bulk_create_requests(db, [item for _, item in chunk]))
+        return
+    except SQLAlchemyError:
+        db.rollback()
+
+    # Isolate the offending rows so the rest of the chunk still gets imported.
+    for row, item in chunk:
+        try:
+            result.created_ids.extend(crud.bulk_create_requests(db, [item]))
+        except SQLAlchemyError as e:
+            db.rollback()
+            result.errors.append(BulkRowError(row=row, errors=[f"Database error: {e.__class__.__name__}"]))
+
+
+def import_records(
+    db: Session, records: Iterable[tuple[int, Any]], chunk_size: int = IMPORT_CHUNK_SIZE
+) -> BulkImportResponse:
+    """Validate and insert records, committing every `chunk_size` valid requests."""
+    result = BulkImportResponse(created=0, failed=0, created_ids=[], errors=[])
+    chunk: list[tuple[int, ProcurementRequestCreate]] = []
+
+    for row, record in records:
+        try:
+            chunk.append((row, _validate(record)))
+        except ValidationError as e:
+            result.errors.append(BulkRowError(row=row, errors=_format_validation_error(e)))
+        except RecordParseError as e:
+            result.errors.append(BulkRowError(row=row, errors=[str(e)]))
+
+        if len(chunk) >= chunk_size:
+            _insert_chunk(db, chunk, result)
+            chunk = []
+
+    if chunk:
+        _insert_chunk(db, chunk, result)
+
+    result.created = len(result.created_ids)
+    result.failed = len(result.errors)
+    result.errors.sort(key=lambda e: e.row)
+    return result
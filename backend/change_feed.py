@@ -0,0 +1,104 @@
+"""
+Server-Sent Events feed of request changes.
+
+Each connection polls the `request_events` outbox (see `database.outbox`) for
+events after the last one it sent, so every uvicorn worker serves the same feed
+straight from the database. Events carry the request's current overview row,
+which clients merge into their list instead of re-fetching it.
+
+A stream ends after CHANGE_FEED_MAX_SECONDS; `EventSource` then reconnects with
+`Last-Event-ID` and resumes where it stopped. If the events it needs were
+pruned, the client receives a `reset` event and should reload the list.
+"""
+import os
+import time
+from datetime import timedelta
+from typing import AsyncIterator, Awaitable, Callable
+
+import anyio
+import anyio.to_thread
+import orjson
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from backend import crud
+from database import outbox
+
+CHANGE_FEED_POLL_INTERVAL = float(os.getenv("CHANGE_FEED_POLL_INTERVAL", "1.0"))
+CHANGE_FEED_MAX_SECONDS = float(os.getenv("CHANGE_FEED_MAX_SECONDS", "300"))
+CHANGE_FEED_RETENTION_DAYS = int(os.getenv("CHANGE_FEED_RETENTION_DAYS", "7"))
+CHANGE_FEED_BATCH_SIZE = 500
+HEARTBEAT_SECONDS = 15.0
+RECONNECT_MS = 1000
+
+
+def format_event(event_id: int | None, event_type: str, data: dict) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {orjson.dumps(data).decode()}")
+    return "\n".join(lines) + "\n\n"
+
+
+def fetch_events(engine: Engine, after_id: int) -> tuple[int, list[str]]:
+    """Render the next batch of events after `after_id`; returns the new position and the messages."""
+    with Session(bind=engine) as db:
+        events = outbox.events_after(db, after_id, CHANGE_FEED_BATCH_SIZE)
+        live_ids = list({event.request_id for event in events if event.event_type != outbox.DELETED})
+        summaries = crud.get_request_summaries(db, live_ids) if live_ids else {}
+
+    messages = [
+        format_event(event.id, event.event_type, {
+            "request_id": event.request_id,
+            "version": event.version,
+            # The current row, so a client that missed intermediate events still converges.
+            # None once the request is gone; its `deleted` event follows.
+            "request": summaries.get(event.request_id) if event.event_type != outbox.DELETED else None,
+        })
+        for event in events
+    ]
+    return (events[-1].id if events else after_id), messages
+
+
+def resume_position(engine: Engine, last_event_id: int | None) -> tuple[int, bool]:
+    """Where to start streaming and whether the client must reload first."""
+    with Session(bind=engine) as db:
+        if last_event_id is None:
+            return outbox.latest_event_id(db), False
+        if outbox.has_gap(db, last_event_id):
+            return outbox.latest_event_id(db), True
+        return last_event_id, False
+
+
+def prune_events(engine: Engine) -> int:
+    with Session(bind=engine) as db:
+        removed = outbox.prune(db, timedelta(days=CHANGE_FEED_RETENTION_DAYS))
+        db.commit()
+    return removed
+
+
+async def stream_events(
+    engine: Engine,
+    last_event_id: int | None,
+    is_disconnected: Callable[[], Awaitable[bool]],
+) -> AsyncIterator[str]:
+    position, reset = await anyio.to_thread.run_sync(resume_position, engine, last_event_id)
+    yield f"retry: {RECONNECT_MS}\n\n"
+    if reset:
+        yield format_event(position, "reset", {})
+
+    deadline = time.monotonic() + CHANGE_FEED_MAX_SECONDS
+    last_sent = time.monotonic()
+    while time.monotonic() < deadline and not await is_disconnected():
+        position, messages = await anyio.to_thread.run_sync(fetch_events, engine, position)
+        for message in messages:
+            yield message
+        if messages:
+            last_sent = time.monotonic()
+            if len(messages) == CHANGE_FEED_BATCH_SIZE:
+                continue
+        elif time.monotonic() - last_sent >= HEARTBEAT_SECONDS:
+            yield ": keepalive\n\n"
+            last_sent = time.monotonic()
+        await anyio.sleep(CHANGE_FEED_POLL_INTERVAL)
@@ -0,0 +1,199 @@
+"""
+Commodity classification with a persistent cache.
+
+Results are cached in `classification_cache` under a hash of the normalized
+input (title, vendor, department and order line descriptions), so identical
+requests, such as re-imports of the same legacy data, never reach the LLM
+twice. Entries pointing at a group that was changed or removed are dropped by
+`database.commodity_groups`; entries for other groups survive taxonomy edits.
+
+Batch classification answers from the cache first, then packs the remaining
+distinct inputs CLASSIFY_BATCH_SIZE to a prompt and runs up to
+CLASSIFY_BATCH_CONCURRENCY of those calls at once, streaming each result as its
+call completes.
+"""
+import hashlib
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator
+
+import orjson
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.extraction import classify_commodity_group, classify_commodity_groups_batch
+from database.commodity_groups import Taxonomy, get_taxonomy
+from database.models import ClassificationCacheEntry
+
+CLASSIFY_BATCH_SIZE = int(os.getenv("CLASSIFY_BATCH_SIZE", "25"))
+CLASSIFY_BATCH_CONCURRENCY = int(os.getenv("CLASSIFY_BATCH_CONCURRENCY", "4"))
+
+
+def _normalize(value) -> str:
+    return " ".join(str(value or "").split()).casefold()
+
+
+def cache_key(title: str, order_lines: list, vendor_name: str = "", department: str = "") -> str:
+    payload = [
+        _normalize(title),
+        _normalize(vendor_name),
+        _normalize(department),
+        [_normalize(line.get("description")) for line in order_lines],
+    ]
+    return hashlib.sha256(orjson.dumps(payload)).hexdigest()
+
+
+def _result(entry: ClassificationCacheEntry, cached: bool) -> dict:
+    return {
+        "commodity_group_id": entry.commodity_group_id,
+        "confidence": entry.confidence,
+        "rationale": entry.rationale or "",
+        "cached": cached,
+    }
+
+
+def cached_results(db: Session, keys: list[str], taxonomy: Taxonomy) -> dict[str, dict]:
+    """Cache hits for `keys` whose group still exists, by key."""
+    entries = db.query(ClassificationCacheEntry).filter(ClassificationCacheEntry.key.in_(keys)).all() if keys else []
+    return {entry.key: _result(entry, True) for entry in entries if entry.commodity_group_id in taxonomy.groups}
+
+
+def store_results(db: Session, results: dict[str, dict], model: str | None, taxonomy: Taxonomy) -> dict[str, dict]:
+    """
+    Cache LLM results by key and return them normalized. Results naming an
+    unknown group are not cached, nor are zero-confidence ones: that is the
+    fallback for an unreadable reply, which the next call may well get right.
+    """
+    normalized = {}
+    for key, result in results.items():
+        group_id = str(result.get("commodity_group_id") or "")
+        try:
+            confidence = float(result.get("confidence") or 0.0)
+        except (TypeError, ValueError):
+            confidence = 0.0
+        entry = ClassificationCacheEntry(
+            key=key,
+            commodity_group_id=group_id,
+            confidence=confidence,
+            rationale=str(result.get("rationale") or ""),
+            model=model,
+        )
+        normalized[key] = _result(entry, False)
+        if group_id in taxonomy.groups and confidence > 0:
+            db.merge(entry)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker cached the same input first; its result is as good.
+        db.rollback()
+    return normalized
+
+
+def classify(
+    db: Session,
+    title: str,
+    order_lines: list,
+    vendor_name: str = "",
+    department: str = "",
+    usage: dict | None = None,
+) -> dict:
+    taxonomy = get_taxonomy(db)
+    key = cache_key(title, order_lines, vendor_name, department)
+    hit = cached_results(db, [key], taxonomy).get(key)
+    if hit is not None:
+        return hit
+
+    usage = {} if usage is None else usage
+    result = classify_commodity_group(
+        title=title,
+        order_lines=order_lines,
+        vendor_name=vendor_name,
+        department=department,
+        usage=usage,
+        commodity_list=taxonomy.prompt_block,
+    )
+    return store_results(db, {key: result}, usage.get("classification_model"), taxonomy)[key]
+
+
+def _item_key(item: dict) -> str:
+    return cache_key(item["title"], item.get("order_lines") or [], item.get("vendor_name", ""), item.get("department", ""))
+
+
+def _classify_chunk(chunk: dict[str, dict], commodity_list: str) -> tuple[dict[str, dict], dict]:
+    """Classify {key: item} in one call; items the model left out are retried one by one."""
+    usage: dict = {}
+    # Short positional ids keep the prompt small; they are mapped back to cache keys.
+    keys = list(chunk)
+    numbered = [{**chunk[key], "id": str(number)} for number, key in enumerate(keys, 1)]
+    answered = classify_commodity_groups_batch(numbered, commodity_list, usage=usage)
+    results = {keys[int(number) - 1]: result for number, result in answered.items()}
+    for key in keys:
+        if key not in results:
+            item = chunk[key]
+            results[key] = classify_commodity_group(
+                title=item["title"],
+                order_lines=item.get("order_lines") or [],
+                vendor_name=item.get("vendor_name", ""),
+                department=item.get("department", ""),
+                usage=usage,
+                commodity_list=commodity_list,
+            )
+    return results, usage
+
+
+def _ndjson(item_id: str, result: dict) -> str:
+    return orjson.dumps({"id": item_id, **result}).decode() + "\n"
+
+
+def iter_batch_classification(engine: Engine, items: list[dict]) -> Iterator[str]:
+    """
+    NDJSON lines `{"id", "commodity_group_id", "confidence", "rationale", "cached"}`,
+    or `{"id", "error"}`, in completion order. Items with identical input share one result.
+    """
+    with Session(bind=engine) as db:
+        taxonomy = get_taxonomy(db)
+        ids_by_key: dict[str, list[str]] = {}
+        items_by_key: dict[str, dict] = {}
+        for item in items:
+            key = _item_key(item)
+            ids_by_key.setdefault(key, []).append(item["id"])
+            items_by_key.setdefault(key, item)
+
+        hits = cached_results(db, list(ids_by_key), taxonomy)
+        for key, result in hits.items():
+            for item_id in ids_by_key[key]:
+                yield _ndjson(item_id, result)
+
+        pending = [key for key in ids_by_key if key not in hits]
+        chunks = [
+            {key: items_by_key[key] for key in pending[start:start + CLASSIFY_BATCH_SIZE]}
+            for start in range(0, len(pending), CLASSIFY_BATCH_SIZE)
+        ]
+        if not chunks:
+            return
+
+        pool = ThreadPoolExecutor(max_workers=CLASSIFY_BATCH_CONCURRENCY)
+        try:
+            running = {pool.submit(_classify_chunk, chunk, taxonomy.prompt_block): chunk for chunk in chunks}
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = running.pop(future)
+                    try:
+                        results, usage = future.result()
+                    except Exception as e:
+                        for key in chunk:
+                            for item_id in ids_by_key[key]:
+                                yield _ndjson(item_id, {"error": f"Classification failed: {e}"})
+                        continue
+                    # Cached here rather than in the pool: Starlette advances this generator
+                    # on any free threadpool thread, but one step at a time, so the session
+                    # is never used by two threads at once.
+                    stored = store_results(db, results, usage.get("classification_model"), taxonomy)
+                    for key, result in stored.items():
+                        for item_id in ids_by_key[key]:
+                            yield _ndjson(item_id, result)
+        finally:
+            # A disconnected client stops the calls that have not started yet.
+            pool.shutdown(wait=False, cancel_futures=True)
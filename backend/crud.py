@@ -0,0 +1,540 @@
+"""
+Database operations behind the requests router.
+
+The functions take a synchronous `Session` so the same code serves both the
+sync handlers and the async ones, which call them through
+`AsyncSession.run_sync`. Anything returned to a handler is fully loaded, since
+lazy loading is not available once control is back on the event loop.
+"""
+from datetime import datetime, UTC
+from typing import BinaryIO
+
+from sqlalchemy import and_, case, func, insert, select, tuple_, update
+from sqlalchemy.orm import Session, selectinload
+
+from backend.schemas import (
+    BulkStatusUpdateRequest,
+    BulkStatusUpdateResponse,
+    OrderLinePatch,
+    OrderLineUpdate,
+    ProcurementRequestCreate,
+    ProcurementRequestUpdate,
+    RequestFilters,
+    StatusUpdateRequest,
+    SummaryField,
+)
+from database import blob_store, duplicates, outbox, spend_summary, vendors
+from database.database import pdf_store
+from database.models import (
+    ProcurementRequest,
+    OrderLine,
+    StatusHistory,
+    RequestStatus,
+    TOTAL_MISMATCH_TOLERANCE,
+)
+
+class InvalidOrderLine(ValueError):
+    pass
+
+
+REQUEST_RELATIONSHIPS = (
+    selectinload(ProcurementRequest.order_lines),
+    selectinload(ProcurementRequest.status_history),
+)
+
+
+def apply_request_filters(query, filters: RequestFilters):
+    """Narrow a ProcurementRequest query; all given filters are combined with AND."""
+    equality_filters = {
+        ProcurementRequest.status: filters.status,
+        ProcurementRequest.department: filters.department,
+        ProcurementRequest.commodity_group_id: filters.commodity_group_id,
+        ProcurementRequest.vat_id: filters.vat_id,
+        ProcurementRequest.currency: filters.currency,
+        ProcurementRequest.requestor_name: filters.requestor_name,
+        ProcurementRequest.vendor_id: filters.vendor_id,
+    }
+    for column, value in equality_filters.items():
+        if value:
+            query = query.filter(column == value)
+
+    if filters.created_from:
+        query = query.filter(ProcurementRequest.created_at >= filters.created_from)
+    if filters.created_to:
+        query = query.filter(ProcurementRequest.created_at <= filters.created_to)
+    if filters.updated_from:
+        query = query.filter(ProcurementRequest.updated_at >= filters.updated_from)
+    if filters.updated_to:
+        query = query.filter(ProcurementRequest.updated_at <= filters.updated_to)
+
+    if filters.search:
+        search_pattern = f"%{filters.search}%"
+        query = query.filter(
+            (ProcurementRequest.title.ilike(search_pattern))
+            | (ProcurementRequest.vendor_name.ilike(search_pattern))
+            | (ProcurementRequest.requestor_name.ilike(search_pattern))
+        )
+
+    return query
+
+
+def list_requests(db: Session, filters: RequestFilters) -> list[ProcurementRequest]:
+    query = apply_request_filters(db.query(ProcurementRequest), filters)
+    return query.options(*REQUEST_RELATIONSHIPS).order_by(ProcurementRequest.created_at.desc()).all()
+
+
+def _summary_columns(line_totals) -> dict:
+    calculated = func.coalesce(line_totals.c.total_amount, 0.0)
+    stated = ProcurementRequest.stated_total_cost
+    mismatch = case(
+        (and_(stated.is_not(None), func.abs(stated - calculated) > TOTAL_MISMATCH_TOLERANCE), True),
+        else_=False,
+    )
+    return {
+        **{
+            name: getattr(ProcurementRequest, name)
+            for name in (
+                "id", "requestor_name", "title", "vendor_name", "vat_id", "department",
+                "commodity_group_id", "currency", "status", "created_at", "updated_at", "version",
+                "stated_total_cost", "pdf_sha256",
+            )
+        },
+        "calculated_total_cost": calculated,
+        "has_total_mismatch": mismatch,
+        "line_count": func.coalesce(line_totals.c.line_count, 0),
+    }
+
+
+LINE_TOTAL_FIELDS = {"calculated_total_cost", "has_total_mismatch", "line_count"}
+
+
+def _summary_statement(fields: list[SummaryField] | None = None):
+    line_totals = spend_summary.line_totals_subquery()
+    columns = _summary_columns(line_totals)
+    names = list(columns) if not fields else ["id", *dict.fromkeys(f for f in fields if f != "id")]
+
+    statement = select(*(columns[name].label(name) for name in names))
+    if LINE_TOTAL_FIELDS.intersection(names):
+        statement = statement.select_from(ProcurementRequest).outerjoin(
+            line_totals, line_totals.c.request_id == ProcurementRequest.id
+        )
+    return statement
+
+
+def list_request_summaries(
+    db: Session, filters: RequestFilters, fields: list[SummaryField] | None = None
+) -> list[dict]:
+    """
+    Overview rows as plain dicts from a single query, without ORM objects.
+
+    Line totals come from an aggregated subquery that is only joined when a
+    requested field needs it.
+    """
+    statement = apply_request_filters(_summary_statement(fields), filters)
+    statement = statement.order_by(ProcurementRequest.created_at.desc())
+    return [dict(row) for row in db.execute(statement).mappings()]
+
+
+def get_request_summaries(db: Session, request_ids: list[int]) -> dict[int, dict]:
+    statement = _summary_statement().where(ProcurementRequest.id.in_(request_ids))
+    return {row["id"]: dict(row) for row in db.execute(statement).mappings()}
+
+
+REVISION_COLUMNS = (ProcurementRequest.id, ProcurementRequest.version, ProcurementRequest.created_at)
+
+
+def get_request_revision(db: Session, request_id: int):
+    """(id, version, created_at) of one request, or None."""
+    return db.execute(
+        select(*REVISION_COLUMNS).where(ProcurementRequest.id == request_id)
+    ).one_or_none()
+
+
+def list_request_revisions(db: Session, filters: RequestFilters) -> list:
+    """(id, version, created_at) of every matching request, in list order."""
+    statement = apply_request_filters(select(*REVISION_COLUMNS), filters)
+    return db.execute(statement.order_by(ProcurementRequest.created_at.desc())).all()
+
+
+def get_requests_by_ids(db: Session, request_ids: list[int]) -> list[ProcurementRequest]:
+    return (
+        db.query(ProcurementRequest)
+        .options(*REQUEST_RELATIONSHIPS)
+        .filter(ProcurementRequest.id.in_(request_ids))
+        .populate_existing()
+        .all()
+    )
+
+
+def get_request(db: Session, request_id: int) -> ProcurementRequest | None:
+    return (
+        db.query(ProcurementRequest)
+        .options(*REQUEST_RELATIONSHIPS)
+        .filter(ProcurementRequest.id == request_id)
+        .populate_existing()
+        .first()
+    )
+
+
+def build_order_line(line_data) -> OrderLine:
+    return OrderLine(
+        description=line_data.description,
+        unit_price=line_data.unit_price,
+        quantity=line_data.quantity,
+        unit=line_data.unit,
+        stated_total_price=line_data.stated_total_price,
+    )
+
+
+def _assign_changed(obj, values: dict) -> None:
+    for key, value in values.items():
+        if getattr(obj, key) != value:
+            setattr(obj, key, value)
+
+
+def sync_order_lines(request: ProcurementRequest, lines_data: list[OrderLineUpdate]) -> None:
+    """Apply the minimal set of inserts, updates and deletes to match `lines_data`."""
+    existing = {line.id: line for line in request.order_lines}
+    listed_ids = [line_data.id for line_data in lines_data if line_data.id is not None]
+    for line_id in listed_ids:
+        if line_id not in existing:
+            raise InvalidOrderLine(f"Order line {line_id} does not belong to request {request.id}")
+    kept = set(listed_ids)
+    if len(kept) != len(listed_ids):
+        raise InvalidOrderLine("An order line is listed more than once")
+
+    for line_id, line in existing.items():
+        if line_id not in kept:
+            request.order_lines.remove(line)
+
+    for line_data in lines_data:
+        if line_data.id is None:
+            request.order_lines.append(build_order_line(line_data))
+        else:
+            _assign_changed(existing[line_data.id], line_data.model_dump(exclude={"id"}))
+
+
+def create_request(db: Session, data: ProcurementRequestCreate) -> ProcurementRequest:
+    request = ProcurementRequest(
+        requestor_name=data.requestor_name,
+        title=data.title,
+        vendor_name=data.vendor_name,
+        vat_id=data.vat_id,
+        vendor_id=vendors.resolve_vendor(db, data.vendor_name, data.vat_id),
+        department=data.department,
+        commodity_group_id=data.commodity_group_id,
+        currency=data.currency,
+        stated_total_cost=data.stated_total_cost,
+        status=RequestStatus.OPEN.value,
+    )
+
+    for line_data in data.order_lines:
+        request.order_lines.append(build_order_line(line_data))
+
+    history = StatusHistory(
+        from_status=None,
+        to_status=RequestStatus.OPEN.value,
+        changed_by="system",
+    )
+    request.status_history.append(history)
+
+    db.add(request)
+    db.flush()
+    spend_summary.apply_changes(db, added=[spend_summary.request_contribution(request)])
+    duplicates.index_requests(db, [request])
+    outbox.record(db, outbox.CREATED, [(request.id, request.version)])
+    db.commit()
+    return get_request(db, request.id)
+
+
+def update_request(db: Session, request: ProcurementRequest, data: ProcurementRequestUpdate) -> ProcurementRequest:
+    before = spend_summary.request_contribution(request)
+
+    if data.requestor_name is not None:
+        request.requestor_name = data.requestor_name
+    if data.title is not None:
+        request.title = data.title
+    if data.vendor_name is not None:
+        request.vendor_name = data.vendor_name
+    if data.vat_id is not None:
+        request.vat_id = data.vat_id
+    if data.vendor_name is not None or data.vat_id is not None:
+        request.vendor_id = vendors.resolve_vendor(db, request.vendor_name, request.vat_id)
+    if data.department is not None:
+        request.department = data.department
+    if data.commodity_group_id is not None:
+        request.commodity_group_id = data.commodity_group_id
+    if data.currency is not None:
+        request.currency = data.currency
+    if data.stated_total_cost is not None:
+        request.stated_total_cost = data.stated_total_cost
+
+    if data.order_lines is not None:
+        sync_order_lines(request, data.order_lines)
+
+    request.touch()
+    db.flush()
+    spend_summary.apply_changes(db, added=[spend_summary.request_contribution(request)], removed=[before])
+    duplicates.index_requests(db, [request])
+    outbox.record(db, outbox.UPDATED, [(request.id, request.version)])
+    db.commit()
+    return get_request(db, request.id)
+
+
+def update_order_line(db: Session, request: ProcurementRequest, line_id: int, data: OrderLinePatch) -> OrderLine:
+    line = next((line for line in request.order_lines if line.id == line_id), None)
+    if line is None:
+        raise InvalidOrderLine(f"Order line {line_id} does not belong to request {request.id}")
+
+    before = spend_summary.request_contribution(request)
+    _assign_changed(line, data.model_dump(exclude_unset=True))
+    request.touch()
+    db.flush()
+    spend_summary.apply_changes(db, added=[spend_summary.request_contribution(request)], removed=[before])
+    duplicates.index_requests(db, [request])
+    outbox.record(db, outbox.UPDATED, [(request.id, request.version)])
+    db.commit()
+    return line
+
+
+def update_status(db: Session, request: ProcurementRequest, data: StatusUpdateRequest) -> ProcurementRequest:
+    old_status = request.status
+    new_status = data.status.value
+
+    if old_status == new_status:
+        return request
+
+    before = spend_summary.request_contribution(request)
+    request.status = new_status
+
+    history = StatusHistory(
+        from_status=old_status,
+        to_status=new_status,
+        changed_by=data.changed_by,
+    )
+    request.status_history.append(history)
+
+    db.flush()
+    spend_summary.apply_changes(db, added=[spend_summary.request_contribution(request)], removed=[before])
+    outbox.record(db, outbox.STATUS_CHANGED, [(request.id, request.version)])
+    db.commit()
+    return get_request(db, request.id)
+
+
+BULK_STATUS_CHUNK_SIZE = 1000
+
+
+def bulk_update_status(db: Session, data: BulkStatusUpdateRequest) -> BulkStatusUpdateResponse:
+    """
+    Move every selected request to `data.status` in one transaction.
+
+    One UPDATE ... RETURNING per chunk of ids flips the statuses, and the history
+    and outbox rows are written for the ids it returned, so the work is a
+    handful of statements per chunk rather than a round-trip per request.
+
+    The UPDATE only matches requests still at the version read here. One changed
+    concurrently keeps that change and is reported as unchanged, and the spend
+    summary is only moved for the requests this call actually changed.
+    """
+    new_status = data.status.value
+    statement = spend_summary.totals_statement().add_columns(ProcurementRequest.version)
+    if data.filter is not None:
+        rows = db.execute(apply_request_filters(statement, data.filter)).all()
+    else:
+        rows = []
+        for start in range(0, len(data.ids), BULK_STATUS_CHUNK_SIZE):
+            chunk = data.ids[start:start + BULK_STATUS_CHUNK_SIZE]
+            rows.extend(db.execute(statement.where(ProcurementRequest.id.in_(chunk))).all())
+
+    changing = {row.id: row for row in rows if row.status != new_status}
+    versions = [(row.id, row.version) for row in changing.values()]
+    changed_ids = []
+    now = datetime.now(UTC)
+
+    for start in range(0, len(versions), BULK_STATUS_CHUNK_SIZE):
+        chunk = versions[start:start + BULK_STATUS_CHUNK_SIZE]
+        touched = db.execute(
+            update(ProcurementRequest)
+            .where(tuple_(ProcurementRequest.id, ProcurementRequest.version).in_(chunk))
+            .values(status=new_status, updated_at=now, version=ProcurementRequest.version + 1)
+            .returning(ProcurementRequest.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        if not touched:
+            continue
+        db.execute(
+            insert(StatusHistory),
+            [
+                {
+                    "request_id": request_id,
+                    "from_status": changing[request_id].status,
+                    "to_status": new_status,
+                    "changed_at": now,
+                    "changed_by": data.changed_by,
+                }
+                for request_id in touched
+            ],
+        )
+        outbox.record_changed(db, outbox.STATUS_CHANGED, touched)
+        changed_ids.extend(touched)
+
+    changed = [changing[request_id] for request_id in changed_ids]
+    spend_summary.apply_changes(
+        db,
+        added=[spend_summary.contribution_from_row(row, status=new_status) for row in changed],
+        removed=[spend_summary.contribution_from_row(row) for row in changed],
+    )
+    db.commit()
+
+    found = {row.id for row in rows}
+    return BulkStatusUpdateResponse(
+        changed=sorted(changed_ids),
+        unchanged=sorted(found - set(changed_ids)),
+        not_found=sorted(set(data.ids) - found) if data.ids is not None else [],
+    )
+
+
+def _release_pdf(db: Session, request: ProcurementRequest) -> str | None:
+    """Drop the request's blob reference; returns the digest if the file may now be unlinked."""
+    digest = request.pdf_sha256
+    request.pdf_sha256 = None
+    request.pdf_filename = None
+    if digest and blob_store.release(db, digest):
+        return digest
+    return None
+
+
+def _unlink_released(db: Session, digest: str | None) -> None:
+    if digest:
+        blob_store.unlink_if_unreferenced(db, pdf_store, digest)
+
+
+def attach_pdf(
+    db: Session, request: ProcurementRequest, digest: str, size: int, filename: str, source: BinaryIO | None = None
+) -> ProcurementRequest:
+    """
+    Point the request at a stored blob, releasing the PDF it had before.
+
+    The blob is written before its reference exists, so a concurrent release of
+    the last other reference may unlink it in between. `acquire` locks the
+    digest until the commit, so no unlink can run after the existence check
+    below, and a blob unlinked before it is put again from `source`, the upload
+    it was stored from.
+    """
+    if request.pdf_sha256 == digest:
+        released = None
+    else:
+        released = _release_pdf(db, request)
+        blob_store.acquire(db, digest, size)
+        request.pdf_sha256 = digest
+        if source is not None and not pdf_store.exists(digest):
+            source.seek(0)
+            pdf_store.put(source)
+    request.pdf_filename = filename
+    db.flush()
+    outbox.record(db, outbox.UPDATED, [(request.id, request.version)])
+    db.commit()
+    _unlink_released(db, released)
+    return request
+
+
+def detach_pdf(db: Session, request: ProcurementRequest) -> None:
+    if not request.pdf_sha256:
+        return
+    released = _release_pdf(db, request)
+    db.flush()
+    outbox.record(db, outbox.UPDATED, [(request.id, request.version)])
+    db.commit()
+    _unlink_released(db, released)
+
+
+def delete_request(db: Session, request: ProcurementRequest) -> None:
+    released = _release_pdf(db, request) if request.pdf_sha256 else None
+    spend_summary.apply_changes(db, removed=[spend_summary.request_contribution(request)])
+    outbox.record(db, outbox.DELETED, [(request.id, request.version)])
+    duplicates.remove(db, [request.id])
+    db.delete(request)
+    db.commit()
+    _unlink_released(db, released)
+
+
+def bulk_create_requests(db: Session, items: list[ProcurementRequestCreate]) -> list[int]:
+    """
+    Insert many validated requests in one transaction.
+
+    Requests are inserted with a single multi-row INSERT ... RETURNING, then
+    order lines and the initial status history rows are inserted with
+    executemany. Returns the new ids in input order.
+    """
+    if not items:
+        return []
+
+    now = datetime.now(UTC)
+    vendor_ids = vendors.resolve_vendors(db, [(item.vendor_name, item.vat_id) for item in items])
+    request_rows = [
+        {
+            "requestor_name": item.requestor_name,
+            "title": item.title,
+            "vendor_name": item.vendor_name,
+            "vat_id": item.vat_id,
+            "vendor_id": vendor_ids[item.vendor_name, item.vat_id],
+            "department": item.department,
+            "commodity_group_id": item.commodity_group_id,
+            "currency": item.currency,
+            "stated_total_cost": item.stated_total_cost,
+            "status": RequestStatus.OPEN.value,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for item in items
+    ]
+    request_ids = list(
+        db.execute(
+            insert(ProcurementRequest).returning(ProcurementRequest.id, sort_by_parameter_order=True),
+            request_rows,
+        ).scalars()
+    )
+
+    line_rows = [
+        {
+            "request_id": request_id,
+            "description": line.description,
+            "unit_price": line.unit_price,
+            "quantity": line.quantity,
+            "unit": line.unit,
+            "stated_total_price": line.stated_total_price,
+        }
+        for request_id, item in zip(request_ids, items)
+        for line in item.order_lines
+    ]
+    if line_rows:
+        db.execute(insert(OrderLine), line_rows)
+
+    history_rows = [
+        {
+            "request_id": request_id,
+            "from_status": None,
+            "to_status": RequestStatus.OPEN.value,
+            "changed_at": now,
+            "changed_by": "system",
+        }
+        for request_id in request_ids
+    ]
+    db.execute(insert(StatusHistory), history_rows)
+
+    month = spend_summary.month_of(now)
+    spend_summary.apply_changes(db, added=[
+        spend_summary.SpendContribution(
+            spend_summary.SpendKey(
+                month, item.commodity_group_id, item.department, item.vat_id, item.currency, RequestStatus.OPEN.value
+            ),
+            len(item.order_lines),
+            sum(line.unit_price * line.quantity for line in item.order_lines),
+        )
+        for item in items
+    ])
+    duplicates.index(db, {request_id: duplicates.signature_of(item) for request_id, item in zip(request_ids, items)})
+    outbox.record(db, outbox.CREATED, [(request_id, 1) for request_id in request_ids])
+
+    db.commit()
+    return request_ids
@@ -0,0 +1,153 @@
+"""
+ETags, conditional requests and the serialized-response cache for requests.
+
+Every ProcurementRequest carries a `version` that is bumped on any change, so
+(id, version) identifies one exact JSON representation. `created_at` is folded
+in as well because SQLite may hand a deleted request's id to a new one. The
+resulting tag is used as the ETag, as the key of an in-process LRU of rendered
+JSON, and as the precondition for `If-Match` on writes. Cache entries never
+need invalidation: a change produces a new key and stale keys simply fall out
+of the LRU.
+
+The render functions take a sync Session so the async router can call them
+through `AsyncSession.run_sync` as well.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import UTC
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from backend import crud
+from backend.schemas import ProcurementRequestListResponse, ProcurementRequestResponse, RequestFilters
+from database.models import ProcurementRequest
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "4096"))
+
+
+class LRUCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_cache = LRUCache(RESPONSE_CACHE_SIZE)
+
+
+def request_etag(request) -> str:
+    """ETag of a request or of a `crud.get_request_revision` row."""
+    created_at = request.created_at
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=UTC)
+    created_us = int(created_at.timestamp() * 1_000_000)
+    return f'"{request.id}-{request.version}-{created_us:x}"'
+
+
+def _opaque_tags(header: str) -> list[str]:
+    # Weak validators (W/"...") compare equal to their strong counterpart here,
+    # since compression middleware may weaken the tags on the way out.
+    return [tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()]
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    tags = _opaque_tags(header)
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def require_if_match(if_match: str | None, request: ProcurementRequest) -> None:
+    """Reject the write with 412 if the client edited an outdated version."""
+    if if_match is not None and not etag_matches(if_match, request_etag(request)):
+        raise HTTPException(status_code=412, detail="Request was modified by someone else")
+
+
+def _json_response(body: bytes, etag: str) -> Response:
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def _render(schema: type[BaseModel], request: ProcurementRequest) -> bytes:
+    key = (schema.__name__, request_etag(request))
+    body = response_cache.get(key)
+    if body is None:
+        body = schema.model_validate(request).model_dump_json().encode()
+        response_cache.put(key, body)
+    return body
+
+
+def render_request_detail(db: Session, request_id: int, if_none_match: str | None) -> Response | None:
+    """Conditional GET for one request; returns None if it does not exist."""
+    revision = crud.get_request_revision(db, request_id)
+    if revision is None:
+        return None
+    etag = request_etag(revision)
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    body = response_cache.get((ProcurementRequestResponse.__name__, etag))
+    if body is None:
+        request = crud.get_request(db, request_id)
+        if request is None:
+            return None
+        body = _render(ProcurementRequestResponse, request)
+        etag = request_etag(request)
+    return _json_response(body, etag)
+
+
+def render_request_list(db: Session, filters: RequestFilters, if_none_match: str | None) -> Response:
+    """
+    Conditional GET for the request list.
+
+    The list ETag is a digest of the member ETags, which one narrow
+    index-backed query yields. Only requests missing from the cache are
+    loaded and serialized; the rest is spliced in from cached JSON.
+    """
+    member_etags = {row.id: request_etag(row) for row in crud.list_request_revisions(db, filters)}
+    digest = hashlib.blake2b(",".join(member_etags.values()).encode(), digest_size=16).hexdigest()
+    etag = f'"list-{digest}"'
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    schema = ProcurementRequestListResponse
+    bodies = {
+        request_id: response_cache.get((schema.__name__, member_etag))
+        for request_id, member_etag in member_etags.items()
+    }
+    missing = [request_id for request_id, body in bodies.items() if body is None]
+    if missing:
+        for request in crud.get_requests_by_ids(db, missing):
+            bodies[request.id] = _render(schema, request)
+
+    body = b"[" + b",".join(bodies[request_id] for request_id in member_etags if bodies.get(request_id)) + b"]"
+    return _json_response(body, etag)
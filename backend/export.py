@@ -0,0 +1,180 @@
+"""
+Streaming export of requests and their order lines.
+
+Rows are read with a server-side cursor (`stream_results` + `yield_per`) and
+encoded batch by batch, so memory use depends on the batch size rather than on
+the number of requests. CSV and Parquet are flat (one row per order line, with
+the request columns repeated); NDJSON has one object per request with nested
+order lines.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from backend.crud import apply_request_filters
+from backend.schemas import RequestFilters
+from database.models import ProcurementRequest, OrderLine
+
+EXPORT_BATCH_SIZE = 5000
+
+REQUEST_COLUMNS = [
+    ProcurementRequest.id,
+    ProcurementRequest.requestor_name,
+    ProcurementRequest.title,
+    ProcurementRequest.vendor_name,
+    ProcurementRequest.vat_id,
+    ProcurementRequest.department,
+    ProcurementRequest.commodity_group_id,
+    ProcurementRequest.currency,
+    ProcurementRequest.stated_total_cost,
+    ProcurementRequest.status,
+    ProcurementRequest.pdf_filename,
+    ProcurementRequest.created_at,
+    ProcurementRequest.updated_at,
+]
+LINE_COLUMNS = [
+    OrderLine.id.label("line_id"),
+    OrderLine.description.label("line_description"),
+    OrderLine.unit_price.label("line_unit_price"),
+    OrderLine.quantity.label("line_quantity"),
+    OrderLine.unit.label("line_unit"),
+    OrderLine.stated_total_price.label("line_stated_total_price"),
+]
+REQUEST_FIELDS = [column.key for column in REQUEST_COLUMNS]
+LINE_FIELDS = [column.key for column in LINE_COLUMNS]
+
+
+def _export_statement(filters: RequestFilters):
+    statement = (
+        select(*REQUEST_COLUMNS, *LINE_COLUMNS)
+        .select_from(ProcurementRequest)
+        .outerjoin(OrderLine, OrderLine.request_id == ProcurementRequest.id)
+    )
+    return apply_request_filters(statement, filters).order_by(ProcurementRequest.id, OrderLine.id)
+
+
+def _iter_batches(engine: Engine, filters: RequestFilters) -> Iterator[list]:
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE).execute(
+            _export_statement(filters)
+        )
+        for partition in result.partitions():
+            yield partition
+
+
+def _isoformat(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def iter_csv(engine: Engine, filters: RequestFilters) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(REQUEST_FIELDS + LINE_FIELDS)
+    for batch in _iter_batches(engine, filters):
+        writer.writerows([_isoformat(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_ndjson(engine: Engine, filters: RequestFilters) -> Iterator[str]:
+    current = None
+    request_width = len(REQUEST_FIELDS)
+
+    for batch in _iter_batches(engine, filters):
+        lines = []
+        for row in batch:
+            if current is None or current["id"] != row.id:
+                if current is not None:
+                    lines.append(json.dumps(current, ensure_ascii=False))
+                current = {key: _isoformat(value) for key, value in zip(REQUEST_FIELDS, row[:request_width])}
+                current["order_lines"] = []
+            if row.line_id is not None:
+                current["order_lines"].append(
+                    {key.removeprefix("line_"): value for key, value in zip(LINE_FIELDS, row[request_width:])}
+                )
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    if current is not None:
+        yield json.dumps(current, ensure_ascii=False) + "\n"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands out what has been written so far."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_parquet(engine: Engine, filters: RequestFilters) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            ("id", pa.int64()),
+            ("requestor_name", pa.string()),
+            ("title", pa.string()),
+            ("vendor_name", pa.string()),
+            ("vat_id", pa.string()),
+            ("department", pa.string()),
+            ("commodity_group_id", pa.string()),
+            ("currency", pa.string()),
+            ("stated_total_cost", pa.float64()),
+            ("status", pa.string()),
+            ("pdf_filename", pa.string()),
+            ("created_at", pa.timestamp("us")),
+            ("updated_at", pa.timestamp("us")),
+            ("line_id", pa.int64()),
+            ("line_description", pa.string()),
+            ("line_unit_price", pa.float64()),
+            ("line_quantity", pa.float64()),
+            ("line_unit", pa.string()),
+            ("line_stated_total_price", pa.float64()),
+        ]
+    )
+
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in _iter_batches(engine, filters):
+            # Each database batch becomes one row group.
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+
+# format -> (encoder, media type)
+EXPORT_FORMATS = {
+    "csv": (iter_csv, "text/csv; charset=utf-8"),
+    "ndjson": (iter_ndjson, "application/x-ndjson"),
+    "parquet": (iter_parquet, "application/vnd.apache.parquet"),
+}
@@ -2,13 +2,10 @@ import os
 import io
 import json
 import base64
-from openai import OpenAI
-from pypdf import PdfReader
-from dotenv import load_dotenv
 from database.commodity_groups import get_commodity_groups_for_prompt
 
-load_dotenv()
-
+# openai and pypdf take most of the app's import time, so they are imported on
+# first use; .env is loaded by database.database, which the app imports first.
 _client = None
 
 # Toggle für Vision-Modus (True = GPT-4o mit Bildern, False = nur Text)
@@ -18,6 +15,10 @@ USE_VISION = os.getenv("USE_VISION", "true").lower() == "true"
 def get_client():
     global _client
     if _client is None:
+        from dotenv import load_dotenv
+        from openai import OpenAI
+
+        load_dotenv()
         _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     return _client
 
@@ -39,6 +40,16 @@ def pdf_to_images_base64(file_bytes: bytes) -> list[str]:
     return images
 
 
+def record_usage(usage: dict | None, response, model_key: str = "model") -> None:
+    """Sammelt Modell und Token-Verbrauch einer Antwort in `usage` (falls übergeben)."""
+    if usage is None:
+        return
+    usage[model_key] = response.model
+    if response.usage is not None:
+        usage["prompt_tokens"] = usage.get("prompt_tokens", 0) + response.usage.prompt_tokens
+        usage["completion_tokens"] = usage.get("completion_tokens", 0) + response.usage.completion_tokens
+
+
 def log_openai_request(messages: list, model: str):
     print("\n" + "=" * 60)
     print("🔵 OPENAI REQUEST")
@@ -59,6 +70,8 @@ def log_openai_response(response):
 
 
 def extract_text_from_pdf(file_bytes: bytes) -> str:
+    from pypdf import PdfReader
+
     reader = PdfReader(io.BytesIO(file_bytes))
     text = ""
     for page in reader.pages:
@@ -66,13 +79,14 @@ def extract_text_from_pdf(file_bytes: bytes) -> str:
     return text
 
 
-def extract_offer_data_from_pdf(file_bytes: bytes, use_vision: bool = None) -> dict:
+def extract_offer_data_from_pdf(file_bytes: bytes, use_vision: bool = None, usage: dict | None = None) -> dict:
     """
     Extrahiert Angebotsdaten aus PDF.
     
     Args:
         file_bytes: PDF als Bytes
         use_vision: True=Vision+Text, False=nur Text, None=USE_VISION env var
+        usage: optional, erhält Modell und Token-Verbrauch
     """
     if use_vision is None:
         use_vision = USE_VISION
@@ -82,9 +96,9 @@ def extract_offer_data_from_pdf(file_bytes: bytes, use_vision: bool = None) -> d
     
     if use_vision:
         images = pdf_to_images_base64(file_bytes)
-        return extract_offer_data_vision(text, images)
+        return extract_offer_data_vision(text, images, usage)
     else:
-        return extract_offer_data(text)
+        return extract_offer_data(text, usage)
 
 required_json_structure_offer = """Required JSON structure:
 {
@@ -113,7 +127,7 @@ For title: If no explicit offer title exists, create a short meaningful title su
 For currency: Default to EUR if not explicitly stated but Euro symbols (€) are used.
 """
 
-def extract_offer_data(text: str) -> dict:
+def extract_offer_data(text: str, usage: dict | None = None) -> dict:
     system_prompt = """You are an expert at extracting structured data from vendor offers.
 Extract the following information from the provided text and return it as valid JSON only.
 Do not include any explanation, only the JSON object.
@@ -132,6 +146,7 @@ Do not include any explanation, only the JSON object.
         messages=messages,
         response_format={"type": "json_object"}
     )
+    record_usage(usage, response)
 
     log_openai_response(response)
 
@@ -141,8 +156,16 @@ Do not include any explanation, only the JSON object.
         return {}
 
 
-def classify_commodity_group(title: str, order_lines: list, vendor_name: str = "", department: str = "") -> dict:
-    commodity_list = get_commodity_groups_for_prompt()
+def classify_commodity_group(
+    title: str,
+    order_lines: list,
+    vendor_name: str = "",
+    department: str = "",
+    usage: dict | None = None,
+    commodity_list: str | None = None,
+) -> dict:
+    if commodity_list is None:
+        commodity_list = get_commodity_groups_for_prompt()
     
     order_lines_text = "\n".join([f"- {line.get('description', '')}" for line in order_lines])
     
@@ -179,6 +202,7 @@ Order Lines:
         messages=messages,
         response_format={"type": "json_object"}
     )
+    record_usage(usage, response, "classification_model")
 
     #log_openai_response(response)
 
@@ -188,7 +212,69 @@ Order Lines:
         return {"commodity_group_id": "009", "confidence": 0.0, "rationale": "Classification failed"}
 
 
-def extract_offer_data_vision(text: str, images_base64: list[str]) -> dict:
+def _describe_item(item: dict) -> str:
+    lines = "; ".join(line.get("description", "") for line in item.get("order_lines") or [])
+    parts = [f"id: {item['id']}", f"Title: {item.get('title', '')}"]
+    if item.get("vendor_name"):
+        parts.append(f"Vendor: {item['vendor_name']}")
+    if item.get("department"):
+        parts.append(f"Department: {item['department']}")
+    if lines:
+        parts.append(f"Order Lines: {lines}")
+    return " | ".join(parts)
+
+
+def classify_commodity_groups_batch(items: list[dict], commodity_list: str, usage: dict | None = None) -> dict[str, dict]:
+    """
+    Klassifiziert mehrere Einträge mit einem einzigen Aufruf.
+    Jeder Eintrag braucht eine `id`; das Ergebnis ist nach diesen ids geordnet.
+    Fehlende ids bleiben im Ergebnis weg.
+    """
+    system_prompt = f"""You are an expert at classifying procurement requests into commodity groups.
+You receive several items, one per line, each starting with its id.
+For every item select the most appropriate commodity group from this list:
+
+{commodity_list}
+
+Return your response as valid JSON only with this structure:
+{{
+    "results": [
+        {{
+            "id": "string (the item id, exactly as given)",
+            "commodity_group_id": "string (the 3-digit ID like 001, 031, etc.)",
+            "confidence": number (0.0 to 1.0),
+            "rationale": "string (brief explanation)"
+        }}
+    ]
+}}
+Return exactly one result per item.
+"""
+
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": "Classify these procurement requests:\n" + "\n".join(_describe_item(i) for i in items)},
+    ]
+
+    response = get_client().chat.completions.create(
+        model="gpt-5-mini",
+        messages=messages,
+        response_format={"type": "json_object"}
+    )
+    record_usage(usage, response, "classification_model")
+
+    try:
+        results = json.loads(response.choices[0].message.content).get("results", [])
+    except (json.JSONDecodeError, AttributeError):
+        return {}
+    wanted = {str(item["id"]) for item in items}
+    return {
+        str(result["id"]): result
+        for result in results
+        if isinstance(result, dict) and str(result.get("id")) in wanted
+    }
+
+
+def extract_offer_data_vision(text: str, images_base64: list[str], usage: dict | None = None) -> dict:
     """
     Extrahiert Angebotsdaten mit GPT-4o Vision (Text + Bilder).
     Nutzt extrahierten Text als zusätzlichen Kontext.
@@ -229,6 +315,7 @@ Do not include any explanation, only the JSON object.
         messages=messages,
         response_format={"type": "json_object"}
     )
+    record_usage(usage, response)
     #log_openai_response(response)
 
     try:
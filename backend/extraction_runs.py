@@ -0,0 +1,83 @@
+"""
+Server-side extraction of a request's stored PDF.
+
+A run is created when a PDF is uploaded with `extract=true`, or on demand via
+`POST /api/requests/{id}/extractions`, and executed as a background task: the
+file is read from the blob store, so the browser never sends it a second time.
+Each run keeps the raw extraction and classification JSON together with the
+models, timings and token usage, so results can be compared across runs.
+"""
+import time
+from datetime import datetime, UTC
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from backend.classification import classify
+from backend.extraction import extract_offer_data_from_pdf, USE_VISION
+from database.database import pdf_store
+from database.models import ExtractionRun, ExtractionRunStatus, ProcurementRequest
+
+
+def create_run(db: Session, request: ProcurementRequest, use_vision: bool | None = None) -> ExtractionRun:
+    run = ExtractionRun(
+        request_id=request.id,
+        pdf_sha256=request.pdf_sha256,
+        use_vision=USE_VISION if use_vision is None else use_vision,
+    )
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def _elapsed_ms(started: float) -> int:
+    return round((time.perf_counter() - started) * 1000)
+
+
+def execute_run(engine: Engine, run_id: int) -> None:
+    """Run the extraction on its own session; failures are recorded on the run."""
+    with Session(bind=engine) as db:
+        run = db.get(ExtractionRun, run_id)
+        if run is None or run.status != ExtractionRunStatus.PENDING.value:
+            return
+        run.status = ExtractionRunStatus.RUNNING.value
+        run.started_at = datetime.now(UTC)
+        db.commit()
+
+        usage: dict = {}
+        try:
+            file_bytes = pdf_store.read(run.pdf_sha256)
+
+            started = time.perf_counter()
+            result = extract_offer_data_from_pdf(file_bytes, use_vision=run.use_vision, usage=usage)
+            run.extraction_ms = _elapsed_ms(started)
+            run.result = result
+
+            started = time.perf_counter()
+            run.classification = classify(
+                db,
+                title=result.get("title") or "",
+                order_lines=result.get("order_lines") or [],
+                vendor_name=result.get("vendor_name") or "",
+                department=result.get("department") or "",
+                usage=usage,
+            )
+            run.classification_ms = _elapsed_ms(started)
+            run.status = ExtractionRunStatus.SUCCEEDED.value
+        except Exception as e:
+            run.status = ExtractionRunStatus.FAILED.value
+            run.error = str(e) or type(e).__name__
+
+        run.model = usage.get("model")
+        run.classification_model = usage.get("classification_model")
+        run.prompt_tokens = usage.get("prompt_tokens")
+        run.completion_tokens = usage.get("completion_tokens")
+        run.finished_at = datetime.now(UTC)
+        try:
+            db.commit()
+        except (StaleDataError, IntegrityError):
+            # The request, and with it the run, was deleted in the meantime.
+            db.rollback()
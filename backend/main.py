@@ -1,13 +1,17 @@
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
 
-from backend.routers import requests, extraction, commodity_groups
-from database.database import init_db
+from backend import change_feed
+from backend.compression import CompressionMiddleware
+from backend.responses import ORJSONResponse
+from backend.static_files import StaticFrontend
+from backend.routers import requests, extraction, commodity_groups, analytics, pdfs, suggestions, vendors
+from database.database import engine, init_db, DB_ASYNC
 
 # Path to built frontend
 FRONTEND_DIR = Path(__file__).parent.parent / "frontend" / "dist"
@@ -16,10 +20,16 @@ FRONTEND_DIR = Path(__file__).parent.parent / "frontend" / "dist"
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    change_feed.prune_events(engine)
     yield
 
 
-app = FastAPI(title="Procuro API", version="1.0.0", lifespan=lifespan)
+app = FastAPI(
+    title="Procuro API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,24 +38,47 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
 
 app.include_router(requests.router)
+if DB_ASYNC:
+    from backend.routers import requests_async
+
+    app.include_router(requests_async.crud_router)
+else:
+    app.include_router(requests.crud_router)
 app.include_router(extraction.router)
 app.include_router(commodity_groups.router)
+app.include_router(analytics.router)
+app.include_router(pdfs.router)
+app.include_router(vendors.router)
+app.include_router(suggestions.router)
 
 
 @app.get("/api/health")
-def health_check():
+async def health_check():
+    # Liveness: answered on the event loop, without touching the database.
+    return {"status": "ok"}
+
+
+@app.get("/api/ready")
+def readiness_check():
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except SQLAlchemyError:
+        return ORJSONResponse({"status": "unavailable"}, status_code=503)
     return {"status": "ok"}
 
 
 # Serve frontend static files (for Docker/production)
 if FRONTEND_DIR.exists():
-    app.mount("/assets", StaticFiles(directory=FRONTEND_DIR / "assets"), name="assets")
-
-    @app.get("/{full_path:path}")
-    async def serve_frontend(full_path: str):
-        file_path = FRONTEND_DIR / full_path
-        if file_path.exists() and file_path.is_file():
-            return FileResponse(file_path)
-        return FileResponse(FRONTEND_DIR / "index.html")
+    frontend = StaticFrontend(FRONTEND_DIR)
+
+    @app.get("/{full_path:path}", include_in_schema=False)
+    async def serve_frontend(
+        full_path: str,
+        accept_encoding: str = Header(""),
+        if_none_match: str | None = Header(None),
+    ):
+        return frontend.response(full_path, accept_encoding, if_none_match)
@@ -0,0 +1,79 @@
+"""
+Page thumbnails and a first-page preview for stored PDFs.
+
+Images are rendered with PyMuPDF after an upload and stored next to the blob
+(see `blob_store.derived_key`), so they are shared by every request attaching
+the same file and removed with it. They are named by the PDF's content hash and
+never change, which lets the preview endpoints mark them immutable. Missing
+images (older uploads, a failed background run) are rendered on first request.
+"""
+import logging
+import os
+import threading
+
+from database.blob_store import BlobStore, LocalBlobStore, derived_key
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_WIDTH = int(os.getenv("PDF_PREVIEW_WIDTH", "800"))
+THUMBNAIL_WIDTH = int(os.getenv("PDF_THUMBNAIL_WIDTH", "200"))
+THUMBNAIL_MAX_PAGES = int(os.getenv("PDF_THUMBNAIL_MAX_PAGES", "20"))
+JPEG_QUALITY = 80
+MEDIA_TYPE = "image/jpeg"
+
+_locks: dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def preview_key(digest: str) -> str:
+    return derived_key(digest, "preview.jpg")
+
+
+def thumbnail_key(digest: str, page: int) -> str:
+    return derived_key(digest, f"thumb-{page}.jpg")
+
+
+def _render(page, width: int) -> bytes:
+    import pymupdf
+
+    zoom = width / page.rect.width
+    pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+    return pixmap.tobytes("jpeg", jpg_quality=JPEG_QUALITY)
+
+
+def _open(store: BlobStore, digest: str):
+    import pymupdf
+
+    if isinstance(store, LocalBlobStore):
+        return pymupdf.open(store.path_for(digest), filetype="pdf")
+    return pymupdf.open(stream=store.read(digest), filetype="pdf")
+
+
+def generate_previews(store: BlobStore, digest: str) -> bool:
+    """
+    Render the thumbnails (pages 1..THUMBNAIL_MAX_PAGES) and the first-page
+    preview unless they exist; returns False if the PDF cannot be rendered.
+    """
+    with _locks_guard:
+        lock = _locks.setdefault(digest, threading.Lock())
+    # Concurrent callers for the same file wait for one rendering.
+    with lock:
+        try:
+            if store.exists(preview_key(digest)):
+                return True
+            try:
+                doc = _open(store, digest)
+            except (FileNotFoundError, RuntimeError) as e:
+                logger.warning("Cannot render previews for %s: %s", digest, e)
+                return False
+            with doc:
+                if doc.page_count == 0:
+                    return False
+                for number in range(min(doc.page_count, THUMBNAIL_MAX_PAGES)):
+                    store.write(thumbnail_key(digest, number + 1), _render(doc[number], THUMBNAIL_WIDTH), MEDIA_TYPE)
+                # Written last: its presence means the whole set is complete.
+                store.write(preview_key(digest), _render(doc[0], PREVIEW_WIDTH), MEDIA_TYPE)
+            return True
+        finally:
+            with _locks_guard:
+                _locks.pop(digest, None)
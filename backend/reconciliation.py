@@ -0,0 +1,141 @@
+"""
+Reconciliation of stated against calculated amounts, across all requests.
+
+`OrderLine.has_price_mismatch` and `ProcurementRequest.has_total_mismatch`
+compare floats one object at a time. The report instead runs as one set-based
+query in the database and compares exact integer cents:
+
+- prices and stated amounts are rounded to cents, quantities to thousandths;
+- a line's calculated total is unit cents x quantity, rounded half away from
+  zero to whole cents (computed on NUMERIC, so PostgreSQL rounds like SQLite);
+- a request's calculated total is the sum of its line totals.
+
+A discrepancy is stated minus calculated cents; anything beyond
+`tolerance_cents` (0 by default, i.e. exact) is reported.
+"""
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, Numeric, cast, func, select
+from sqlalchemy.orm import Session
+
+from backend.crud import apply_request_filters
+from backend.schemas import ReconciliationParams
+from database.models import OrderLine, ProcurementRequest
+
+# Cent columns of the query and the money fields they are reported as.
+MONEY_FIELDS = {
+    "unit_cents": "unit_price",
+    "calculated_cents": "calculated_total",
+    "stated_cents": "stated_total",
+    "discrepancy_cents": "discrepancy",
+}
+
+
+def to_cents(column):
+    return cast(func.round(cast(column, Numeric) * 100), BigInteger)
+
+
+def line_cents_cte():
+    unit_cents = func.round(cast(OrderLine.unit_price, Numeric) * 100)
+    quantity_milli = func.round(cast(OrderLine.quantity, Numeric) * 1000)
+    return select(
+        OrderLine.id,
+        OrderLine.request_id,
+        OrderLine.description,
+        OrderLine.quantity,
+        cast(unit_cents, BigInteger).label("unit_cents"),
+        cast(func.round(unit_cents * quantity_milli / 1000), BigInteger).label("calculated_cents"),
+        to_cents(OrderLine.stated_total_price).label("stated_cents"),
+    ).cte("line_cents")
+
+
+def _line_statement(lines):
+    discrepancy = lines.c.stated_cents - lines.c.calculated_cents
+    statement = (
+        select(
+            lines.c.id.label("line_id"),
+            lines.c.request_id,
+            ProcurementRequest.title,
+            ProcurementRequest.vendor_name,
+            ProcurementRequest.currency,
+            lines.c.description,
+            lines.c.quantity,
+            lines.c.unit_cents,
+            lines.c.calculated_cents,
+            lines.c.stated_cents,
+            discrepancy.label("discrepancy_cents"),
+        )
+        .join(ProcurementRequest, ProcurementRequest.id == lines.c.request_id)
+        .where(lines.c.stated_cents.is_not(None))
+    )
+    return statement, discrepancy, lines.c.id
+
+
+def _request_statement(lines):
+    totals = (
+        select(
+            lines.c.request_id,
+            func.sum(lines.c.calculated_cents).label("calculated_cents"),
+            func.count().label("line_count"),
+        )
+        .group_by(lines.c.request_id)
+        .subquery("request_cents")
+    )
+    calculated = func.coalesce(totals.c.calculated_cents, 0)
+    stated = to_cents(ProcurementRequest.stated_total_cost)
+    discrepancy = stated - calculated
+    statement = (
+        select(
+            ProcurementRequest.id.label("request_id"),
+            ProcurementRequest.title,
+            ProcurementRequest.vendor_name,
+            ProcurementRequest.currency,
+            func.coalesce(totals.c.line_count, 0).label("line_count"),
+            calculated.label("calculated_cents"),
+            stated.label("stated_cents"),
+            discrepancy.label("discrepancy_cents"),
+        )
+        .select_from(ProcurementRequest)
+        .outerjoin(totals, totals.c.request_id == ProcurementRequest.id)
+        .where(ProcurementRequest.stated_total_cost.is_not(None))
+    )
+    return statement, discrepancy, ProcurementRequest.id
+
+
+def _money(cents: int | None) -> Decimal | None:
+    return None if cents is None else Decimal(cents).scaleb(-2)
+
+
+def reconciliation_report(db: Session, params: ReconciliationParams) -> dict:
+    """Mismatches at `params.level`, ordered by absolute discrepancy, with per-currency totals."""
+    build = _line_statement if params.level == "line" else _request_statement
+    statement, discrepancy, tiebreak = build(line_cents_cte())
+    statement = apply_request_filters(statement, params).where(func.abs(discrepancy) > params.tolerance_cents)
+
+    magnitude = func.abs(discrepancy)
+    order = magnitude.desc() if params.order == "desc" else magnitude.asc()
+    page = statement.order_by(order, tiebreak).limit(params.limit).offset(params.offset)
+
+    mismatches = statement.subquery()
+    totals = db.execute(
+        select(
+            mismatches.c.currency,
+            func.count().label("count"),
+            func.sum(func.abs(mismatches.c.discrepancy_cents)).label("absolute_cents"),
+        ).group_by(mismatches.c.currency).order_by(mismatches.c.currency)
+    ).all()
+
+    items = []
+    for row in db.execute(page).mappings():
+        item = dict(row)
+        for column, field in MONEY_FIELDS.items():
+            if column in item:
+                item[field] = _money(item.pop(column))
+        items.append(item)
+
+    return {
+        "level": params.level,
+        "count": sum(row.count for row in totals),
+        "absolute_discrepancy_by_currency": {row.currency: _money(row.absolute_cents) for row in totals},
+        "items": items,
+    }
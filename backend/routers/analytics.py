@@ -0,0 +1,96 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from backend.reconciliation import reconciliation_report
+from backend.schemas import (
+    ReconciliationParams,
+    ReconciliationReport,
+    SpendFilters,
+    SpendGroupResponse,
+    SpendPivotParams,
+    SpendPivotResponse,
+    SpendQueryParams,
+)
+from database.database import get_db
+from database.models import SpendSummary
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+
+def _filter_summary(statement, filters: SpendFilters):
+    for dimension in ("status", "department", "commodity_group_id", "vat_id", "currency"):
+        value = getattr(filters, dimension)
+        if value:
+            statement = statement.where(getattr(SpendSummary, dimension) == value)
+    if filters.month_from:
+        statement = statement.where(SpendSummary.month >= filters.month_from)
+    if filters.month_to:
+        statement = statement.where(SpendSummary.month <= filters.month_to)
+    return statement
+
+
+@router.get("/spend", response_model=list[SpendGroupResponse])
+def spend(params: Annotated[SpendQueryParams, Query()], db: Session = Depends(get_db)):
+    # Amounts in different currencies are never summed together.
+    dimensions = list(dict.fromkeys([*params.group_by, "currency"]))
+    columns = [getattr(SpendSummary, dimension) for dimension in dimensions]
+    statement = _filter_summary(
+        select(
+            *columns,
+            func.sum(SpendSummary.request_count).label("request_count"),
+            func.sum(SpendSummary.line_count).label("line_count"),
+            func.sum(SpendSummary.total_amount).label("total_amount"),
+        ),
+        params,
+    ).group_by(*columns).order_by(*columns)
+
+    return [
+        SpendGroupResponse(**{**row._asdict(), "total_amount": round(row.total_amount, 2)})
+        for row in db.execute(statement)
+    ]
+
+
+@router.get("/spend/pivot", response_model=SpendPivotResponse)
+def spend_pivot(params: Annotated[SpendPivotParams, Query()], db: Session = Depends(get_db)):
+    import pandas as pd
+
+    if params.rows == params.columns:
+        raise HTTPException(status_code=400, detail="rows and columns must be different dimensions")
+
+    statement = _filter_summary(
+        select(
+            getattr(SpendSummary, params.rows).label("row"),
+            getattr(SpendSummary, params.columns).label("column"),
+            getattr(SpendSummary, params.value).label("value"),
+        ),
+        params,
+    )
+    frame = pd.DataFrame(db.execute(statement).all(), columns=["row", "column", "value"])
+    table = frame.pivot_table(index="row", columns="column", values="value", aggfunc="sum", fill_value=0)
+    table = table.sort_index().sort_index(axis=1).round(2)
+
+    return SpendPivotResponse(
+        rows=params.rows,
+        columns=params.columns,
+        value=params.value,
+        currency=params.currency,
+        row_labels=[str(label) for label in table.index],
+        column_labels=[str(label) for label in table.columns],
+        values=table.to_numpy(dtype=float).tolist(),
+        row_totals=table.sum(axis=1).round(2).tolist(),
+        column_totals=table.sum(axis=0).round(2).tolist(),
+        grand_total=round(float(table.to_numpy().sum()), 2),
+    )
+
+
+@router.get("/reconciliation", response_model=ReconciliationReport, response_model_exclude_none=True)
+def reconciliation(params: Annotated[ReconciliationParams, Query()], db: Session = Depends(get_db)):
+    """
+    Order lines (`level=line`) or requests (`level=request`) whose stated amount
+    differs from the calculated one, largest absolute discrepancy first.
+    Amounts are exact decimals.
+    """
+    return reconciliation_report(db, params)
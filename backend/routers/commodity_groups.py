@@ -1,9 +1,21 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
 
-from backend.extraction import classify_commodity_group
-from backend.schemas import CommodityGroupResponse, ClassificationResponse
-from database.commodity_groups import COMMODITY_GROUPS
+from backend import etags
+from backend.classification import classify, iter_batch_classification
+from backend.responses import ORJSONResponse
+from backend.schemas import (
+    BatchClassificationRequest,
+    ClassificationResponse,
+    CommodityGroupCreate,
+    CommodityGroupResponse,
+    CommodityGroupUpdate,
+)
+from database import commodity_groups
+from database.database import get_db
+from database.models import CommodityGroup
 
 router = APIRouter(prefix="/api/commodity-groups", tags=["commodity-groups"])
 
@@ -13,17 +25,46 @@ class SimpleClassificationRequest(BaseModel):
 
 
 @router.get("", response_model=list[CommodityGroupResponse])
-def list_commodity_groups():
-    return [
-        CommodityGroupResponse(id=g["id"], category=g["category"], name=g["name"])
-        for g in COMMODITY_GROUPS
-    ]
+def list_commodity_groups(if_none_match: str | None = Header(None), db: Session = Depends(get_db)):
+    taxonomy = commodity_groups.get_taxonomy(db)
+    headers = {"ETag": taxonomy.etag, "Cache-Control": "no-cache"}
+    if etags.etag_matches(if_none_match, taxonomy.etag):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(list(taxonomy.groups.values()), headers=headers)
+
+
+@router.post("", response_model=CommodityGroupResponse, status_code=201)
+def create_commodity_group(data: CommodityGroupCreate, db: Session = Depends(get_db)):
+    if db.get(CommodityGroup, data.id):
+        raise HTTPException(status_code=409, detail="Commodity group already exists")
+    return commodity_groups.create_group(db, data.id, data.category, data.name)
+
+
+@router.put("/{group_id}", response_model=CommodityGroupResponse)
+def update_commodity_group(group_id: str, data: CommodityGroupUpdate, db: Session = Depends(get_db)):
+    group = db.get(CommodityGroup, group_id)
+    if not group:
+        raise HTTPException(status_code=404, detail="Commodity group not found")
+    return commodity_groups.update_group(db, group, data.category, data.name)
+
+
+@router.delete("/{group_id}", status_code=204)
+def delete_commodity_group(group_id: str, db: Session = Depends(get_db)):
+    group = db.get(CommodityGroup, group_id)
+    if not group:
+        raise HTTPException(status_code=404, detail="Commodity group not found")
+    try:
+        commodity_groups.delete_group(db, group)
+    except commodity_groups.CommodityGroupInUse as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return None
 
 
 @router.post("/classify", response_model=ClassificationResponse)
-def classify_commodity(data: SimpleClassificationRequest):
+def classify_commodity(data: SimpleClassificationRequest, db: Session = Depends(get_db)):
     try:
-        result = classify_commodity_group(
+        result = classify(
+            db,
             title=data.description,
             order_lines=[],
             vendor_name="",
@@ -33,6 +74,17 @@ def classify_commodity(data: SimpleClassificationRequest):
             commodity_group_id=result.get("commodity_group_id", "009"),
             confidence=result.get("confidence", 0.0),
             rationale=result.get("rationale", ""),
+            cached=result.get("cached", False),
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Classification failed: {str(e)}")
+
+
+@router.post("/classify-batch")
+def classify_commodity_batch(data: BatchClassificationRequest, db: Session = Depends(get_db)):
+    """
+    Classify many items at once. Streams one NDJSON line per item as soon as its
+    result is known: cached results first, then the answers of packed LLM calls.
+    """
+    items = [item.model_dump() for item in data.items]
+    return StreamingResponse(iter_batch_classification(db.get_bind(), items), media_type="application/x-ndjson")
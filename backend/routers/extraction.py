@@ -1,13 +1,27 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
 
-from backend.schemas import ExtractionResponse, ClassificationRequest, ClassificationResponse
-from backend.extraction import extract_offer_data_from_pdf, classify_commodity_group
+from backend.schemas import ExtractionResponse, ClassificationRequest, ClassificationResponse, VendorResponse
+from backend.classification import classify
+from backend.extraction import extract_offer_data_from_pdf
+from database import duplicates, vendors
+from database.database import get_db
+from database.models import Vendor
 
 router = APIRouter(prefix="/api/extraction", tags=["extraction"])
 
 
+def _known_matches(db: Session, result: dict) -> tuple[Vendor | None, list[dict]]:
+    """The existing vendor and the likely duplicate requests for an extracted offer."""
+    vendor_id = vendors.find_vendor_id(db, result.get("vendor_name"), result.get("vat_id"))
+    lines = ((line.get("description"), line.get("unit_price")) for line in result.get("order_lines", []))
+    sig = duplicates.signature(duplicates.offer_features(result.get("vendor_name"), result.get("vat_id"), lines))
+    return (db.get(Vendor, vendor_id) if vendor_id else None), duplicates.likely_duplicates(db, sig)
+
+
 @router.post("/pdf", response_model=ExtractionResponse)
-async def extract_pdf(file: UploadFile = File(...)):
+async def extract_pdf(file: UploadFile = File(...), db: Session = Depends(get_db)):
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted")
 
@@ -17,6 +31,7 @@ async def extract_pdf(file: UploadFile = File(...)):
 
     try:
         result = extract_offer_data_from_pdf(file_bytes)
+        vendor, likely_duplicates = await run_in_threadpool(_known_matches, db, result)
         return ExtractionResponse(
             vendor_name=result.get("vendor_name"),
             vat_id=result.get("vat_id"),
@@ -26,15 +41,18 @@ async def extract_pdf(file: UploadFile = File(...)):
             currency=result.get("currency"),
             order_lines=result.get("order_lines", []),
             stated_total_cost=result.get("stated_total_cost"),
+            vendor=VendorResponse.model_validate(vendor) if vendor else None,
+            likely_duplicates=likely_duplicates,
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Extraction failed: {str(e)}")
 
 
 @router.post("/classify-commodity", response_model=ClassificationResponse)
-def classify_commodity(data: ClassificationRequest):
+def classify_commodity(data: ClassificationRequest, db: Session = Depends(get_db)):
     try:
-        result = classify_commodity_group(
+        result = classify(
+            db,
             title=data.title,
             order_lines=data.order_lines,
             vendor_name=data.vendor_name,
@@ -44,6 +62,7 @@ def classify_commodity(data: ClassificationRequest):
             commodity_group_id=result.get("commodity_group_id", "009"),
             confidence=result.get("confidence", 0.0),
             rationale=result.get("rationale", ""),
+            cached=result.get("cached", False),
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Classification failed: {str(e)}")
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Path
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend import previews
+from backend.blob_responses import blob_response
+from database.database import get_db, pdf_store
+from database.models import PdfBlob
+
+router = APIRouter(prefix="/api/pdfs", tags=["pdfs"])
+
+Sha256 = Path(pattern="^[0-9a-f]{64}$")
+# The URLs contain the PDF's content hash, so a response never goes stale.
+IMMUTABLE = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+
+def _preview_response(db: Session, sha256: str, key: str, if_none_match: str | None):
+    if db.execute(select(PdfBlob.sha256).where(PdfBlob.sha256 == sha256)).first() is None:
+        raise HTTPException(status_code=404, detail="PDF not found")
+    if not pdf_store.exists(key) and not previews.generate_previews(pdf_store, sha256):
+        raise HTTPException(status_code=404, detail="Preview not available")
+    if not pdf_store.exists(key):
+        raise HTTPException(status_code=404, detail="Page not found")
+    return blob_response(
+        pdf_store, key, media_type=previews.MEDIA_TYPE, if_none_match=if_none_match, headers=IMMUTABLE
+    )
+
+
+@router.get("/{sha256}/preview.jpg")
+def get_preview(sha256: str = Sha256, if_none_match: str | None = Header(None), db: Session = Depends(get_db)):
+    """First page of the PDF at PREVIEW_WIDTH."""
+    return _preview_response(db, sha256, previews.preview_key(sha256), if_none_match)
+
+
+@router.get("/{sha256}/thumbnails/{page}.jpg")
+def get_thumbnail(
+    page: int = Path(ge=1),
+    sha256: str = Sha256,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+):
+    """Thumbnail of a page (1-based, up to THUMBNAIL_MAX_PAGES)."""
+    return _preview_response(db, sha256, previews.thumbnail_key(sha256, page), if_none_match)
@@ -1,198 +1,285 @@
-import os
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+import io
+from typing import Annotated, Any
 
-from database.database import get_db, UPLOAD_DIR
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from backend import change_feed, crud, etags, extraction_runs, previews
+from backend.blob_responses import blob_response
+from backend.responses import ORJSONResponse
+from backend.export import EXPORT_FORMATS
+from backend.bulk_import import import_records, iter_csv_records, iter_json_records, iter_ndjson_records
+from database.database import get_db, pdf_store
 from backend.schemas import (
+    BulkImportResponse,
+    BulkStatusUpdateRequest,
+    BulkStatusUpdateResponse,
+    DuplicateMatch,
+    ExtractionRunResponse,
+    OrderLinePatch,
+    OrderLineResponse,
     ProcurementRequestCreate,
+    ProcurementRequestCreateResponse,
     ProcurementRequestUpdate,
     ProcurementRequestResponse,
     ProcurementRequestListResponse,
+    ProcurementRequestSummary,
+    RequestExportParams,
+    RequestFilters,
+    RequestSummaryParams,
     StatusUpdateRequest,
 )
-from database.models import ProcurementRequest, OrderLine, StatusHistory, RequestStatus
+from database import duplicates, outbox
+from database.models import ExtractionRun, ProcurementRequest
 
 router = APIRouter(prefix="/api/requests", tags=["requests"])
+# The plain CRUD endpoints live on their own router so `backend.main` can swap in
+# the async implementation from `requests_async` when DB_ASYNC is enabled.
+crud_router = APIRouter(prefix="/api/requests", tags=["requests"])
 
 
-@router.get("", response_model=list[ProcurementRequestListResponse])
-def list_requests(
-    status: str | None = Query(None),
-    search: str | None = Query(None),
-    db: Session = Depends(get_db),
-):
-    query = db.query(ProcurementRequest)
+@router.post("/bulk", response_model=BulkImportResponse)
+def bulk_create_requests(items: list[Any] = Body(...), db: Session = Depends(get_db)):
+    return import_records(db, iter_json_records(items))
 
-    if status:
-        query = query.filter(ProcurementRequest.status == status)
 
-    if search:
-        search_pattern = f"%{search}%"
-        query = query.filter(
-            (ProcurementRequest.title.ilike(search_pattern))
-            | (ProcurementRequest.vendor_name.ilike(search_pattern))
-            | (ProcurementRequest.requestor_name.ilike(search_pattern))
-        )
+@router.post("/import", response_model=BulkImportResponse)
+def import_requests(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    filename = (file.filename or "").lower()
+    if filename.endswith(".csv"):
+        parse = iter_csv_records
+    elif filename.endswith((".ndjson", ".jsonl")):
+        parse = iter_ndjson_records
+    else:
+        raise HTTPException(status_code=400, detail="Only CSV and NDJSON files are accepted")
 
-    requests = query.order_by(ProcurementRequest.created_at.desc()).all()
-    return requests
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return import_records(db, parse(stream))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    finally:
+        stream.detach()
+
+
+@router.post("/bulk-status", response_model=BulkStatusUpdateResponse)
+def bulk_update_status(data: BulkStatusUpdateRequest, db: Session = Depends(get_db)):
+    return crud.bulk_update_status(db, data)
+
+
+@router.get("/export")
+def export_requests(params: Annotated[RequestExportParams, Query()], db: Session = Depends(get_db)):
+    encode, media_type = EXPORT_FORMATS[params.format]
+    # The export opens its own connection on the session's engine, so it is not
+    # tied to the lifetime of the request-scoped session.
+    return StreamingResponse(
+        encode(db.get_bind(), params),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="requests.{params.format}"'},
+    )
 
 
-@router.get("/{request_id}", response_model=ProcurementRequestResponse)
-def get_request(request_id: int, db: Session = Depends(get_db)):
-    request = db.query(ProcurementRequest).filter(ProcurementRequest.id == request_id).first()
-    if not request:
+@router.get("/summary", response_model=list[ProcurementRequestSummary])
+def list_request_summaries(params: Annotated[RequestSummaryParams, Query()], db: Session = Depends(get_db)):
+    # The rows are plain dicts from one SQL query, so they skip response-model
+    # validation; with `fields` only the requested keys are present.
+    # X-Last-Event-ID is read first, so following the change feed from there
+    # cannot miss a change made while the list was being queried.
+    last_event_id = outbox.latest_event_id(db)
+    return ORJSONResponse(
+        crud.list_request_summaries(db, params, params.fields),
+        headers={"X-Last-Event-ID": str(last_event_id)},
+    )
+
+
+@router.get("/{request_id}/duplicates", response_model=list[DuplicateMatch])
+def list_duplicates(request_id: int, db: Session = Depends(get_db)):
+    if crud.get_request_revision(db, request_id) is None:
         raise HTTPException(status_code=404, detail="Request not found")
-    return request
+    return duplicates.duplicates_of(db, request_id)
 
 
-@router.post("", response_model=ProcurementRequestResponse, status_code=201)
-def create_request(data: ProcurementRequestCreate, db: Session = Depends(get_db)):
-    request = ProcurementRequest(
-        requestor_name=data.requestor_name,
-        title=data.title,
-        vendor_name=data.vendor_name,
-        vat_id=data.vat_id,
-        department=data.department,
-        commodity_group_id=data.commodity_group_id,
-        currency=data.currency,
-        stated_total_cost=data.stated_total_cost,
-        status=RequestStatus.OPEN.value,
+@router.get("/events")
+def request_events(
+    http_request: Request,
+    after: int | None = None,
+    last_event_id: int | None = Header(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Server-Sent Events of request changes (created, updated, status_changed,
+    deleted). Resumes after the `Last-Event-ID` header or the `after` parameter,
+    otherwise starts with the next change.
+    """
+    # Like the export, the stream polls on its own connections instead of the
+    # request-scoped session.
+    resume_after = last_event_id if last_event_id is not None else after
+    return StreamingResponse(
+        change_feed.stream_events(db.get_bind(), resume_after, http_request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    for line_data in data.order_lines:
-        line = OrderLine(
-            description=line_data.description,
-            unit_price=line_data.unit_price,
-            quantity=line_data.quantity,
-            unit=line_data.unit,
-            stated_total_price=line_data.stated_total_price,
-        )
-        request.order_lines.append(line)
-
-    history = StatusHistory(
-        from_status=None,
-        to_status=RequestStatus.OPEN.value,
-        changed_by="system",
-    )
-    request.status_history.append(history)
 
-    db.add(request)
-    db.commit()
-    db.refresh(request)
-    return request
+@crud_router.get("", response_model=list[ProcurementRequestListResponse])
+def list_requests(
+    filters: Annotated[RequestFilters, Query()],
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+):
+    return etags.render_request_list(db, filters, if_none_match)
 
 
-@router.put("/{request_id}", response_model=ProcurementRequestResponse)
-def update_request(request_id: int, data: ProcurementRequestUpdate, db: Session = Depends(get_db)):
-    request = db.query(ProcurementRequest).filter(ProcurementRequest.id == request_id).first()
-    if not request:
+@crud_router.get("/{request_id}", response_model=ProcurementRequestResponse)
+def get_request(request_id: int, if_none_match: str | None = Header(None), db: Session = Depends(get_db)):
+    response = etags.render_request_detail(db, request_id, if_none_match)
+    if response is None:
         raise HTTPException(status_code=404, detail="Request not found")
+    return response
 
-    if data.requestor_name is not None:
-        request.requestor_name = data.requestor_name
-    if data.title is not None:
-        request.title = data.title
-    if data.vendor_name is not None:
-        request.vendor_name = data.vendor_name
-    if data.vat_id is not None:
-        request.vat_id = data.vat_id
-    if data.department is not None:
-        request.department = data.department
-    if data.commodity_group_id is not None:
-        request.commodity_group_id = data.commodity_group_id
-    if data.currency is not None:
-        request.currency = data.currency
-    if data.stated_total_cost is not None:
-        request.stated_total_cost = data.stated_total_cost
-
-    if data.order_lines is not None:
-        for line in request.order_lines:
-            db.delete(line)
-
-        for line_data in data.order_lines:
-            line = OrderLine(
-                description=line_data.description,
-                unit_price=line_data.unit_price,
-                quantity=line_data.quantity,
-                unit=line_data.unit,
-                stated_total_price=line_data.stated_total_price,
-            )
-            request.order_lines.append(line)
-
-    db.commit()
-    db.refresh(request)
-    return request
 
+@crud_router.post("", response_model=ProcurementRequestCreateResponse, status_code=201)
+def create_request(data: ProcurementRequestCreate, response: Response, db: Session = Depends(get_db)):
+    request = crud.create_request(db, data)
+    response.headers["ETag"] = etags.request_etag(request)
+    created = ProcurementRequestCreateResponse.model_validate(request)
+    created.likely_duplicates = [DuplicateMatch(**match) for match in duplicates.duplicates_of(db, request.id)]
+    return created
 
-@router.patch("/{request_id}/status", response_model=ProcurementRequestResponse)
-def update_status(request_id: int, data: StatusUpdateRequest, db: Session = Depends(get_db)):
-    request = db.query(ProcurementRequest).filter(ProcurementRequest.id == request_id).first()
+
+@crud_router.put("/{request_id}", response_model=ProcurementRequestResponse)
+def update_request(
+    request_id: int,
+    data: ProcurementRequestUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+):
+    request = crud.get_request(db, request_id)
     if not request:
         raise HTTPException(status_code=404, detail="Request not found")
+    etags.require_if_match(if_match, request)
+    try:
+        request = crud.update_request(db, request, data)
+    except crud.InvalidOrderLine as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(status_code=412, detail="Request was modified by someone else")
+    response.headers["ETag"] = etags.request_etag(request)
+    return request
 
-    old_status = request.status
-    new_status = data.status.value
-
-    if old_status != new_status:
-        request.status = new_status
-
-        history = StatusHistory(
-            from_status=old_status,
-            to_status=new_status,
-            changed_by=data.changed_by,
-        )
-        request.status_history.append(history)
-
-        db.commit()
-        db.refresh(request)
 
+@crud_router.patch("/{request_id}/order-lines/{line_id}", response_model=OrderLineResponse)
+def update_order_line(
+    request_id: int,
+    line_id: int,
+    data: OrderLinePatch,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+):
+    request = crud.get_request(db, request_id)
+    if not request:
+        raise HTTPException(status_code=404, detail="Request not found")
+    etags.require_if_match(if_match, request)
+    try:
+        line = crud.update_order_line(db, request, line_id, data)
+    except crud.InvalidOrderLine:
+        raise HTTPException(status_code=404, detail="Order line not found")
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(status_code=412, detail="Request was modified by someone else")
+    response.headers["ETag"] = etags.request_etag(request)
+    return line
+
+
+@crud_router.patch("/{request_id}/status", response_model=ProcurementRequestResponse)
+def update_status(
+    request_id: int,
+    data: StatusUpdateRequest,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+):
+    request = crud.get_request(db, request_id)
+    if not request:
+        raise HTTPException(status_code=404, detail="Request not found")
+    etags.require_if_match(if_match, request)
+    try:
+        request = crud.update_status(db, request, data)
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(status_code=412, detail="Request was modified by someone else")
+    response.headers["ETag"] = etags.request_etag(request)
     return request
 
 
-@router.delete("/{request_id}", status_code=204)
+@crud_router.delete("/{request_id}", status_code=204)
 def delete_request(request_id: int, db: Session = Depends(get_db)):
-    request = db.query(ProcurementRequest).filter(ProcurementRequest.id == request_id).first()
+    request = crud.get_request(db, request_id)
     if not request:
         raise HTTPException(status_code=404, detail="Request not found")
-
-    if request.pdf_filename:
-        filepath = UPLOAD_DIR / request.pdf_filename
-        if filepath.exists():
-            filepath.unlink()
-
-    db.delete(request)
-    db.commit()
+    crud.delete_request(db, request)
     return None
 
+
 @router.post("/{request_id}/pdf", status_code=200)
-async def upload_pdf(request_id:int, file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_pdf(
+    request_id: int,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    extract: bool = False,
+    db: Session = Depends(get_db),
+):
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted")
-
-    file_bytes = await file.read()
-    if not file_bytes:
+    # The size counted while the multipart body was spooled; nothing is read again.
+    if not file.size:
         raise HTTPException(status_code=400, detail="Empty file")
+
     request = db.query(ProcurementRequest).filter(ProcurementRequest.id == request_id).first()
     if not request:
         raise HTTPException(status_code=404, detail="Request not found")
     try:
-        UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-        (UPLOAD_DIR / f"{request_id}.pdf").write_bytes(file_bytes)
-        request.pdf_filename = f"{request_id}.pdf"
-        db.commit()
-        return {"message": "PDF uploaded successfully"}
-    except Exception as e:
+        # Hashing and writing the blob happen in a worker thread, off the event loop.
+        digest, size = await run_in_threadpool(pdf_store.put, file.file)
+    except OSError as e:
         raise HTTPException(status_code=500, detail=f"PDF upload failed: {str(e)}")
 
+    await run_in_threadpool(crud.attach_pdf, db, request, digest, size, file.filename, file.file)
+    # Rendered after the response is sent; a no-op if this content was seen before.
+    background_tasks.add_task(previews.generate_previews, pdf_store, digest)
+    response = {"message": "PDF uploaded successfully", "sha256": digest}
+    if extract:
+        run = await run_in_threadpool(extraction_runs.create_run, db, request)
+        background_tasks.add_task(extraction_runs.execute_run, db.get_bind(), run.id)
+        response["extraction_run_id"] = run.id
+    return response
+
 
 @router.get("/{request_id}/pdf")
-def get_pdf(request_id: int, db: Session = Depends(get_db)):
+def get_pdf(
+    request_id: int,
+    range: str | None = Header(None),
+    if_range: str | None = Header(None),
+    db: Session = Depends(get_db),
+):
     request = db.query(ProcurementRequest).filter(ProcurementRequest.id == request_id).first()
-    if not request or not request.pdf_filename:
+    if not request or not request.pdf_sha256:
         raise HTTPException(status_code=404, detail="PDF not found")
-    return FileResponse(UPLOAD_DIR / request.pdf_filename, media_type="application/pdf")
+    return blob_response(
+        pdf_store,
+        request.pdf_sha256,
+        media_type="application/pdf",
+        filename=request.pdf_filename,
+        range_header=range,
+        if_range=if_range,
+    )
 
 
 @router.delete("/{request_id}/pdf", status_code=204)
@@ -200,11 +287,39 @@ def delete_pdf(request_id: int, db: Session = Depends(get_db)):
     request = db.query(ProcurementRequest).filter(ProcurementRequest.id == request_id).first()
     if not request:
         raise HTTPException(status_code=404, detail="Request not found")
-    if request.pdf_filename:
-        filepath = UPLOAD_DIR / request.pdf_filename
-        if filepath.exists():
-            filepath.unlink()
-        request.pdf_filename = None
-        db.commit()
+    crud.detach_pdf(db, request)
     return None
-        
\ No newline at end of file
+
+
+@router.post("/{request_id}/extractions", response_model=ExtractionRunResponse, status_code=202)
+def start_extraction(
+    request_id: int,
+    background_tasks: BackgroundTasks,
+    use_vision: bool | None = None,
+    db: Session = Depends(get_db),
+):
+    """Extract and classify the request's stored PDF again, without re-uploading it."""
+    request = db.query(ProcurementRequest).filter(ProcurementRequest.id == request_id).first()
+    if not request:
+        raise HTTPException(status_code=404, detail="Request not found")
+    if not request.pdf_sha256:
+        raise HTTPException(status_code=409, detail="Request has no PDF")
+    run = extraction_runs.create_run(db, request, use_vision)
+    background_tasks.add_task(extraction_runs.execute_run, db.get_bind(), run.id)
+    return run
+
+
+@router.get("/{request_id}/extractions", response_model=list[ExtractionRunResponse])
+def list_extractions(request_id: int, db: Session = Depends(get_db)):
+    request = db.query(ProcurementRequest).filter(ProcurementRequest.id == request_id).first()
+    if not request:
+        raise HTTPException(status_code=404, detail="Request not found")
+    return request.extraction_runs
+
+
+@router.get("/{request_id}/extractions/{run_id}", response_model=ExtractionRunResponse)
+def get_extraction(request_id: int, run_id: int, db: Session = Depends(get_db)):
+    run = db.get(ExtractionRun, run_id)
+    if not run or run.request_id != request_id:
+        raise HTTPException(status_code=404, detail="Extraction run not found")
+    return run
@@ -0,0 +1,134 @@
+"""
+Async variants of the request CRUD endpoints, enabled with DB_ASYNC=true.
+
+The handlers run on the event loop and only yield while the database works,
+instead of each holding a threadpool slot. The queries themselves are shared
+with the sync router through `backend.crud`.
+"""
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+
+from backend import crud, etags
+from backend.schemas import (
+    DuplicateMatch,
+    OrderLinePatch,
+    OrderLineResponse,
+    ProcurementRequestCreate,
+    ProcurementRequestCreateResponse,
+    ProcurementRequestUpdate,
+    ProcurementRequestResponse,
+    ProcurementRequestListResponse,
+    RequestFilters,
+    StatusUpdateRequest,
+)
+from database import duplicates
+from database.database import get_async_db
+
+crud_router = APIRouter(prefix="/api/requests", tags=["requests"])
+
+
+async def _get_or_404(db: AsyncSession, request_id: int):
+    request = await db.run_sync(crud.get_request, request_id)
+    if not request:
+        raise HTTPException(status_code=404, detail="Request not found")
+    return request
+
+
+async def _write(db: AsyncSession, fn, *args):
+    try:
+        return await db.run_sync(fn, *args)
+    except StaleDataError:
+        await db.rollback()
+        raise HTTPException(status_code=412, detail="Request was modified by someone else")
+
+
+@crud_router.get("", response_model=list[ProcurementRequestListResponse])
+async def list_requests(
+    filters: Annotated[RequestFilters, Query()],
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(etags.render_request_list, filters, if_none_match)
+
+
+@crud_router.get("/{request_id}", response_model=ProcurementRequestResponse)
+async def get_request(
+    request_id: int, if_none_match: str | None = Header(None), db: AsyncSession = Depends(get_async_db)
+):
+    response = await db.run_sync(etags.render_request_detail, request_id, if_none_match)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Request not found")
+    return response
+
+
+@crud_router.post("", response_model=ProcurementRequestCreateResponse, status_code=201)
+async def create_request(data: ProcurementRequestCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
+    request = await db.run_sync(crud.create_request, data)
+    response.headers["ETag"] = etags.request_etag(request)
+    created = ProcurementRequestCreateResponse.model_validate(request)
+    matches = await db.run_sync(duplicates.duplicates_of, request.id)
+    created.likely_duplicates = [DuplicateMatch(**match) for match in matches]
+    return created
+
+
+@crud_router.put("/{request_id}", response_model=ProcurementRequestResponse)
+async def update_request(
+    request_id: int,
+    data: ProcurementRequestUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    request = await _get_or_404(db, request_id)
+    etags.require_if_match(if_match, request)
+    try:
+        request = await _write(db, crud.update_request, request, data)
+    except crud.InvalidOrderLine as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    response.headers["ETag"] = etags.request_etag(request)
+    return request
+
+
+@crud_router.patch("/{request_id}/order-lines/{line_id}", response_model=OrderLineResponse)
+async def update_order_line(
+    request_id: int,
+    line_id: int,
+    data: OrderLinePatch,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    request = await _get_or_404(db, request_id)
+    etags.require_if_match(if_match, request)
+    try:
+        line = await _write(db, crud.update_order_line, request, line_id, data)
+    except crud.InvalidOrderLine:
+        raise HTTPException(status_code=404, detail="Order line not found")
+    response.headers["ETag"] = etags.request_etag(request)
+    return line
+
+
+@crud_router.patch("/{request_id}/status", response_model=ProcurementRequestResponse)
+async def update_status(
+    request_id: int,
+    data: StatusUpdateRequest,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    request = await _get_or_404(db, request_id)
+    etags.require_if_match(if_match, request)
+    request = await _write(db, crud.update_status, request, data)
+    response.headers["ETag"] = etags.request_etag(request)
+    return request
+
+
+@crud_router.delete("/{request_id}", status_code=204)
+async def delete_request(request_id: int, db: AsyncSession = Depends(get_async_db)):
+    request = await _get_or_404(db, request_id)
+    await db.run_sync(crud.delete_request, request)
+    return None
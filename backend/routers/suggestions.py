@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from backend.responses import ORJSONResponse
+from backend.schemas import Suggestion, SuggestionField
+from database import suggestions
+from database.database import get_db
+
+router = APIRouter(prefix="/api/suggestions", tags=["suggestions"])
+
+
+@router.get("/{field}", response_model=list[Suggestion])
+def suggest(
+    field: SuggestionField,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=suggestions.MAX_SUGGESTIONS),
+    db: Session = Depends(get_db),
+):
+    """Values of `field` starting with `q`, most used first, from the in-memory index."""
+    return ORJSONResponse(suggestions.get_index(db, field).search(q, limit))
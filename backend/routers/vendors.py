@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from backend.responses import ORJSONResponse
+from backend.schemas import VendorResponse
+from database import vendors
+from database.database import get_db
+from database.models import Vendor
+
+router = APIRouter(prefix="/api/vendors", tags=["vendors"])
+
+
+@router.get("/autocomplete", response_model=list[VendorResponse])
+def autocomplete_vendors(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    """Vendors whose name, a word of their name, or VAT ID starts with `q`, from the in-memory index."""
+    return ORJSONResponse(vendors.get_vendor_index(db).search(q, limit))
+
+
+@router.get("/{vendor_id}", response_model=VendorResponse)
+def get_vendor(vendor_id: int, db: Session = Depends(get_db)):
+    vendor = db.get(Vendor, vendor_id)
+    if not vendor:
+        raise HTTPException(status_code=404, detail="Vendor not found")
+    return vendor
@@ -1,5 +1,8 @@
 from datetime import datetime
-from pydantic import BaseModel
+from decimal import Decimal
+from typing import Literal
+
+from pydantic import BaseModel, Field, field_validator, model_validator
 from database.models import RequestStatus
 
 
@@ -11,6 +14,18 @@ class OrderLineCreate(BaseModel):
     stated_total_price: float | None = None
 
 
+class OrderLineUpdate(OrderLineCreate):
+    id: int | None = None  # Existing line to update; omitted for new lines
+
+
+class OrderLinePatch(BaseModel):
+    description: str | None = None
+    unit_price: float | None = None
+    quantity: float | None = None
+    unit: str | None = None
+    stated_total_price: float | None = None
+
+
 class OrderLineResponse(BaseModel):
     id: int
     description: str
@@ -55,7 +70,9 @@ class ProcurementRequestUpdate(BaseModel):
     commodity_group_id: str | None = None
     currency: str | None = None
     stated_total_cost: float | None = None
-    order_lines: list[OrderLineCreate] | None = None
+    # Lines with an id are updated, lines without one are added and existing
+    # lines missing from the list are removed.
+    order_lines: list[OrderLineUpdate] | None = None
 
 
 class ProcurementRequestResponse(BaseModel):
@@ -64,14 +81,17 @@ class ProcurementRequestResponse(BaseModel):
     title: str
     vendor_name: str
     vat_id: str
+    vendor_id: int | None
     department: str
     commodity_group_id: str
     currency: str
     stated_total_cost: float | None
     status: str
     pdf_filename: str | None
+    pdf_sha256: str | None
     created_at: datetime
     updated_at: datetime
+    version: int
     order_lines: list[OrderLineResponse]
     status_history: list[StatusHistoryResponse]
     calculated_total_cost: float
@@ -80,33 +100,158 @@ class ProcurementRequestResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class DuplicateMatch(BaseModel):
+    """An existing request that is likely the same offer (see `database.duplicates`)."""
+    request_id: int
+    title: str
+    vendor_name: str
+    requestor_name: str
+    created_at: datetime
+    similarity: float  # Estimated Jaccard similarity of vendor, VAT ID and order lines
+
+
+class ProcurementRequestCreateResponse(ProcurementRequestResponse):
+    likely_duplicates: list[DuplicateMatch] = []
+
+
 class ProcurementRequestListResponse(BaseModel):
     id: int
     requestor_name: str
     title: str
     vendor_name: str
     vat_id: str
+    vendor_id: int | None
     department: str
     commodity_group_id: str
     currency: str
     status: str
     created_at: datetime
     updated_at: datetime
+    version: int
     calculated_total_cost: float
     stated_total_cost: float | None
     has_total_mismatch: bool
     pdf_filename: str | None
+    pdf_sha256: str | None
     order_lines: list[OrderLineResponse]
     status_history: list[StatusHistoryResponse]
 
     model_config = {"from_attributes": True}
 
 
+class ProcurementRequestSummary(BaseModel):
+    """One overview row, selected straight from SQL without order lines or history."""
+    id: int
+    requestor_name: str
+    title: str
+    vendor_name: str
+    vat_id: str
+    department: str
+    commodity_group_id: str
+    currency: str
+    status: str
+    created_at: datetime
+    updated_at: datetime
+    version: int
+    calculated_total_cost: float
+    stated_total_cost: float | None
+    has_total_mismatch: bool
+    line_count: int
+    pdf_sha256: str | None
+
+
+SummaryField = Literal[
+    "id", "requestor_name", "title", "vendor_name", "vat_id", "department", "commodity_group_id",
+    "currency", "status", "created_at", "updated_at", "version", "calculated_total_cost",
+    "stated_total_cost", "has_total_mismatch", "line_count", "pdf_sha256",
+]
+
+
+class BulkRowError(BaseModel):
+    row: int
+    errors: list[str]
+
+
+class BulkImportResponse(BaseModel):
+    created: int
+    failed: int
+    created_ids: list[int]
+    errors: list[BulkRowError]
+
+
+class RequestFilters(BaseModel):
+    status: str | None = None
+    search: str | None = None
+    department: str | None = None
+    commodity_group_id: str | None = None
+    vat_id: str | None = None
+    currency: str | None = None
+    requestor_name: str | None = None
+    vendor_id: int | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+    updated_from: datetime | None = None
+    updated_to: datetime | None = None
+
+
+class RequestSummaryParams(RequestFilters):
+    # Sparse fieldset, e.g. `fields=title,status`; `id` is always included.
+    fields: list[SummaryField] | None = None
+
+    @field_validator("fields", mode="before")
+    @classmethod
+    def split_comma_separated(cls, value):
+        if isinstance(value, str):
+            value = [value]
+        if isinstance(value, list):
+            return [name.strip() for item in value for name in item.split(",") if name.strip()]
+        return value
+
+
+class RequestExportParams(RequestFilters):
+    format: Literal["csv", "ndjson", "parquet"] = "csv"
+
+
 class StatusUpdateRequest(BaseModel):
     status: RequestStatus
     changed_by: str = "system"
 
 
+class BulkStatusUpdateRequest(BaseModel):
+    status: RequestStatus
+    changed_by: str = "system"
+    ids: list[int] | None = None
+    filter: RequestFilters | None = None
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Provide either ids or filter")
+        return self
+
+
+class BulkStatusUpdateResponse(BaseModel):
+    changed: list[int]
+    unchanged: list[int]
+    not_found: list[int]
+
+
+class VendorResponse(BaseModel):
+    id: int
+    name: str
+    vat_id: str | None
+
+    model_config = {"from_attributes": True}
+
+
+SuggestionField = Literal["requestor_name", "department", "unit"]
+
+
+class Suggestion(BaseModel):
+    value: str
+    count: int  # Requests (or order lines, for units) using the value
+
+
 class ExtractionResponse(BaseModel):
     vendor_name: str | None = None
     vat_id: str | None = None
@@ -116,6 +261,8 @@ class ExtractionResponse(BaseModel):
     currency: str | None = None
     order_lines: list[dict] = []
     stated_total_cost: float | None = None
+    vendor: VendorResponse | None = None  # Existing vendor the extracted name and VAT ID resolve to
+    likely_duplicates: list[DuplicateMatch] = []
 
 
 class ClassificationRequest(BaseModel):
@@ -125,13 +272,142 @@ class ClassificationRequest(BaseModel):
     department: str = ""
 
 
+class BatchClassificationItem(ClassificationRequest):
+    id: str  # Echoed back with the result
+    order_lines: list[dict] = []
+
+
+class BatchClassificationRequest(BaseModel):
+    items: list[BatchClassificationItem] = Field(..., min_length=1, max_length=5000)
+
+    @model_validator(mode="after")
+    def check_unique_ids(self):
+        if len({item.id for item in self.items}) != len(self.items):
+            raise ValueError("Item ids must be unique")
+        return self
+
+
 class ClassificationResponse(BaseModel):
     commodity_group_id: str
     confidence: float
     rationale: str
+    cached: bool = False  # Answered from the classification cache
+
+
+class ExtractionRunResponse(BaseModel):
+    id: int
+    request_id: int
+    pdf_sha256: str
+    status: Literal["pending", "running", "succeeded", "failed"]
+    use_vision: bool
+    model: str | None
+    classification_model: str | None
+    result: dict | None
+    classification: dict | None
+    error: str | None
+    prompt_tokens: int | None
+    completion_tokens: int | None
+    extraction_ms: int | None
+    classification_ms: int | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    model_config = {"from_attributes": True, "protected_namespaces": ()}
 
 
 class CommodityGroupResponse(BaseModel):
     id: str
     category: str
     name: str
+
+
+class CommodityGroupUpdate(BaseModel):
+    category: str = Field(..., min_length=1)
+    name: str = Field(..., min_length=1)
+
+
+class CommodityGroupCreate(CommodityGroupUpdate):
+    id: str = Field(..., pattern=r"^\d{3}$")
+
+
+class ReconciliationParams(RequestFilters):
+    level: Literal["line", "request"] = "line"
+    tolerance_cents: int = Field(0, ge=0)  # Discrepancies up to this are not reported
+    order: Literal["desc", "asc"] = "desc"  # By absolute discrepancy
+    limit: int = Field(100, ge=1, le=10000)
+    offset: int = Field(0, ge=0)
+
+
+class ReconciliationItem(BaseModel):
+    request_id: int
+    title: str
+    vendor_name: str
+    currency: str
+    calculated_total: Decimal
+    stated_total: Decimal
+    discrepancy: Decimal  # stated - calculated
+    # Line level only
+    line_id: int | None = None
+    description: str | None = None
+    quantity: float | None = None
+    unit_price: Decimal | None = None
+    # Request level only
+    line_count: int | None = None
+
+
+class ReconciliationReport(BaseModel):
+    level: Literal["line", "request"]
+    count: int  # All mismatches, not just this page
+    absolute_discrepancy_by_currency: dict[str, Decimal]
+    items: list[ReconciliationItem]
+
+
+SpendDimension = Literal["month", "commodity_group_id", "department", "vat_id", "currency", "status"]
+SpendMeasure = Literal["request_count", "line_count", "total_amount"]
+
+
+class SpendFilters(BaseModel):
+    status: str | None = None
+    department: str | None = None
+    commodity_group_id: str | None = None
+    vat_id: str | None = None
+    currency: str | None = None
+    month_from: str | None = Field(None, pattern=r"^\d{4}-\d{2}$")
+    month_to: str | None = Field(None, pattern=r"^\d{4}-\d{2}$")
+
+
+class SpendQueryParams(SpendFilters):
+    group_by: list[SpendDimension] = ["month"]
+
+
+class SpendPivotParams(SpendFilters):
+    rows: SpendDimension = "commodity_group_id"
+    columns: SpendDimension = "month"
+    value: SpendMeasure = "total_amount"
+    currency: str = "EUR"
+
+
+class SpendGroupResponse(BaseModel):
+    month: str | None = None
+    commodity_group_id: str | None = None
+    department: str | None = None
+    vat_id: str | None = None
+    currency: str
+    status: str | None = None
+    request_count: int
+    line_count: int
+    total_amount: float
+
+
+class SpendPivotResponse(BaseModel):
+    rows: SpendDimension
+    columns: SpendDimension
+    value: SpendMeasure
+    currency: str
+    row_labels: list[str]
+    column_labels: list[str]
+    values: list[list[float]]
+    row_totals: list[float]
+    column_totals: list[float]
+    grand_total: float
@@ -0,0 +1,97 @@
+"""
+The built frontend (`frontend/dist`), served from an in-memory manifest.
+
+The directory is scanned once at startup: every file gets its media type, stat
+result and a content hash for its ETag, so a request is a dictionary lookup
+with no filesystem probing, and unknown paths fall back to `index.html` for
+client-side routing. The `.br` and `.gz` files written next to the assets by
+`npm run build` are served as-is to clients that accept them.
+
+Vite puts a content hash in every file name under `assets/`, so those are
+cached as immutable; everything else, `index.html` in particular, is
+revalidated with its ETag on each load.
+"""
+import hashlib
+import mimetypes
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fastapi import Response
+from fastapi.responses import FileResponse
+
+from backend import etags
+from backend.compression import negotiate_encoding
+
+INDEX = "index.html"
+HASHED_PREFIX = "assets/"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Suffixes of the precompressed variants, by content coding.
+VARIANT_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+@dataclass(frozen=True)
+class StaticFile:
+    path: Path
+    stat: os.stat_result
+    media_type: str
+    digest: str
+    cache_control: str
+    variants: dict[str, tuple[Path, os.stat_result]] = field(default_factory=dict)
+
+    def etag(self, encoding: str | None) -> str:
+        # Each encoding is its own representation, with its own ETag.
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+
+def _digest(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()[:20]
+
+
+def build_manifest(root: Path) -> dict[str, StaticFile]:
+    """Every file under `root` by its URL path, with its precompressed variants."""
+    paths = {path.relative_to(root).as_posix(): path for path in root.rglob("*") if path.is_file()}
+    variant_names = {name + suffix for name in paths for suffix in VARIANT_SUFFIXES.values()}
+    manifest = {}
+    for name, path in paths.items():
+        if name in variant_names:
+            continue
+        variants = {
+            encoding: (paths[name + suffix], paths[name + suffix].stat())
+            for encoding, suffix in VARIANT_SUFFIXES.items()
+            if name + suffix in paths
+        }
+        manifest[name] = StaticFile(
+            path=path,
+            stat=path.stat(),
+            media_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+            digest=_digest(path),
+            cache_control=IMMUTABLE if name.startswith(HASHED_PREFIX) else REVALIDATE,
+            variants=variants,
+        )
+    return manifest
+
+
+class StaticFrontend:
+    def __init__(self, root: Path):
+        self.manifest = build_manifest(root)
+
+    def response(self, path: str, accept_encoding: str = "", if_none_match: str | None = None) -> Response:
+        static = self.manifest.get(path) or self.manifest.get(INDEX)
+        if static is None:
+            return Response(status_code=404)
+        encoding = negotiate_encoding(accept_encoding, static.variants) if static.variants else None
+        etag = static.etag(encoding)
+        headers = {"ETag": etag, "Cache-Control": static.cache_control}
+        if static.variants:
+            headers["Vary"] = "Accept-Encoding"
+        if etags.etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            file_path, stat = static.variants[encoding]
+            headers["Content-Encoding"] = encoding
+        else:
+            file_path, stat = static.path, static.stat
+        return FileResponse(file_path, stat_result=stat, media_type=static.media_type, headers=headers)
@@ -0,0 +1,84 @@
+"""
+Reconciliation report over a large database.
+
+Seeds a temporary SQLite database with `--lines` order lines (4 per request,
+about 1 in 50 with a stated total that is off) and times the line- and
+request-level reports, which each run as one query over all rows.
+
+    python -m benchmarks.reconciliation [--lines 1000000]
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, UTC
+from decimal import ROUND_HALF_UP, Decimal
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+
+from backend.reconciliation import reconciliation_report
+from backend.schemas import ReconciliationParams
+from database.database import create_db_engine
+from database.models import Base, OrderLine, ProcurementRequest
+
+LINES_PER_REQUEST = 4
+BATCH = 50_000
+
+
+def seed(engine, line_count: int) -> None:
+    rng = random.Random(42)
+    now = datetime.now(UTC)
+    request_count = line_count // LINES_PER_REQUEST
+    with engine.begin() as conn:
+        for start in range(0, request_count, BATCH):
+            ids = range(start + 1, min(start + BATCH, request_count) + 1)
+            requests, lines = [], []
+            for request_id in ids:
+                total = 0.0
+                for n in range(LINES_PER_REQUEST):
+                    price = round(rng.uniform(1, 500), 2)
+                    quantity = rng.choice((1, 2, 3, 0.5, 1.25))
+                    exact = Decimal(str(price)) * Decimal(str(quantity))
+                    stated = float(exact.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+                    if rng.random() < 0.02:
+                        stated += rng.choice((0.01, 1.0, 25.0))
+                    total += stated
+                    lines.append({
+                        "request_id": request_id, "description": f"Item {request_id}-{n}", "unit_price": price,
+                        "quantity": quantity, "unit": "pcs", "stated_total_price": stated,
+                    })
+                requests.append({
+                    "id": request_id, "requestor_name": "Bench", "title": f"Purchase {request_id}",
+                    "vendor_name": f"Vendor {request_id % 500}", "vat_id": "DE123456789", "department": "IT",
+                    "commodity_group_id": "031", "currency": "EUR", "stated_total_cost": round(total, 2),
+                    "status": "Open", "created_at": now, "updated_at": now, "version": 1,
+                })
+            conn.execute(ProcurementRequest.__table__.insert(), requests)
+            conn.execute(OrderLine.__table__.insert(), lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(bind=engine)
+        start = time.perf_counter()
+        seed(engine, args.lines)
+        print(f"Seeded {args.lines:,} order lines in {time.perf_counter() - start:.1f} s")
+
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            for level in ("line", "request"):
+                start = time.perf_counter()
+                report = reconciliation_report(db, ReconciliationParams(level=level, limit=100))
+                elapsed = time.perf_counter() - start
+                print(f"  {level:<8} {elapsed * 1000:9.1f} ms  {report['count']:>8,} mismatches")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
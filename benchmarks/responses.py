@@ -0,0 +1,151 @@
+"""
+Serialization time and wire size of the full request list.
+
+Seeds a temporary SQLite database with 10k requests (3 order lines each) and
+compares the stdlib JSON encoder, orjson and Pydantic's `model_dump_json`, then
+the size and cost of gzip and brotli on the resulting body, and finally the
+end-to-end `GET /api/requests` through the app with and without compression,
+against the slim `GET /api/requests/summary` projection.
+
+    python -m benchmarks.responses [--requests 10000]
+"""
+import argparse
+import json
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy.orm import sessionmaker
+
+from backend import crud, etags
+from backend.compression import BROTLI_QUALITY, GZIP_LEVEL, brotli
+from backend.main import app
+from backend.responses import ORJSONResponse
+from backend.schemas import ProcurementRequestCreate, ProcurementRequestListResponse, RequestFilters
+from database.database import create_db_engine, get_db
+from database.models import Base
+
+DEPARTMENTS = ("IT", "HR", "Finance", "Marketing", "Operations")
+
+
+def seed(db, count: int) -> None:
+    items = [
+        ProcurementRequestCreate(
+            requestor_name=f"Requestor {i % 200}",
+            title=f"Purchase {i}",
+            vendor_name=f"Vendor {i % 500} GmbH",
+            vat_id=f"DE{100000000 + i % 500}",
+            department=DEPARTMENTS[i % len(DEPARTMENTS)],
+            commodity_group_id=f"{i % 50 + 1:03d}",
+            currency="EUR",
+            stated_total_cost=None,
+            order_lines=[
+                {"description": f"Item {i}-{n}", "unit_price": 10.0 + n, "quantity": n + 1, "unit": "pcs"}
+                for n in range(3)
+            ],
+        )
+        for i in range(count)
+    ]
+    crud.bulk_create_requests(db, items)
+
+
+def timed(fn, repeat: int = 3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def report(label: str, seconds: float, size: int | None = None) -> None:
+    size_text = f"{size / 1e6:8.2f} MB" if size is not None else ""
+    print(f"  {label:<34} {seconds * 1000:9.1f} ms  {size_text}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            seed(db, args.requests)
+            requests = crud.list_requests(db, RequestFilters())
+            adapter = TypeAdapter(list[ProcurementRequestListResponse])
+            models = adapter.validate_python(requests, from_attributes=True)
+            data = adapter.dump_python(models, mode="json")
+
+        print(f"Serialization of {len(models)} requests")
+        seconds, body = timed(lambda: json.dumps(jsonable_encoder(models)).encode())
+        report("jsonable_encoder + json.dumps", seconds, len(body))
+        seconds, _ = timed(lambda: json.dumps(data, separators=(",", ":")).encode())
+        report("json.dumps (plain data)", seconds)
+        seconds, body = timed(lambda: ORJSONResponse(data).body)
+        report("ORJSONResponse (plain data)", seconds, len(body))
+        seconds, _ = timed(lambda: adapter.dump_json(models))
+        report("pydantic dump_json", seconds)
+
+        print("Compression of the list body")
+        report("identity", 0.0, len(body))
+        seconds, compressed = timed(lambda: zlib.compress(body, GZIP_LEVEL, wbits=31))
+        report(f"gzip level {GZIP_LEVEL}", seconds, len(compressed))
+        if brotli is not None:
+            seconds, compressed = timed(lambda: brotli.compress(body, quality=BROTLI_QUALITY))
+            report(f"brotli quality {BROTLI_QUALITY}", seconds, len(compressed))
+        else:
+            print("  brotli not installed, skipped")
+
+        def override_get_db():
+            with Session() as db:
+                yield db
+
+        app.dependency_overrides[get_db] = override_get_db
+        # Let the whole list fit, so the warm run measures cache hits only.
+        etags.response_cache.max_entries = max(etags.response_cache.max_entries, len(models))
+        try:
+            with TestClient(app) as client:
+                print("GET /api/requests")
+                for encoding in ("identity", "gzip", "br"):
+                    if encoding == "br" and brotli is None:
+                        continue
+                    headers = {"Accept-Encoding": encoding}
+                    for cache in ("cold", "warm"):
+                        if cache == "cold":
+                            etags.response_cache.clear()
+                        start = time.perf_counter()
+                        response = client.get("/api/requests", headers=headers)
+                        seconds = time.perf_counter() - start
+                        wire = int(response.headers.get("content-length", len(response.content)))
+                        report(f"{encoding}, {cache} cache", seconds, wire)
+
+                summary_queries = {
+                    "all summary fields": {},
+                    "fields=title,vendor_name,status,...": {
+                        "fields": "title,vendor_name,department,status,calculated_total_cost,currency"
+                    },
+                }
+                for label, params in summary_queries.items():
+                    print(f"GET /api/requests/summary, {label}")
+                    for encoding in ("identity", "gzip"):
+                        start = time.perf_counter()
+                        response = client.get(
+                            "/api/requests/summary", params=params, headers={"Accept-Encoding": encoding}
+                        )
+                        seconds = time.perf_counter() - start
+                        wire = int(response.headers.get("content-length", len(response.content)))
+                        report(encoding, seconds, wire)
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+CRUD throughput with 1, 2 and 4 uvicorn worker processes.
+
+Starts `uvicorn backend.main:app --workers N` on a temporary SQLite database
+seeded with `--requests` requests, then drives a read-heavy mix (get, filtered
+list, summary, and one update in ten) from `--clients` client processes for
+`--seconds` and reports requests per second and the speedup over one worker.
+Scaling is bounded by the cores left over for the clients.
+
+    python -m benchmarks.workers [--workers 1 2 4] [--clients 8] [--seconds 10]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/api/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+def start_server(workers: int, database_url: str, upload_dir: str) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    env = {**os.environ, "DATABASE_URL": database_url, "UPLOAD_DIR": upload_dir}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    wait_until_ready(base_url)
+    return server, base_url
+
+
+def seed(base_url: str, count: int) -> list[int]:
+    items = [
+        {
+            "requestor_name": f"Requestor {i % 200}",
+            "title": f"Purchase {i}",
+            "vendor_name": f"Vendor {i % 500} GmbH",
+            "vat_id": f"DE{100000000 + i % 500}",
+            "department": ("IT", "HR", "Finance", "Marketing", "Operations")[i % 5],
+            "commodity_group_id": f"{i % 50 + 1:03d}",
+            "currency": "EUR",
+            "order_lines": [
+                {"description": f"Item {i}-{n}", "unit_price": 10.0 + n, "quantity": n + 1, "unit": "pcs"}
+                for n in range(3)
+            ],
+        }
+        for i in range(count)
+    ]
+    with httpx.Client(base_url=base_url, timeout=120) as client:
+        for start in range(0, count, 500):
+            client.post("/api/requests/bulk", json=items[start:start + 500]).raise_for_status()
+        return [row["id"] for row in client.get("/api/requests/summary", params={"fields": "id"}).json()]
+
+
+def drive(base_url: str, ids: list[int], seconds: float, seed_value: int, results) -> None:
+    rng = random.Random(seed_value)
+    done = 0
+    deadline = time.monotonic() + seconds
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        while time.monotonic() < deadline:
+            request_id = rng.choice(ids)
+            roll = rng.random()
+            if roll < 0.1:
+                response = client.put(f"/api/requests/{request_id}", json={"title": f"Purchase {request_id} ({done})"})
+            elif roll < 0.3:
+                response = client.get("/api/requests", params={"requestor_name": f"Requestor {rng.randrange(200)}"})
+            elif roll < 0.4:
+                response = client.get("/api/requests/summary", params={"department": "IT", "fields": "title,status"})
+            else:
+                response = client.get(f"/api/requests/{request_id}")
+            response.raise_for_status()
+            done += 1
+    results.put(done)
+
+
+def measure(base_url: str, ids: list[int], clients: int, seconds: float) -> float:
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=drive, args=(base_url, ids, seconds, n, results)) for n in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    total = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return total / seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} CPUs, {args.clients} client processes, {args.seconds:g} s per run")
+    if (os.cpu_count() or 1) <= max(args.workers):
+        print("  Warning: fewer cores than workers plus clients; the speedup will be bounded by the CPU count")
+
+    baseline = None
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            server, base_url = start_server(workers, f"sqlite:///{Path(tmp) / 'bench.db'}", str(Path(tmp) / "uploads"))
+            try:
+                ids = seed(base_url, args.requests)
+                measure(base_url, ids, args.clients, 1)  # Warm up every worker's caches
+                throughput = measure(base_url, ids, args.clients, args.seconds)
+            finally:
+                server.terminate()
+                server.wait()
+        baseline = baseline or throughput
+        print(f"  {workers} worker(s)  {throughput:9.0f} req/s  {throughput / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Content-addressed storage for uploaded PDFs.
+
+Blobs are named by their SHA-256 and sharded by hash prefix
+(`ab/cd/abcd...`), so identical offers attached to several requests are stored
+once. `pdf_blobs` counts the requests referencing each blob; a blob is only
+deleted once its last reference is released. Acquiring a reference and
+unlinking a blob take the same per-digest lock, so an upload of the same
+content cannot slip in between the unlinker's check and its delete.
+
+Two backends implement `BlobStore`: `LocalBlobStore` on a filesystem and
+`S3BlobStore` on any S3-compatible object store (AWS S3, MinIO), selected with
+PDF_STORAGE. Both stream in CHUNK_SIZE pieces and never hold a whole file in
+memory. A blob key either does not exist or holds the complete content: local
+writes are renamed into place, S3 uploads only become visible once complete.
+
+Files derived from a blob (page previews) are stored next to it under
+`derived_key(digest, name)` and removed together with it.
+
+The functions here block on I/O; async handlers run them in a worker thread.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database.models import PdfBlob
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _copy_hashing(source: BinaryIO, target: BinaryIO) -> tuple[str, int]:
+    hasher = hashlib.sha256()
+    size = 0
+    while chunk := source.read(CHUNK_SIZE):
+        hasher.update(chunk)
+        target.write(chunk)
+        size += len(chunk)
+    return hasher.hexdigest(), size
+
+
+def shard_path(key: str) -> str:
+    return f"{key[:2]}/{key[2:4]}/{key}"
+
+
+def derived_key(digest: str, name: str) -> str:
+    return f"{digest}.{name}"
+
+
+class BlobStore(ABC):
+    @abstractmethod
+    def put(self, source: BinaryIO) -> tuple[str, int]:
+        """Store the contents of `source`; returns (sha256, size)."""
+
+    @abstractmethod
+    def write(self, key: str, data: bytes, content_type: str) -> None:
+        """Store a small derived file under `key`."""
+
+    @abstractmethod
+    def size(self, key: str) -> int | None:
+        """Size in bytes, or None if the key does not exist."""
+
+    @abstractmethod
+    def iter_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        """Yield bytes `start` through `end` (inclusive) in chunks."""
+
+    @abstractmethod
+    def delete(self, digest: str) -> None:
+        """Remove the blob and its derived files; a missing blob is not an error."""
+
+    def exists(self, key: str) -> bool:
+        return self.size(key) is not None
+
+    def read(self, key: str) -> bytes:
+        size = self.size(key)
+        if size is None:
+            raise FileNotFoundError(key)
+        return b"".join(self.iter_range(key, 0, size - 1)) if size else b""
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def path_for(self, key: str) -> Path:
+        return self.root / shard_path(key)
+
+    def put(self, source: BinaryIO) -> tuple[str, int]:
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=tmp_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                digest, size = _copy_hashing(source, tmp)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+
+            target = self.path_for(digest)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Replacing an existing blob is harmless: the content is identical.
+            os.replace(tmp_name, target)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return digest, size
+
+    def write(self, key: str, data: bytes, content_type: str) -> None:
+        target = self.path_for(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.part")
+        tmp.write_bytes(data)
+        os.replace(tmp, target)
+
+    def size(self, key: str) -> int | None:
+        try:
+            return self.path_for(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def iter_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        with self.path_for(key).open("rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0 and (chunk := f.read(min(CHUNK_SIZE, remaining))):
+                remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, digest: str) -> None:
+        path = self.path_for(digest)
+        path.unlink(missing_ok=True)
+        for derived in path.parent.glob(f"{digest}.*"):
+            derived.unlink(missing_ok=True)
+
+
+class S3BlobStore(BlobStore):
+    """
+    Blobs as objects `<prefix>/ab/cd/<sha256>` in an S3-compatible bucket.
+
+    `client` is a boto3 S3 client; by default one is created from the usual
+    AWS_* environment variables, with `endpoint_url` pointing at MinIO or
+    another S3-compatible service if given.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "pdfs", client=None, endpoint_url: str | None = None,
+                 region_name: str | None = None):
+        if client is None:
+            import boto3
+
+            client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region_name)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def key_for(self, key: str) -> str:
+        return f"{self.prefix}/{shard_path(key)}" if self.prefix else shard_path(key)
+
+    def put(self, source: BinaryIO) -> tuple[str, int]:
+        # The key depends on the hash, so the upload is spooled to a temp file first;
+        # upload_fileobj then sends it in multipart chunks.
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        with tempfile.TemporaryFile() as spool:
+            digest, size = _copy_hashing(source, spool)
+            try:
+                if self.size(digest) is None:
+                    spool.seek(0)
+                    self.client.upload_fileobj(
+                        spool, self.bucket, self.key_for(digest), ExtraArgs={"ContentType": "application/pdf"}
+                    )
+            except (BotoCoreError, ClientError) as e:
+                # Surfaced like a local I/O failure.
+                raise OSError(f"S3 upload failed: {e}") from e
+        return digest, size
+
+    def write(self, key: str, data: bytes, content_type: str) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self.key_for(key), Body=data, ContentType=content_type)
+
+    def size(self, key: str) -> int | None:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.key_for(key))["ContentLength"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def iter_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        response = self.client.get_object(Bucket=self.bucket, Key=self.key_for(key), Range=f"bytes={start}-{end}")
+        body = response["Body"]
+        try:
+            yield from body.iter_chunks(CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def delete(self, digest: str) -> None:
+        # The blob and its derived files share the key prefix.
+        listing = self.client.list_objects_v2(Bucket=self.bucket, Prefix=self.key_for(digest))
+        keys = [{"Key": item["Key"]} for item in listing.get("Contents", [])]
+        if keys:
+            self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": keys, "Quiet": True})
+
+
+def create_blob_store(upload_dir: Path) -> BlobStore:
+    """The PDF store configured by PDF_STORAGE (`local`, the default, or `s3`)."""
+    backend = os.getenv("PDF_STORAGE", "local").lower()
+    if backend == "local":
+        return LocalBlobStore(upload_dir / "blobs")
+    if backend == "s3":
+        return S3BlobStore(
+            bucket=os.environ["S3_BUCKET"],
+            prefix=os.getenv("S3_PREFIX", "pdfs"),
+            endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+            region_name=os.getenv("S3_REGION") or None,
+        )
+    raise ValueError(f"Unknown PDF_STORAGE backend: {backend}")
+
+
+def _dialect(db) -> str:
+    return db.get_bind().dialect.name if hasattr(db, "get_bind") else db.dialect.name
+
+
+def lock_digest(db, digest: str) -> None:
+    """
+    Hold the lock on `digest` until the transaction ends. PostgreSQL takes an
+    advisory lock keyed on the digest; SQLite has a single writer, so any write
+    holds it until commit.
+    """
+    if _dialect(db) == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtextextended(:digest, 0))"), {"digest": digest})
+    else:
+        db.execute(delete(PdfBlob).where(PdfBlob.sha256 == digest, PdfBlob.ref_count <= 0))
+
+
+def acquire(db, digest: str, size: int) -> None:
+    """
+    Count one more reference to a blob; `db` is a Session or Connection and the
+    caller commits. The digest stays locked until then.
+    """
+    lock_digest(db, digest)
+    insert = postgresql.insert if _dialect(db) == "postgresql" else sqlite.insert
+    statement = insert(PdfBlob).values(sha256=digest, size=size, ref_count=1, created_at=datetime.now(UTC))
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[PdfBlob.sha256],
+        set_={"ref_count": PdfBlob.ref_count + 1},
+    ))
+
+
+def release(db, digest: str) -> bool:
+    """
+    Drop one reference; returns True if it was the last one and the blob row is gone.
+    The caller commits and then calls `unlink_if_unreferenced`.
+    """
+    db.execute(update(PdfBlob).where(PdfBlob.sha256 == digest).values(ref_count=PdfBlob.ref_count - 1))
+    result = db.execute(delete(PdfBlob).where(PdfBlob.sha256 == digest, PdfBlob.ref_count <= 0))
+    return result.rowcount > 0
+
+
+def unlink_if_unreferenced(db, store: BlobStore, digest: str) -> None:
+    """
+    Delete the blob unless it is referenced, in a transaction of its own.
+
+    The reference is re-checked after the release was committed, since a
+    concurrent upload of the same content may have acquired it again; the
+    digest lock keeps one from acquiring it between the check and the delete.
+    """
+    try:
+        lock_digest(db, digest)
+        if db.execute(select(PdfBlob.sha256).where(PdfBlob.sha256 == digest)).first() is None:
+            store.delete(digest)
+    finally:
+        db.commit()
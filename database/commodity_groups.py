@@ -1,4 +1,26 @@
-COMMODITY_GROUPS = [
+"""
+The commodity taxonomy.
+
+Groups live in the `commodity_groups` table, seeded with
+DEFAULT_COMMODITY_GROUPS when it is created, and can be changed at runtime
+through the admin endpoints. Every change sets a new revision in
+`commodity_taxonomy`; each process keeps the taxonomy of the current revision
+in memory (an id -> group dict and the rendered prompt block) and reloads it
+only when the revision moved on, which costs one primary-key lookup.
+
+Cached classifications (see `backend.classification`) are dropped only for
+groups that were changed or removed.
+"""
+import threading
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.orm import Session
+
+from database.models import ClassificationCacheEntry, CommodityGroup, CommodityTaxonomy, ProcurementRequest
+
+DEFAULT_COMMODITY_GROUPS = [
     {"id": "001", "category": "General Services", "name": "Accommodation Rentals"},
     {"id": "002", "category": "General Services", "name": "Membership Fees"},
     {"id": "003", "category": "General Services", "name": "Workplace Safety"},
@@ -52,19 +74,112 @@ COMMODITY_GROUPS = [
 ]
 
 
-def get_commodity_group_by_id(group_id: str) -> dict | None:
-    for group in COMMODITY_GROUPS:
-        if group["id"] == group_id:
-            return group
-    return None
+@event.listens_for(CommodityGroup.__table__, "after_create")
+def _seed_groups(target, connection, **kw):
+    connection.execute(target.insert(), DEFAULT_COMMODITY_GROUPS)
+
+
+@event.listens_for(CommodityTaxonomy.__table__, "after_create")
+def _seed_revision(target, connection, **kw):
+    connection.execute(target.insert(), [{"id": 1, "revision": uuid.uuid4().hex}])
+
+
+@dataclass(frozen=True)
+class Taxonomy:
+    revision: str
+    groups: dict[str, dict]  # id -> {"id", "category", "name"}, ordered by id
+    prompt_block: str
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.revision}"'
+
+    def display(self, group_id: str) -> str:
+        group = self.groups.get(group_id)
+        return f"{group['category']} - {group['name']}" if group else "Unknown"
+
+
+_taxonomy: Taxonomy | None = None
+_taxonomy_lock = threading.Lock()
+
+
+def _render_prompt(groups: dict[str, dict]) -> str:
+    return "\n".join(f"ID: {g['id']}, Category: {g['category']}, Name: {g['name']}" for g in groups.values())
+
+
+def _current_revision(db: Session) -> str | None:
+    return db.scalar(select(CommodityTaxonomy.revision).where(CommodityTaxonomy.id == 1))
+
+
+def get_taxonomy(db: Session | None = None) -> Taxonomy:
+    """The taxonomy of the current revision; `db` defaults to a new session."""
+    global _taxonomy
+    if db is None:
+        from database.database import SessionLocal
+
+        with SessionLocal() as session:
+            return get_taxonomy(session)
+
+    revision = _current_revision(db)
+    taxonomy = _taxonomy
+    if taxonomy is not None and taxonomy.revision == revision:
+        return taxonomy
+    with _taxonomy_lock:
+        rows = db.execute(
+            select(CommodityGroup.id, CommodityGroup.category, CommodityGroup.name).order_by(CommodityGroup.id)
+        ).mappings()
+        groups = {row["id"]: dict(row) for row in rows}
+        _taxonomy = Taxonomy(revision=revision, groups=groups, prompt_block=_render_prompt(groups))
+        return _taxonomy
+
+
+def get_commodity_group_by_id(group_id: str, db: Session | None = None) -> dict | None:
+    return get_taxonomy(db).groups.get(group_id)
+
+
+def get_commodity_group_display(group_id: str, db: Session | None = None) -> str:
+    return get_taxonomy(db).display(group_id)
+
+
+def get_commodity_groups_for_prompt(db: Session | None = None) -> str:
+    return get_taxonomy(db).prompt_block
+
+
+class CommodityGroupInUse(Exception):
+    pass
+
+
+def _changed(db: Session, *changed_ids: str) -> None:
+    """Start a new revision; cached classifications into changed groups are dropped."""
+    db.execute(update(CommodityTaxonomy).where(CommodityTaxonomy.id == 1).values(revision=uuid.uuid4().hex))
+    if changed_ids:
+        db.execute(delete(ClassificationCacheEntry).where(ClassificationCacheEntry.commodity_group_id.in_(changed_ids)))
+
+
+def create_group(db: Session, group_id: str, category: str, name: str) -> CommodityGroup:
+    group = CommodityGroup(id=group_id, category=category, name=name)
+    db.add(group)
+    # A new group does not change the meaning of existing ones, so the cache stays.
+    _changed(db)
+    db.commit()
+    return group
 
 
-def get_commodity_group_display(group_id: str) -> str:
-    group = get_commodity_group_by_id(group_id)
-    if group:
-        return f"{group['category']} - {group['name']}"
-    return "Unknown"
+def update_group(db: Session, group: CommodityGroup, category: str, name: str) -> CommodityGroup:
+    if (group.category, group.name) != (category, name):
+        group.category = category
+        group.name = name
+        _changed(db, group.id)
+        db.commit()
+    return group
 
 
-def get_commodity_groups_for_prompt() -> str:
-    return "\n".join([f"ID: {g['id']}, Category: {g['category']}, Name: {g['name']}" for g in COMMODITY_GROUPS])
+def delete_group(db: Session, group: CommodityGroup) -> None:
+    in_use = db.scalar(
+        select(func.count()).select_from(ProcurementRequest).where(ProcurementRequest.commodity_group_id == group.id)
+    )
+    if in_use:
+        raise CommodityGroupInUse(f"Commodity group {group.id} is used by {in_use} request(s)")
+    db.delete(group)
+    _changed(db, group.id)
+    db.commit()
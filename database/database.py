@@ -1,16 +1,95 @@
 import os
+from contextlib import contextmanager
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from dotenv import load_dotenv
+from database.blob_store import create_blob_store
+from database import commodity_groups  # noqa: F401  (seeds the taxonomy tables when they are created)
+from database import suggestions  # noqa: F401  (registers the ORM events that keep suggestions current)
 from database.models import Base
+from database.migrations import run_migrations
+
+try:
+    import fcntl
+except ImportError:  # Windows: no inter-process lock for local development
+    fcntl = None
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./procuro.db")
+# Serve the request CRUD endpoints through the async engine (aiosqlite / asyncpg)
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
 UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "./uploads"))
+pdf_store = create_blob_store(UPLOAD_DIR)
+
+# Connection pool (applies to file-based SQLite and PostgreSQL)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# SQLite pragmas, applied to every new connection
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed while a writer is active; NORMAL is durable across
+    # application crashes and only loses the last commits on power loss.
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    # Negative cache_size is in KiB rather than pages.
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+def _pool_options(url: str) -> dict:
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+    }
+    if not is_sqlite(url):
+        options["pool_recycle"] = DB_POOL_RECYCLE
+    return options
+
+
+def create_db_engine(url: str = DATABASE_URL) -> Engine:
+    """Create the engine for `url` with the production profile for its backend."""
+    if is_sqlite(url) and _is_sqlite_memory(url):
+        # One shared connection; pool sizing and WAL do not apply to :memory:.
+        return create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+    if is_sqlite(url):
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+            **_pool_options(url),
+        )
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+        return engine
+
+    return create_engine(url, **_pool_options(url))
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -22,5 +101,81 @@ def get_db():
         db.close()
 
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
+def async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto the matching async driver."""
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    drivers = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+    if dialect not in drivers:
+        raise ValueError(f"No async driver configured for {scheme}")
+    return f"{drivers[dialect]}{sep}{rest}"
+
+
+def create_async_db_engine(url: str = DATABASE_URL):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    if is_sqlite(url) and _is_sqlite_memory(url):
+        return create_async_engine(async_database_url(url), poolclass=StaticPool)
+
+    async_engine = create_async_engine(async_database_url(url), **_pool_options(url))
+    if is_sqlite(url):
+        event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return async_engine
+
+
+_async_sessionmaker = None
+
+
+def get_async_sessionmaker():
+    # Created on first use so the async drivers are only imported when DB_ASYNC is on.
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_sessionmaker = async_sessionmaker(
+            bind=create_async_db_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_sessionmaker
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+# Arbitrary key of the PostgreSQL advisory lock held while initializing the schema
+INIT_LOCK_KEY = 0x70726F63
+
+
+@contextmanager
+def _init_lock(bind: Engine):
+    """
+    Serialize schema initialization across processes, e.g. the workers of
+    `uvicorn --workers N` all starting at once: a file lock next to a SQLite
+    database, an advisory lock on PostgreSQL.
+    """
+    if bind.dialect.name == "postgresql":
+        with bind.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": INIT_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": INIT_LOCK_KEY})
+                conn.commit()
+    elif bind.dialect.name == "sqlite" and not _is_sqlite_memory(str(bind.url)) and fcntl is not None:
+        with open(f"{bind.url.database}.init.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        yield
+
+
+def init_db(bind: Engine | None = None):
+    """Create missing tables and apply pending migrations; safe to run from several processes at once."""
+    bind = bind or engine
+    with _init_lock(bind):
+        Base.metadata.create_all(bind=bind)
+        run_migrations(bind)
@@ -0,0 +1,247 @@
+"""
+Likely-duplicate offers through a MinHash/LSH index.
+
+A request is reduced to a set of features: its normalized vendor name and VAT
+ID, plus, per order line, the description words, the unit price in cents and
+the (description, price) pair. `NUM_PERM` MinHash values of that set estimate
+the Jaccard similarity between two requests as the fraction of equal values.
+
+The signature is cut into `BANDS` bands of `ROWS` values, and each band is
+stored as a hashed bucket in `request_lsh_buckets`. Requests sharing at least
+one bucket are the candidates, found with an index lookup per band rather than
+a scan; only their signatures are compared. With 16 bands of 4 rows, a pair at
+similarity 0.8 becomes a candidate with a probability above 0.999, a pair at
+0.3 with about 0.12.
+
+Writers call `index` or `remove` in their own transaction, like
+`spend_summary.apply_changes`; `rebuild` recomputes the index from scratch.
+"""
+import hashlib
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from functools import cache
+from typing import Iterable
+
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.engine import Connection
+
+from database.models import OrderLine, ProcurementRequest, RequestLshBucket, RequestSignature
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.6"))
+DUPLICATE_LIMIT = int(os.getenv("DUPLICATE_LIMIT", "5"))
+# Candidates compared exactly, those sharing the most bands first.
+MAX_CANDIDATES = 200
+REBUILD_BATCH_SIZE = 1000
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _words(text: str | None) -> list[str]:
+    return re.findall(r"\w+", unicodedata.normalize("NFKC", text or "").casefold())
+
+
+def _cents(value) -> int | None:
+    try:
+        return round(float(value) * 100)
+    except (TypeError, ValueError):
+        return None
+
+
+def offer_features(vendor_name: str | None, vat_id: str | None, order_lines: Iterable[tuple]) -> set[str]:
+    """Feature set of an offer; `order_lines` yields (description, unit_price) pairs."""
+    features = set()
+    vendor = " ".join(_words(vendor_name))
+    if vendor:
+        features.add(f"vendor:{vendor}")
+    vat = re.sub(r"[^0-9A-Z]", "", (vat_id or "").upper())
+    if vat:
+        features.add(f"vat:{vat}")
+    for description, unit_price in order_lines:
+        words = _words(description)
+        cents = _cents(unit_price)
+        features.update(f"word:{word}" for word in words)
+        features.add(f"line:{' '.join(words)}@{cents}")
+        if cents is not None:
+            features.add(f"price:{cents}")
+    return features
+
+
+@cache
+def _permutations():
+    import numpy as np
+
+    rng = np.random.default_rng(1)
+    a = rng.integers(1, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+    b = rng.integers(0, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+    return a, b
+
+
+def signature(features: set[str]) -> bytes | None:
+    """NUM_PERM little-endian uint32 MinHash values, or None for an empty set."""
+    if not features:
+        return None
+    import numpy as np
+
+    a, b = _permutations()
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(f.encode(), digest_size=4).digest(), "little") for f in features),
+        dtype=np.uint64,
+        count=len(features),
+    )
+    # Universal hashing; the products wrap modulo 2**64, which is fine for a hash.
+    values = (np.outer(hashes, a) + b) % _MERSENNE_PRIME & _MAX_HASH
+    return values.min(axis=0).astype("<u4").tobytes()
+
+
+def signature_of(offer) -> bytes | None:
+    """Signature of anything with `vendor_name`, `vat_id` and `order_lines` (a request or its create payload)."""
+    lines = ((line.description, line.unit_price) for line in offer.order_lines)
+    return signature(offer_features(offer.vendor_name, offer.vat_id, lines))
+
+
+def similarity(left: bytes, right: bytes) -> float:
+    """Estimated Jaccard similarity of the feature sets behind two signatures."""
+    import numpy as np
+
+    return float(np.mean(np.frombuffer(left, "<u4") == np.frombuffer(right, "<u4")))
+
+
+def band_buckets(sig: bytes) -> list[int]:
+    width = ROWS * 4
+    return [
+        int.from_bytes(hashlib.blake2b(sig[band * width:(band + 1) * width], digest_size=8).digest(), "little")
+        & ((1 << 63) - 1)  # Fits a signed BIGINT
+        for band in range(BANDS)
+    ]
+
+
+def remove(db, request_ids: list[int]) -> None:
+    if request_ids:
+        db.execute(delete(RequestLshBucket).where(RequestLshBucket.request_id.in_(request_ids)))
+        db.execute(delete(RequestSignature).where(RequestSignature.request_id.in_(request_ids)))
+
+
+def index(db, signatures: dict[int, bytes | None]) -> None:
+    """Store the signatures of requests by id; unchanged ones are left alone, None removes a request."""
+    stored = dict(
+        db.execute(
+            select(RequestSignature.request_id, RequestSignature.signature)
+            .where(RequestSignature.request_id.in_(list(signatures)))
+        ).all()
+    )
+    changed = {request_id: sig for request_id, sig in signatures.items() if stored.get(request_id) != sig}
+    remove(db, [request_id for request_id in changed if request_id in stored])
+
+    rows = [{"request_id": request_id, "signature": sig} for request_id, sig in changed.items() if sig]
+    if rows:
+        db.execute(insert(RequestSignature), rows)
+        db.execute(insert(RequestLshBucket), [
+            {"band": band, "bucket": bucket, "request_id": row["request_id"]}
+            for row in rows
+            for band, bucket in enumerate(band_buckets(row["signature"]))
+        ])
+
+
+def index_requests(db, requests: Iterable[ProcurementRequest]) -> None:
+    index(db, {request.id: signature_of(request) for request in requests})
+
+
+def find_similar(db, sig: bytes | None, exclude_id: int | None = None) -> list[tuple[int, float]]:
+    """(request_id, similarity) of indexed requests at or above DUPLICATE_THRESHOLD, most similar first."""
+    if sig is None:
+        return []
+    shared = func.count().label("shared")
+    candidates = (
+        select(RequestLshBucket.request_id, shared)
+        .where(tuple_(RequestLshBucket.band, RequestLshBucket.bucket).in_(list(enumerate(band_buckets(sig)))))
+        .group_by(RequestLshBucket.request_id)
+        .order_by(shared.desc(), RequestLshBucket.request_id)
+        .limit(MAX_CANDIDATES)
+    )
+    if exclude_id is not None:
+        candidates = candidates.where(RequestLshBucket.request_id != exclude_id)
+    candidates = candidates.subquery()
+
+    rows = db.execute(
+        select(RequestSignature.request_id, RequestSignature.signature)
+        .join(candidates, candidates.c.request_id == RequestSignature.request_id)
+    ).all()
+    scored = [(request_id, similarity(sig, other)) for request_id, other in rows]
+    matches = [match for match in scored if match[1] >= DUPLICATE_THRESHOLD]
+    matches.sort(key=lambda match: (-match[1], match[0]))
+    return matches[:DUPLICATE_LIMIT]
+
+
+def likely_duplicates(db, sig: bytes | None, exclude_id: int | None = None) -> list[dict]:
+    """`find_similar` with the title, vendor and requestor of each match, for the API."""
+    matches = find_similar(db, sig, exclude_id)
+    if not matches:
+        return []
+    requests = {
+        row.id: row
+        for row in db.execute(
+            select(
+                ProcurementRequest.id,
+                ProcurementRequest.title,
+                ProcurementRequest.vendor_name,
+                ProcurementRequest.requestor_name,
+                ProcurementRequest.created_at,
+            ).where(ProcurementRequest.id.in_([request_id for request_id, _ in matches]))
+        )
+    }
+    return [
+        {
+            "request_id": request_id,
+            "title": requests[request_id].title,
+            "vendor_name": requests[request_id].vendor_name,
+            "requestor_name": requests[request_id].requestor_name,
+            "created_at": requests[request_id].created_at,
+            "similarity": round(score, 3),
+        }
+        for request_id, score in matches
+        if request_id in requests
+    ]
+
+
+def duplicates_of(db, request_id: int) -> list[dict]:
+    """Likely duplicates of an indexed request, excluding itself."""
+    sig = db.execute(
+        select(RequestSignature.signature).where(RequestSignature.request_id == request_id)
+    ).scalar_one_or_none()
+    return likely_duplicates(db, sig, exclude_id=request_id)
+
+
+def rebuild(conn: Connection) -> int:
+    """Replace the index with signatures of every request. Returns the number indexed."""
+    conn.execute(delete(RequestLshBucket))
+    conn.execute(delete(RequestSignature))
+    indexed = 0
+    last_id = 0
+    while True:
+        requests = conn.execute(
+            select(ProcurementRequest.id, ProcurementRequest.vendor_name, ProcurementRequest.vat_id)
+            .where(ProcurementRequest.id > last_id)
+            .order_by(ProcurementRequest.id)
+            .limit(REBUILD_BATCH_SIZE)
+        ).all()
+        if not requests:
+            return indexed
+        last_id = requests[-1].id
+        lines = defaultdict(list)
+        for request_id, description, unit_price in conn.execute(
+            select(OrderLine.request_id, OrderLine.description, OrderLine.unit_price)
+            .where(OrderLine.request_id.in_([row.id for row in requests]))
+        ):
+            lines[request_id].append((description, unit_price))
+        signatures = {
+            row.id: signature(offer_features(row.vendor_name, row.vat_id, lines[row.id])) for row in requests
+        }
+        index(conn, signatures)
+        indexed += sum(1 for sig in signatures.values() if sig)
@@ -0,0 +1,125 @@
+"""
+Lightweight schema migrations.
+
+`Base.metadata.create_all` only creates missing tables, so indexes and columns
+added to existing tables never reach databases created by an older version.
+Each migration below is idempotent and recorded in `schema_migrations`, so
+`init_db` can run them on every startup.
+"""
+from datetime import datetime, UTC
+from typing import Callable
+
+from sqlalchemy import inspect, select, update
+from sqlalchemy.engine import Connection, Engine
+
+from database import blob_store, duplicates, spend_summary, vendors
+from database.models import Base, ProcurementRequest, SchemaMigration
+
+
+def _create_missing_indexes(conn: Connection, *table_names: str) -> None:
+    for table_name in table_names:
+        existing = {c["name"] for c in inspect(conn).get_columns(table_name)}
+        for index in Base.metadata.tables[table_name].indexes:
+            # Indexes on columns that a later migration adds are created by that migration.
+            if {column.name for column in index.columns} <= existing:
+                index.create(conn, checkfirst=True)
+
+
+def _add_missing_columns(conn: Connection, table_name: str, *column_names: str) -> None:
+    table = Base.metadata.tables[table_name]
+    existing = {c["name"] for c in inspect(conn).get_columns(table_name)}
+    for name in column_names:
+        if name in existing:
+            continue
+        column = table.c[name]
+        column_type = column.type.compile(dialect=conn.dialect)
+        ddl = f"ALTER TABLE {table_name} ADD COLUMN {name} {column_type}"
+        if column.server_default is not None:
+            ddl += f" DEFAULT {column.server_default.arg}"
+        conn.exec_driver_sql(ddl)
+
+
+def _request_list_indexes(conn: Connection) -> None:
+    _create_missing_indexes(conn, "procurement_requests", "order_lines", "status_history")
+
+
+def _backfill_spend_summary(conn: Connection) -> None:
+    spend_summary.rebuild(conn)
+
+
+def _request_version(conn: Connection) -> None:
+    _add_missing_columns(conn, "procurement_requests", "version")
+
+
+def _pdf_blob_store(conn: Connection) -> None:
+    """Move PDFs from the flat `UPLOAD_DIR/{id}.pdf` layout into the blob store."""
+    from database.database import UPLOAD_DIR, pdf_store
+
+    _add_missing_columns(conn, "procurement_requests", "pdf_sha256")
+    _create_missing_indexes(conn, "procurement_requests")
+
+    legacy_files = []
+    rows = conn.execute(
+        select(ProcurementRequest.id, ProcurementRequest.pdf_filename)
+        .where(ProcurementRequest.pdf_filename.is_not(None), ProcurementRequest.pdf_sha256.is_(None))
+    ).all()
+    for request_id, filename in rows:
+        legacy = UPLOAD_DIR / filename
+        digest = None
+        if legacy.is_file():
+            with legacy.open("rb") as source:
+                digest, size = pdf_store.put(source)
+            blob_store.acquire(conn, digest, size)
+            legacy_files.append(legacy)
+        conn.execute(
+            update(ProcurementRequest)
+            .where(ProcurementRequest.id == request_id)
+            # Keeps updated_at, which would otherwise be bumped by its onupdate.
+            .values(
+                pdf_sha256=digest,
+                pdf_filename=filename if digest else None,
+                updated_at=ProcurementRequest.updated_at,
+            )
+        )
+
+    # Only once every file has a copy in the store.
+    for legacy in legacy_files:
+        legacy.unlink(missing_ok=True)
+
+
+def _backfill_duplicate_index(conn: Connection) -> None:
+    duplicates.rebuild(conn)
+
+
+def _vendor_master(conn: Connection) -> None:
+    _add_missing_columns(conn, "procurement_requests", "vendor_id")
+    _create_missing_indexes(conn, "procurement_requests")
+    vendors.backfill(conn)
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "request_list_indexes", _request_list_indexes),
+    (2, "backfill_spend_summary", _backfill_spend_summary),
+    (3, "request_version", _request_version),
+    (4, "pdf_blob_store", _pdf_blob_store),
+    (5, "backfill_duplicate_index", _backfill_duplicate_index),
+    (6, "vendor_master", _vendor_master),
+]
+
+
+def run_migrations(engine: Engine) -> list[int]:
+    """Apply all pending migrations and return the versions that were applied."""
+    applied = []
+    with engine.begin() as conn:
+        done = set(conn.execute(select(SchemaMigration.version)).scalars())
+        for version, name, migrate in MIGRATIONS:
+            if version in done:
+                continue
+            migrate(conn)
+            conn.execute(
+                SchemaMigration.__table__.insert().values(
+                    version=version, name=name, applied_at=datetime.now(UTC)
+                )
+            )
+            applied.append(version)
+    return applied
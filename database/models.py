@@ -1,10 +1,13 @@
 from datetime import datetime, UTC
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text, LargeBinary
+from sqlalchemy import Column, BigInteger, Integer, String, Float, DateTime, ForeignKey, Enum, Text, LargeBinary, Index, UniqueConstraint, JSON, Boolean, text
 from sqlalchemy.orm import relationship, declarative_base
 import enum
 
 Base = declarative_base()
 
+# Stated and calculated totals further apart than this are flagged as a mismatch.
+TOTAL_MISMATCH_TOLERANCE = 0.01
+
 
 class RequestStatus(str, enum.Enum):
     OPEN = "Open"
@@ -14,23 +17,49 @@ class RequestStatus(str, enum.Enum):
 
 class ProcurementRequest(Base):
     __tablename__ = "procurement_requests"
+    __table_args__ = (
+        # Every list filter is an equality match followed by ORDER BY created_at,
+        # so each filter column is paired with created_at.
+        Index("ix_procurement_requests_status_created_at", "status", "created_at"),
+        Index("ix_procurement_requests_department_created_at", "department", "created_at"),
+        Index("ix_procurement_requests_commodity_group_created_at", "commodity_group_id", "created_at"),
+        Index("ix_procurement_requests_vat_id_created_at", "vat_id", "created_at"),
+        Index("ix_procurement_requests_currency_created_at", "currency", "created_at"),
+        Index("ix_procurement_requests_requestor_created_at", "requestor_name", "created_at"),
+        Index("ix_procurement_requests_vendor_created_at", "vendor_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     requestor_name = Column(String, nullable=False)
     title = Column(String, nullable=False)
     vendor_name = Column(String, nullable=False)
     vat_id = Column(String, nullable=False)
+    # The vendor master row that `vendor_name` and `vat_id` resolved to (see `database.vendors`)
+    vendor_id = Column(Integer, ForeignKey("vendors.id"), nullable=True)
     department = Column(String, nullable=False)
     commodity_group_id = Column(String, nullable=False)
     currency = Column(String, default="EUR")
     stated_total_cost = Column(Float, nullable=True)  # Total from the offer document
     status = Column(String, default=RequestStatus.OPEN.value)
     pdf_filename = Column(String, nullable=True)  # Original filename
-    created_at = Column(DateTime, default=lambda: datetime.now(UTC))
-    updated_at = Column(DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
+    pdf_sha256 = Column(String(64), ForeignKey("pdf_blobs.sha256"), nullable=True, index=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(UTC), index=True)
+    updated_at = Column(DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC), index=True)
+    # Incremented on every change to the request, its lines or its status (see `touch`).
+    # Doubles as the ORM version counter, so concurrent flushes of a stale copy fail.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     order_lines = relationship("OrderLine", back_populates="request", cascade="all, delete-orphan")
     status_history = relationship("StatusHistory", back_populates="request", cascade="all, delete-orphan")
+    extraction_runs = relationship(
+        "ExtractionRun", back_populates="request", cascade="all, delete-orphan", order_by="ExtractionRun.id.desc()"
+    )
+
+    __mapper_args__ = {"version_id_col": version}
+
+    def touch(self) -> None:
+        """Mark the request as changed so its row, and with it `version`, is updated."""
+        self.updated_at = datetime.now(UTC)
 
     @property
     def calculated_total_cost(self) -> float:
@@ -40,14 +69,14 @@ class ProcurementRequest(Base):
     def has_total_mismatch(self) -> bool:
         if self.stated_total_cost is None:
             return False
-        return abs(self.stated_total_cost - self.calculated_total_cost) > 0.01
+        return abs(self.stated_total_cost - self.calculated_total_cost) > TOTAL_MISMATCH_TOLERANCE
 
 
 class OrderLine(Base):
     __tablename__ = "order_lines"
 
     id = Column(Integer, primary_key=True, index=True)
-    request_id = Column(Integer, ForeignKey("procurement_requests.id"), nullable=False)
+    request_id = Column(Integer, ForeignKey("procurement_requests.id"), nullable=False, index=True)
     description = Column(String, nullable=False)
     unit_price = Column(Float, nullable=False)
 
@@ -72,10 +101,178 @@ class StatusHistory(Base):
     __tablename__ = "status_history"
 
     id = Column(Integer, primary_key=True, index=True)
-    request_id = Column(Integer, ForeignKey("procurement_requests.id"), nullable=False)
+    request_id = Column(Integer, ForeignKey("procurement_requests.id"), nullable=False, index=True)
     from_status = Column(String, nullable=True)
     to_status = Column(String, nullable=False)
     changed_at = Column(DateTime, default=lambda: datetime.now(UTC))
     changed_by = Column(String, default="system")
 
     request = relationship("ProcurementRequest", back_populates="status_history")
+
+
+class SpendSummary(Base):
+    """
+    Pre-aggregated spend per month and dimension combination.
+
+    Maintained incrementally by `database.spend_summary` whenever a request, its
+    lines or its status change, so analytics queries scan groups instead of rows.
+    """
+    __tablename__ = "spend_summary"
+    __table_args__ = (
+        UniqueConstraint(
+            "month", "commodity_group_id", "department", "vat_id", "currency", "status",
+            name="uq_spend_summary_key",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    month = Column(String, nullable=False)  # YYYY-MM of created_at
+    commodity_group_id = Column(String, nullable=False)
+    department = Column(String, nullable=False)
+    vat_id = Column(String, nullable=False)
+    currency = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    request_count = Column(Integer, nullable=False, default=0)
+    line_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0.0)  # Sum of calculated line totals
+
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime, default=lambda: datetime.now(UTC))
+
+
+class RequestEvent(Base):
+    """
+    Outbox of request changes, written in the same transaction as the change.
+
+    The change feed streams rows by ascending id, so ids must never be reused
+    (hence AUTOINCREMENT on SQLite). `request_id` is not a foreign key because
+    the deletion event outlives the request.
+    """
+    __tablename__ = "request_events"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    request_id = Column(Integer, nullable=False)
+    event_type = Column(String, nullable=False)  # created, updated, status_changed, deleted
+    version = Column(Integer, nullable=False)  # Request version after the change
+    created_at = Column(DateTime, default=lambda: datetime.now(UTC), index=True)
+
+
+class PdfBlob(Base):
+    """A stored PDF, addressed by content hash (see `database.blob_store`)."""
+    __tablename__ = "pdf_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)  # Requests pointing at this blob
+    created_at = Column(DateTime, default=lambda: datetime.now(UTC))
+
+
+class ExtractionRunStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class ExtractionRun(Base):
+    """One extraction and classification of a request's stored PDF (see `backend.extraction_runs`)."""
+    __tablename__ = "extraction_runs"
+
+    id = Column(Integer, primary_key=True)
+    request_id = Column(Integer, ForeignKey("procurement_requests.id"), nullable=False, index=True)
+    pdf_sha256 = Column(String(64), nullable=False)  # The file that was extracted
+    status = Column(String, nullable=False, default=ExtractionRunStatus.PENDING.value)
+    use_vision = Column(Boolean, nullable=False, default=True)
+    model = Column(String, nullable=True)  # Extraction model
+    classification_model = Column(String, nullable=True)
+    result = Column(JSON, nullable=True)  # Raw extraction JSON
+    classification = Column(JSON, nullable=True)  # Raw classification JSON
+    error = Column(Text, nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)  # Summed over extraction and classification
+    completion_tokens = Column(Integer, nullable=True)
+    extraction_ms = Column(Integer, nullable=True)
+    classification_ms = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(UTC))
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    request = relationship("ProcurementRequest", back_populates="extraction_runs")
+
+
+class CommodityGroup(Base):
+    """The commodity taxonomy; seeded from `database.commodity_groups.DEFAULT_COMMODITY_GROUPS`."""
+    __tablename__ = "commodity_groups"
+
+    id = Column(String(3), primary_key=True)
+    category = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(UTC))
+    updated_at = Column(DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
+
+
+class CommodityTaxonomy(Base):
+    """Single row whose revision changes with every change to `commodity_groups`."""
+    __tablename__ = "commodity_taxonomy"
+
+    id = Column(Integer, primary_key=True)
+    revision = Column(String(32), nullable=False)
+    updated_at = Column(DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC))
+
+
+class ClassificationCacheEntry(Base):
+    """A commodity classification, keyed by a hash of the normalized input (see `backend.classification`)."""
+    __tablename__ = "classification_cache"
+
+    key = Column(String(64), primary_key=True)
+    commodity_group_id = Column(String(3), nullable=False, index=True)
+    confidence = Column(Float, nullable=False, default=0.0)
+    rationale = Column(Text, nullable=True)
+    model = Column(String, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(UTC))
+
+
+class RequestSignature(Base):
+    """MinHash signature of a request's vendor and order lines (see `database.duplicates`)."""
+    __tablename__ = "request_signatures"
+
+    request_id = Column(Integer, primary_key=True)  # Not a foreign key; removed by the writers
+    signature = Column(LargeBinary, nullable=False)
+
+
+class RequestLshBucket(Base):
+    """One LSH band of a request's signature; requests sharing a (band, bucket) are duplicate candidates."""
+    __tablename__ = "request_lsh_buckets"
+
+    band = Column(Integer, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    request_id = Column(Integer, primary_key=True, index=True)
+
+
+class Vendor(Base):
+    """
+    The vendor master. A vendor is identified by its VAT ID, or by its folded
+    name when it has none (see `database.vendors`).
+    """
+    __tablename__ = "vendors"
+    __table_args__ = (
+        Index(
+            "uq_vendors_normalized_name_without_vat_id",
+            "normalized_name",
+            unique=True,
+            sqlite_where=text("vat_id IS NULL"),
+            postgresql_where=text("vat_id IS NULL"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)  # As first seen
+    normalized_name = Column(String, nullable=False, index=True)  # Accent- and case-folded
+    vat_id = Column(String, nullable=True, unique=True)  # Upper-case, without separators
+    created_at = Column(DateTime, default=lambda: datetime.now(UTC))
+    updated_at = Column(DateTime, default=lambda: datetime.now(UTC), onupdate=lambda: datetime.now(UTC), index=True)
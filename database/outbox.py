@@ -0,0 +1,97 @@
+"""
+The `request_events` outbox behind the change feed.
+
+Writers call `record` inside their own transaction, so an event exists exactly
+when its change was committed. Readers page through events by id; since every
+worker reads the same table, no broker is needed between processes.
+
+Paging by id requires ids to become visible in increasing order, or a reader
+that has moved past a later id would never see an earlier one committed after
+it. SQLite runs one write transaction at a time, so this holds by itself. On
+PostgreSQL, writers take a transaction-scoped advisory lock before inserting
+events, which orders event-writing transactions the same way: an id is only
+allocated once every transaction holding a lower one has committed or rolled
+back.
+"""
+from datetime import datetime, timedelta, UTC
+from typing import Iterable
+
+from sqlalchemy import delete, func, insert, literal, select, text
+
+from database.models import ProcurementRequest, RequestEvent
+
+CREATED = "created"
+UPDATED = "updated"
+STATUS_CHANGED = "status_changed"
+DELETED = "deleted"
+
+# Arbitrary key of the PostgreSQL advisory lock that orders event writers
+OUTBOX_LOCK_KEY = 0x6F757462
+
+
+def _lock_event_writers(db) -> None:
+    """Wait for other transactions writing events to finish; held until this one ends."""
+    dialect = db.get_bind().dialect.name if hasattr(db, "get_bind") else db.dialect.name
+    if dialect == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": OUTBOX_LOCK_KEY})
+
+
+def record(db, event_type: str, revisions: Iterable[tuple[int, int]]) -> None:
+    """Add one event per (request_id, version) pair; the caller commits."""
+    now = datetime.now(UTC)
+    rows = [
+        {"request_id": request_id, "event_type": event_type, "version": version, "created_at": now}
+        for request_id, version in revisions
+    ]
+    if rows:
+        _lock_event_writers(db)
+        db.execute(insert(RequestEvent), rows)
+
+
+def record_changed(db, event_type: str, request_ids: list[int]) -> None:
+    """Add events for requests changed in bulk, reading their current versions with INSERT ... SELECT."""
+    _lock_event_writers(db)
+    db.execute(
+        insert(RequestEvent).from_select(
+            ["request_id", "event_type", "version", "created_at"],
+            select(
+                ProcurementRequest.id,
+                literal(event_type),
+                ProcurementRequest.version,
+                literal(datetime.now(UTC), type_=RequestEvent.created_at.type),
+            ).where(ProcurementRequest.id.in_(request_ids)),
+        )
+    )
+
+
+def latest_event_id(db) -> int:
+    return db.execute(select(func.coalesce(func.max(RequestEvent.id), 0))).scalar_one()
+
+
+def has_gap(db, after_id: int) -> bool:
+    """
+    True if events after `after_id` were pruned, or `after_id` is ahead of the
+    table (for instance after a database reset), so resuming would miss changes.
+    """
+    first, last = db.execute(select(func.min(RequestEvent.id), func.max(RequestEvent.id))).one()
+    if first is None:
+        return after_id > 0
+    return after_id < first - 1 or after_id > last
+
+
+def events_after(db, after_id: int, limit: int) -> list[RequestEvent]:
+    return list(
+        db.execute(
+            select(RequestEvent).where(RequestEvent.id > after_id).order_by(RequestEvent.id).limit(limit)
+        ).scalars()
+    )
+
+
+def prune(db, retention: timedelta) -> int:
+    """Delete events older than `retention`, always keeping the newest one as the resume anchor."""
+    cutoff = datetime.now(UTC) - retention
+    newest = latest_event_id(db)
+    result = db.execute(
+        delete(RequestEvent).where(RequestEvent.created_at < cutoff, RequestEvent.id < newest)
+    )
+    return result.rowcount
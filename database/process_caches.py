@@ -0,0 +1,56 @@
+"""
+Registry of the in-process caches of database contents (vendor index,
+suggestion counts), one per database.
+
+Caches are shared by every engine on the same database rather than kept per
+engine object: with DB_ASYNC the async engine's `sync_engine` and
+`database.engine` are two engines on one database, and a write through either
+must reach the cache that the other reads. In-memory SQLite databases are
+private to their engine, so their caches stay per engine.
+"""
+import threading
+import weakref
+from typing import Callable, TypeVar
+
+from sqlalchemy.engine import URL
+
+T = TypeVar("T")
+
+_by_engine: "weakref.WeakKeyDictionary[object, dict]" = weakref.WeakKeyDictionary()
+_by_database: "weakref.WeakValueDictionary[str, _Caches]" = weakref.WeakValueDictionary()
+_lock = threading.Lock()
+
+
+class _Caches(dict):
+    """name -> cache for one database; a dict subclass so it can be weakly referenced."""
+
+
+def database_key(url: URL) -> str | None:
+    """The same string for every driver of one database; None for a private in-memory database."""
+    backend = url.get_backend_name()
+    if backend == "sqlite" and (url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"):
+        return None
+    return url.set(drivername=backend).render_as_string(hide_password=False)
+
+
+def _caches(bind) -> _Caches:
+    caches = _by_engine.get(bind)
+    if caches is None:
+        key = database_key(bind.url)
+        caches = _by_database.get(key) if key else None
+        if caches is None:
+            caches = _Caches()
+            if key:
+                _by_database[key] = caches
+        _by_engine[bind] = caches
+    return caches
+
+
+def cache_for(bind, name: str, factory: Callable[[], T]) -> T:
+    """The cache `name` of `bind`'s database, created with `factory` on first use."""
+    with _lock:
+        caches = _caches(bind)
+        cache = caches.get(name)
+        if cache is None:
+            cache = caches[name] = factory()
+        return cache
@@ -0,0 +1,217 @@
+"""
+Incremental maintenance of the `spend_summary` table.
+
+Every request contributes exactly one row key (month, commodity group,
+department, VAT ID, currency, status) with its request count, line count and
+calculated total. Writers subtract the old contribution and add the new one in
+the same transaction; `rebuild` recomputes the table from scratch and reports
+where the incremental state had drifted.
+
+Run `python -m database.spend_summary rebuild [--check]` for a consistency pass.
+"""
+import sys
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+
+from database.models import OrderLine, ProcurementRequest, SpendSummary
+
+KEY_COLUMNS = ("month", "commodity_group_id", "department", "vat_id", "currency", "status")
+
+# Totals are floats, so incremental updates and a rebuild may differ in the last bits.
+TOTAL_TOLERANCE = 0.005
+
+
+class SpendKey(NamedTuple):
+    month: str
+    commodity_group_id: str
+    department: str
+    vat_id: str
+    currency: str
+    status: str
+
+
+class SpendContribution(NamedTuple):
+    key: SpendKey
+    line_count: int
+    total_amount: float
+
+
+def month_of(value: datetime) -> str:
+    return value.strftime("%Y-%m")
+
+
+def request_contribution(request: ProcurementRequest) -> SpendContribution:
+    key = SpendKey(
+        month=month_of(request.created_at),
+        commodity_group_id=request.commodity_group_id,
+        department=request.department,
+        vat_id=request.vat_id,
+        currency=request.currency,
+        status=request.status,
+    )
+    return SpendContribution(key, len(request.order_lines), request.calculated_total_cost)
+
+
+def apply_changes(
+    conn,
+    added: Iterable[SpendContribution] = (),
+    removed: Iterable[SpendContribution] = (),
+) -> None:
+    """
+    Add and subtract contributions with one upsert per touched key.
+
+    `conn` may be a Connection or a Session; the caller owns the transaction.
+    """
+    deltas: dict[SpendKey, list] = defaultdict(lambda: [0, 0, 0.0])
+    for sign, contributions in ((1, added), (-1, removed)):
+        for contribution in contributions:
+            delta = deltas[contribution.key]
+            delta[0] += sign
+            delta[1] += sign * contribution.line_count
+            delta[2] += sign * contribution.total_amount
+
+    rows = [
+        {**key._asdict(), "request_count": count, "line_count": lines, "total_amount": total}
+        for key, (count, lines, total) in deltas.items()
+        if count or lines or total
+    ]
+    if not rows:
+        return
+
+    dialect = conn.get_bind().dialect.name if hasattr(conn, "get_bind") else conn.dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statement = insert(SpendSummary)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={
+            "request_count": SpendSummary.request_count + statement.excluded.request_count,
+            "line_count": SpendSummary.line_count + statement.excluded.line_count,
+            "total_amount": SpendSummary.total_amount + statement.excluded.total_amount,
+        },
+    )
+    conn.execute(statement, rows)
+    conn.execute(delete(SpendSummary).where(SpendSummary.request_count <= 0))
+
+
+def line_totals_subquery():
+    """Line count and total amount per request id."""
+    return (
+        select(
+            OrderLine.request_id,
+            func.count(OrderLine.id).label("line_count"),
+            func.sum(OrderLine.unit_price * OrderLine.quantity).label("total_amount"),
+        )
+        .group_by(OrderLine.request_id)
+        .subquery()
+    )
+
+
+def totals_statement():
+    """Select each request's key columns together with its line count and total."""
+    line_totals = line_totals_subquery()
+    return select(
+        ProcurementRequest.id,
+        ProcurementRequest.created_at,
+        ProcurementRequest.commodity_group_id,
+        ProcurementRequest.department,
+        ProcurementRequest.vat_id,
+        ProcurementRequest.currency,
+        ProcurementRequest.status,
+        func.coalesce(line_totals.c.line_count, 0).label("line_count"),
+        func.coalesce(line_totals.c.total_amount, 0.0).label("total_amount"),
+    ).outerjoin(line_totals, line_totals.c.request_id == ProcurementRequest.id)
+
+
+def contribution_from_row(row, status: str | None = None) -> SpendContribution:
+    """Build a contribution from a `totals_statement` row, optionally with another status."""
+    key = SpendKey(
+        month=month_of(row.created_at),
+        commodity_group_id=row.commodity_group_id,
+        department=row.department,
+        vat_id=row.vat_id,
+        currency=row.currency,
+        status=status or row.status,
+    )
+    return SpendContribution(key, row.line_count, row.total_amount)
+
+
+def compute_summary(conn: Connection):
+    """Aggregate spend straight from the request tables as a pandas DataFrame."""
+    import pandas as pd
+
+    statement = totals_statement()
+    frame = pd.DataFrame(conn.execute(statement).all(), columns=list(statement.selected_columns.keys()))
+    if frame.empty:
+        return pd.DataFrame(columns=[*KEY_COLUMNS, "request_count", "line_count", "total_amount"])
+
+    frame["month"] = pd.to_datetime(frame.pop("created_at")).dt.strftime("%Y-%m")
+    frame["request_count"] = 1
+    frame = frame.drop(columns="id")
+    return (
+        frame.groupby(list(KEY_COLUMNS), as_index=False)[["request_count", "line_count", "total_amount"]]
+        .sum()
+    )
+
+
+def load_summary(conn: Connection):
+    import pandas as pd
+
+    columns = [*KEY_COLUMNS, "request_count", "line_count", "total_amount"]
+    statement = select(*(getattr(SpendSummary, column) for column in columns))
+    return pd.DataFrame(conn.execute(statement).all(), columns=columns)
+
+
+def find_drift(conn: Connection) -> list[dict]:
+    """Return the keys whose stored aggregates differ from a fresh computation."""
+    expected = compute_summary(conn)
+    stored = load_summary(conn)
+    merged = expected.merge(stored, on=list(KEY_COLUMNS), how="outer", suffixes=("_expected", "_stored"))
+    merged = merged.fillna({
+        "request_count_expected": 0, "request_count_stored": 0,
+        "line_count_expected": 0, "line_count_stored": 0,
+        "total_amount_expected": 0.0, "total_amount_stored": 0.0,
+    })
+    mismatch = (
+        (merged.request_count_expected != merged.request_count_stored)
+        | (merged.line_count_expected != merged.line_count_stored)
+        | ((merged.total_amount_expected - merged.total_amount_stored).abs() > TOTAL_TOLERANCE)
+    )
+    return merged[mismatch].to_dict("records")
+
+
+def rebuild(conn: Connection) -> int:
+    """Replace the summary with a full recomputation. Returns the number of groups."""
+    summary = compute_summary(conn)
+    conn.execute(delete(SpendSummary))
+    rows = summary.astype({"request_count": int, "line_count": int, "total_amount": float}).to_dict("records")
+    if rows:
+        conn.execute(SpendSummary.__table__.insert(), rows)
+    return len(rows)
+
+
+def main(argv: list[str]) -> int:
+    from database.database import engine, init_db
+
+    if argv[:1] != ["rebuild"]:
+        print("usage: python -m database.spend_summary rebuild [--check]")
+        return 2
+
+    init_db()
+    with engine.begin() as conn:
+        drift = find_drift(conn)
+        for row in drift:
+            print(row)
+        print(f"{len(drift)} group(s) out of sync")
+        if "--check" in argv:
+            return 1 if drift else 0
+        print(f"Rebuilt spend summary: {rebuild(conn)} group(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,217 @@
+"""
+Typeahead suggestions for free-text request fields.
+
+Each field in FIELDS has an in-process `FrequencyIndex` per database: how often
+every distinct value occurs, with prefix search returning the most frequent
+matches first. An index is loaded with one GROUP BY on first use and then kept
+current through ORM events: mapper events collect +1/-1 deltas while a session
+flushes, bulk inserts are seen through `do_orm_execute`, and the deltas are
+applied only once the session commits (and dropped on rollback).
+
+Writes by other worker processes are not seen by these events, so an index is
+also reloaded from the database every SUGGESTION_RELOAD_SECONDS. Memory is
+bounded by SUGGESTION_MAX_VALUES distinct values per field; beyond that the
+least frequent values are dropped until they are seen again.
+"""
+import bisect
+import heapq
+import os
+import threading
+import time
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from database.models import OrderLine, ProcurementRequest
+from database.process_caches import cache_for
+
+SUGGESTION_MAX_VALUES = int(os.getenv("SUGGESTION_MAX_VALUES", "100000"))
+SUGGESTION_RELOAD_SECONDS = float(os.getenv("SUGGESTION_RELOAD_SECONDS", "600"))
+# The most results a search returns, and the length of cached short-prefix results.
+MAX_SUGGESTIONS = 20
+# Prefixes up to this length match large ranges of values; their results are cached.
+CACHED_PREFIX_LENGTH = 2
+
+FIELDS = {
+    "requestor_name": ProcurementRequest.requestor_name,
+    "department": ProcurementRequest.department,
+    "unit": OrderLine.unit,
+}
+
+
+class FrequencyIndex:
+    """
+    Distinct values with their counts, searchable by case-insensitive prefix.
+
+    (folded value, value) pairs are kept in a sorted array, so the values
+    under a prefix are one contiguous run found by bisection. Only that run is
+    ranked by count, and for the short prefixes, whose runs are long, the
+    ranked result is cached until a value under the prefix changes.
+    """
+
+    def __init__(self, max_values: int = SUGGESTION_MAX_VALUES):
+        self.max_values = max_values
+        self.counts: dict[str, int] = {}
+        self._keys: list[tuple[str, str]] = []
+        self._cache: dict[str, list[tuple[int, str, str]]] = {}
+        self.loaded_at = 0.0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def load(self, counts: dict[str, int]) -> None:
+        with self.lock:
+            self.counts = {value: count for value, count in counts.items() if value and count > 0}
+            self._keys = sorted((value.casefold(), value) for value in self.counts)
+            self._cache.clear()
+            self._evict()
+            self.loaded_at = time.monotonic()
+
+    def add(self, value: str | None, delta: int = 1) -> None:
+        if not value or not delta:
+            return
+        with self.lock:
+            count = self.counts.get(value, 0) + delta
+            key = (value.casefold(), value)
+            if count <= 0:
+                if self.counts.pop(value, None) is not None:
+                    del self._keys[bisect.bisect_left(self._keys, key)]
+            else:
+                if value not in self.counts:
+                    bisect.insort(self._keys, key)
+                self.counts[value] = count
+            for length in range(CACHED_PREFIX_LENGTH + 1):
+                self._cache.pop(key[0][:length], None)
+            if len(self.counts) > self.max_values:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Down to 90% of the bound at once, so eviction is not paid on every new value.
+        excess = len(self.counts) - int(self.max_values * 0.9)
+        if len(self.counts) <= self.max_values or excess <= 0:
+            return
+        for value in heapq.nsmallest(excess, self.counts, key=self.counts.__getitem__):
+            del self.counts[value]
+        self._keys = sorted((value.casefold(), value) for value in self.counts)
+        self._cache.clear()
+
+    def _ranked(self, prefix: str, limit: int) -> list[tuple[int, str, str]]:
+        low = bisect.bisect_left(self._keys, (prefix,))
+        high = bisect.bisect_left(self._keys, (prefix + "\U0010ffff",))
+        counts = self.counts
+        return heapq.nsmallest(limit, ((-counts[value], folded, value) for folded, value in self._keys[low:high]))
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """The most frequent values starting with `query` (case-insensitive), most frequent first."""
+        prefix = query.strip().casefold()
+        limit = min(limit, MAX_SUGGESTIONS)
+        with self.lock:
+            if len(prefix) <= CACHED_PREFIX_LENGTH:
+                ranked = self._cache.get(prefix)
+                if ranked is None:
+                    ranked = self._cache[prefix] = self._ranked(prefix, MAX_SUGGESTIONS)
+            else:
+                ranked = self._ranked(prefix, limit)
+        return [{"value": value, "count": -count} for count, _, value in ranked[:limit]]
+
+
+def _loaded_indexes(bind) -> dict[str, FrequencyIndex]:
+    # Per database, not per engine: with DB_ASYNC, writes go through the async
+    # engine and reads through `database.engine`.
+    return cache_for(bind, "suggestions", dict)
+
+
+def count_values(db, field: str) -> dict[str, int]:
+    column = FIELDS[field]
+    rows = db.execute(select(column, func.count()).where(column.is_not(None)).group_by(column))
+    return {value: count for value, count in rows}
+
+
+def get_index(db: Session, field: str) -> FrequencyIndex:
+    """The index of `field` for `db`'s database, loaded on first use and reloaded when old."""
+    indexes = _loaded_indexes(db.get_bind())
+    index = indexes.get(field)
+    if index is None:
+        index = indexes.setdefault(field, FrequencyIndex())
+    if not index.loaded_at or time.monotonic() - index.loaded_at >= SUGGESTION_RELOAD_SECONDS:
+        index.load(count_values(db, field))
+    return index
+
+
+# Pending deltas live in `session.info` until the transaction's fate is known.
+
+def _pending(session: Session) -> list[tuple[str, str, int]]:
+    return session.info.setdefault("suggestion_deltas", [])
+
+
+def _record(target, changes) -> None:
+    session = object_session(target)
+    if session is not None:
+        _pending(session).extend(changes)
+
+
+def _fields_of(model) -> list[tuple[str, str]]:
+    return [(field, column.key) for field, column in FIELDS.items() if column.class_ is model]
+
+
+def _listen(model) -> None:
+    fields = _fields_of(model)
+
+    @event.listens_for(model, "after_insert")
+    def _inserted(mapper, connection, target):
+        _record(target, [(field, getattr(target, attr), 1) for field, attr in fields])
+
+    @event.listens_for(model, "after_delete")
+    def _deleted(mapper, connection, target):
+        _record(target, [(field, getattr(target, attr), -1) for field, attr in fields])
+
+    @event.listens_for(model, "after_update")
+    def _updated(mapper, connection, target):
+        state = inspect(target)
+        changes = []
+        for field, attr in fields:
+            history = state.attrs[attr].history
+            if history.added or history.deleted:
+                changes.extend((field, value, -1) for value in history.deleted)
+                changes.extend((field, value, 1) for value in history.added)
+        _record(target, changes)
+
+
+_listen(ProcurementRequest)
+_listen(OrderLine)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_insert(orm_execute_state):
+    """Count rows inserted with `session.execute(insert(Model), rows)`, which bypass the mapper events."""
+    if not orm_execute_state.is_insert:
+        return
+    table_name = getattr(orm_execute_state.statement.table, "name", None)
+    fields = [
+        (field, column.key) for field, column in FIELDS.items() if column.class_.__tablename__ == table_name
+    ]
+    params = orm_execute_state.parameters
+    if not fields or not params:
+        return
+    rows = params if isinstance(params, list) else [params]
+    _pending(orm_execute_state.session).extend(
+        (field, row.get(attr), 1) for row in rows for field, attr in fields
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _apply(session):
+    deltas = session.info.pop("suggestion_deltas", None)
+    if not deltas:
+        return
+    indexes = _loaded_indexes(session.get_bind())
+    for field, value, delta in deltas:
+        index = indexes.get(field)
+        if index is not None and index.loaded_at:
+            index.add(value, delta)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop("suggestion_deltas", None)
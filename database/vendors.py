@@ -0,0 +1,305 @@
+"""
+The vendor master and its autocomplete index.
+
+Requests keep `vendor_name` and `vat_id` as entered and point at one row of
+`vendors` through `vendor_id`. A vendor is identified by its VAT ID (upper
+case, separators removed) when there is one, otherwise by its folded name:
+case-folded, German umlauts transliterated ("ü" -> "ue") and other accents
+stripped, so "Bürobedarf GmbH" and "BUEROBEDARF GmbH" are the same vendor.
+Both identities are unique in the database, and new vendors are inserted with
+ON CONFLICT DO NOTHING, so concurrent writers resolve to the same row.
+
+Autocomplete is answered from an in-process `VendorIndex` per database. It is
+loaded once and then refreshed incrementally from `vendors.updated_at`: at once
+after this process changed a vendor, otherwise at most every
+VENDOR_INDEX_REFRESH_SECONDS for changes made by other workers. Each refresh
+re-reads the last VENDOR_INDEX_REFRESH_OVERLAP_SECONDS before the newest row it
+has seen, so rows committed out of timestamp order are not skipped.
+"""
+import bisect
+import os
+import re
+import threading
+import time
+import unicodedata
+from datetime import timedelta
+from typing import Iterable
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database.models import ProcurementRequest, Vendor
+from database.process_caches import cache_for
+
+VENDOR_INDEX_REFRESH_SECONDS = float(os.getenv("VENDOR_INDEX_REFRESH_SECONDS", "5"))
+# How far before the watermark a refresh re-reads: a transaction may commit a
+# row whose `updated_at` is older than rows another worker committed earlier.
+VENDOR_INDEX_REFRESH_OVERLAP_SECONDS = float(os.getenv("VENDOR_INDEX_REFRESH_OVERLAP_SECONDS", "60"))
+
+_TRANSLITERATIONS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "æ": "ae", "ø": "oe", "œ": "oe"})
+
+
+def normalize_name(name: str | None) -> str:
+    folded = unicodedata.normalize("NFC", name or "").casefold().translate(_TRANSLITERATIONS)
+    stripped = "".join(c for c in unicodedata.normalize("NFKD", folded) if not unicodedata.combining(c))
+    return " ".join(re.findall(r"[^\W_]+", stripped))
+
+
+def normalize_vat_id(vat_id: str | None) -> str | None:
+    return re.sub(r"[\W_]", "", vat_id or "").upper() or None
+
+
+def _dialect(db) -> str:
+    return db.get_bind().dialect.name if hasattr(db, "get_bind") else db.dialect.name
+
+
+def _bind(db):
+    return db.get_bind() if hasattr(db, "get_bind") else db.engine
+
+
+def find_vendor_id(db, name: str | None, vat_id: str | None) -> int | None:
+    """The vendor `name` and `vat_id` resolve to, or None if there is none yet."""
+    vat = normalize_vat_id(vat_id)
+    if vat:
+        vendor_id = db.scalar(select(Vendor.id).where(Vendor.vat_id == vat))
+        if vendor_id is not None:
+            return vendor_id
+    normalized = normalize_name(name)
+    if not normalized:
+        return None
+    statement = select(Vendor.id).where(Vendor.normalized_name == normalized)
+    if vat:
+        # A vendor with another VAT ID is another vendor, whatever its name.
+        statement = statement.where(Vendor.vat_id.is_(None))
+    return db.scalar(statement.order_by(Vendor.vat_id.is_not(None), Vendor.id).limit(1))
+
+
+# Keeps IN lists and executemany batches well below SQLite's bound-parameter limit.
+RESOLVE_BATCH_SIZE = 1000
+
+
+def _chunks(values: list, size: int = RESOLVE_BATCH_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _load_candidates(db, vats: set[str], names: set[str]) -> list[dict]:
+    """Existing vendors whose VAT ID or folded name is among `vats` or `names`."""
+    columns = (Vendor.id, Vendor.normalized_name, Vendor.vat_id)
+    rows = {}
+    for column, values in ((Vendor.vat_id, vats), (Vendor.normalized_name, names)):
+        for chunk in _chunks(sorted(values)):
+            for row in db.execute(select(*columns).where(column.in_(chunk))):
+                rows[row.id] = row
+    return [{"id": row.id, "normalized_name": row.normalized_name, "vat_id": row.vat_id} for row in rows.values()]
+
+
+class _Resolution:
+    """The vendors of one batch, existing and planned, with the lookup rules of `find_vendor_id`."""
+
+    def __init__(self, candidates: list[dict]):
+        self.by_vat: dict[str, dict] = {}
+        self.by_name: dict[str, list[dict]] = {}
+        for vendor in candidates:
+            self.add(vendor)
+
+    def add(self, vendor: dict) -> None:
+        if vendor["vat_id"]:
+            self.by_vat[vendor["vat_id"]] = vendor
+        if vendor["normalized_name"]:
+            self.by_name.setdefault(vendor["normalized_name"], []).append(vendor)
+
+    def find(self, normalized: str, vat: str | None) -> dict | None:
+        if vat and vat in self.by_vat:
+            return self.by_vat[vat]
+        named = self.by_name.get(normalized, [])
+        if vat:
+            # A vendor with another VAT ID is another vendor, whatever its name.
+            named = [vendor for vendor in named if vendor["vat_id"] is None]
+        # Existing before planned, name-only first, then the oldest.
+        return min(
+            named, key=lambda v: (v["id"] is None, v["vat_id"] is not None, v["id"] or 0), default=None
+        )
+
+
+def resolve_vendors(db, pairs: Iterable[tuple[str, str]]) -> dict[tuple[str, str], int | None]:
+    """
+    The vendor id of each distinct (name, vat_id) pair, creating vendors as
+    needed; see `resolve_vendor`. The whole batch costs two lookups, one
+    INSERT ... ON CONFLICT DO NOTHING and one re-select, whatever its size.
+    """
+    keys = {}
+    for pair in pairs:
+        if pair not in keys:
+            keys[pair] = (normalize_name(pair[0]), normalize_vat_id(pair[1]))
+    resolution = _Resolution(_load_candidates(
+        db, {vat for _, vat in keys.values() if vat}, {name for name, _ in keys.values() if name}
+    ))
+
+    vendors, adopted, planned = {}, [], []
+    for (name, vat_id), (normalized, vat) in keys.items():
+        vendor = resolution.find(normalized, vat)
+        if vendor is None and (normalized or vat):
+            vendor = {"id": None, "name": (name or "").strip() or vat, "normalized_name": normalized, "vat_id": vat}
+            resolution.add(vendor)
+            planned.append(vendor)
+        elif vendor is not None and vat and vendor["vat_id"] is None:
+            # A vendor known only by name adopts the VAT ID it is first seen with.
+            vendor["vat_id"] = vat
+            resolution.by_vat[vat] = vendor
+            if vendor["id"] is not None:
+                adopted.append(vendor)
+        vendors[name, vat_id] = vendor
+
+    for vendor in adopted:
+        db.execute(
+            update(Vendor).where(Vendor.id == vendor["id"], Vendor.vat_id.is_(None)).values(vat_id=vendor["vat_id"])
+        )
+    if planned:
+        insert = postgresql.insert if _dialect(db) == "postgresql" else sqlite.insert
+        # Without a conflict target, so a row losing a race on either unique identity is skipped.
+        for chunk in _chunks(planned):
+            db.execute(
+                insert(Vendor).on_conflict_do_nothing(),
+                [{"name": v["name"], "normalized_name": v["normalized_name"], "vat_id": v["vat_id"]} for v in chunk],
+            )
+        # Our rows or the ones concurrent writers inserted first.
+        inserted = _Resolution(_load_candidates(
+            db, {v["vat_id"] for v in planned if v["vat_id"]}, {v["normalized_name"] for v in planned if v["normalized_name"]}
+        ))
+        for vendor in planned:
+            found = inserted.find(vendor["normalized_name"], vendor["vat_id"])
+            vendor["id"] = found["id"] if found else find_vendor_id(db, vendor["name"], vendor["vat_id"])
+    if adopted or planned:
+        mark_changed(db)
+    return {pair: vendor["id"] if vendor else None for pair, vendor in vendors.items()}
+
+
+def resolve_vendor(db, name: str | None, vat_id: str | None) -> int | None:
+    """
+    The id of the vendor for `name` and `vat_id`, created if needed. A vendor
+    known only by name adopts the VAT ID it is first seen with. `db` is a
+    Session or Connection and the caller commits.
+    """
+    return resolve_vendors(db, [(name, vat_id)])[name, vat_id]
+
+
+class VendorIndex:
+    """
+    Prefix search over vendor names, name words and VAT IDs.
+
+    The keys are kept in sorted arrays, which act as a flat trie: all keys
+    below a prefix form one contiguous run, found with two bisections. Unlike a
+    node-per-character trie this stays a few megabytes for tens of thousands of
+    vendors, and an insert or removal is a memmove of the array.
+    """
+
+    def __init__(self):
+        self._names: list[tuple[str, int]] = []  # Full folded names and VAT IDs
+        self._words: list[tuple[str, int]] = []  # Later words of the name, e.g. "mueller" in "hans mueller kg"
+        self._vendors: dict[int, dict] = {}
+        self._keys: dict[int, tuple[list, list]] = {}
+        self.watermark = None  # Latest `updated_at` loaded
+        self.refreshed_at = 0.0
+        self.stale = True
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._vendors)
+
+    def upsert(self, vendor_id: int, name: str, normalized_name: str, vat_id: str | None) -> None:
+        self.remove(vendor_id)
+        names = [normalized_name] + ([vat_id.lower()] if vat_id else [])
+        words = normalized_name.split(" ")
+        words = [" ".join(words[i:]) for i in range(1, len(words))]
+        for array, keys in ((self._names, names), (self._words, words)):
+            for key in keys:
+                bisect.insort(array, (key, vendor_id))
+        self._vendors[vendor_id] = {"id": vendor_id, "name": name, "vat_id": vat_id}
+        self._keys[vendor_id] = (names, words)
+
+    def remove(self, vendor_id: int) -> None:
+        keys = self._keys.pop(vendor_id, None)
+        if keys is None:
+            return
+        for array, array_keys in zip((self._names, self._words), keys):
+            for key in array_keys:
+                position = bisect.bisect_left(array, (key, vendor_id))
+                if position < len(array) and array[position] == (key, vendor_id):
+                    del array[position]
+        del self._vendors[vendor_id]
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """Vendors whose name, a word of it, or VAT ID starts with `query`; full-name matches first."""
+        prefix = normalize_name(query)
+        found: dict[int, dict] = {}
+        if not prefix:
+            return []
+        with self.lock:
+            for array in (self._names, self._words):
+                position = bisect.bisect_left(array, (prefix,))
+                while position < len(array) and len(found) < limit:
+                    key, vendor_id = array[position]
+                    if not key.startswith(prefix):
+                        break
+                    found.setdefault(vendor_id, self._vendors[vendor_id])
+                    position += 1
+        return list(found.values())
+
+    def refresh(self, db) -> None:
+        """Load vendors changed since the last refresh."""
+        with self.lock:
+            statement = select(Vendor.id, Vendor.name, Vendor.normalized_name, Vendor.vat_id, Vendor.updated_at)
+            if self.watermark is not None:
+                # Rows in the overlap are re-read, which is harmless, so that a row
+                # committed late with an older timestamp is still picked up.
+                overlap = timedelta(seconds=VENDOR_INDEX_REFRESH_OVERLAP_SECONDS)
+                statement = statement.where(Vendor.updated_at >= self.watermark - overlap)
+            for row in db.execute(statement.order_by(Vendor.updated_at)):
+                self.upsert(row.id, row.name, row.normalized_name, row.vat_id)
+                self.watermark = max(self.watermark or row.updated_at, row.updated_at)
+            self.refreshed_at = time.monotonic()
+            self.stale = False
+
+
+def _index_for(db) -> VendorIndex:
+    # Per database, so writes through the DB_ASYNC engine reach the index read through `database.engine`.
+    return cache_for(_bind(db), "vendors", VendorIndex)
+
+
+def mark_changed(db) -> None:
+    """Have this process's index pick up vendor changes on its next use."""
+    _index_for(db).stale = True
+
+
+def get_vendor_index(db) -> VendorIndex:
+    """The vendor index of `db`'s database, refreshed if it may be out of date."""
+    index = _index_for(db)
+    if index.stale or time.monotonic() - index.refreshed_at >= VENDOR_INDEX_REFRESH_SECONDS:
+        index.refresh(db)
+    return index
+
+
+def backfill(conn) -> int:
+    """Resolve the vendor of every request that has none. Returns the number of requests updated."""
+    pairs = conn.execute(
+        select(ProcurementRequest.vendor_name, ProcurementRequest.vat_id)
+        .where(ProcurementRequest.vendor_id.is_(None))
+        .distinct()
+    ).all()
+    updated = 0
+    for (name, vat_id), vendor_id in resolve_vendors(conn, [tuple(pair) for pair in pairs]).items():
+        if vendor_id is None:
+            continue
+        result = conn.execute(
+            update(ProcurementRequest)
+            .where(
+                ProcurementRequest.vendor_id.is_(None),
+                ProcurementRequest.vendor_name == name,
+                ProcurementRequest.vat_id == vat_id,
+            )
+            # Keeps updated_at, which would otherwise be bumped by its onupdate.
+            .values(vendor_id=vendor_id, updated_at=ProcurementRequest.updated_at)
+        )
+        updated += result.rowcount
+    return updated
@@ -1,12 +1,21 @@
 import axios from 'axios';
 import type {
   ProcurementRequest,
+  ProcurementRequestSummary,
+  RequestEventData,
+  RequestEventType,
   CommodityGroup,
   CreateRequestPayload,
+  CreatedRequest,
+  DuplicateMatch,
   UpdateRequestPayload,
   PdfExtractionResult,
   ClassificationRequest,
   ClassificationResponse,
+  ExtractionRun,
+  Vendor,
+  Suggestion,
+  SuggestionField,
 } from '../types';
 
 const api = axios.create({
@@ -22,13 +31,55 @@ export async function getRequests(status?: string): Promise<ProcurementRequest[]
   return response.data;
 }
 
+export async function getRequestSummaries(
+  status?: string
+): Promise<{ requests: ProcurementRequestSummary[]; lastEventId: number }> {
+  const params = status ? { status } : {};
+  const response = await api.get<ProcurementRequestSummary[]>('/requests/summary', { params });
+  return {
+    requests: response.data,
+    lastEventId: Number(response.headers['x-last-event-id'] ?? 0),
+  };
+}
+
+const requestEventTypes: RequestEventType[] = ['created', 'updated', 'status_changed', 'deleted', 'reset'];
+
+// Follows the server's change feed; EventSource reconnects on its own and resumes
+// from the last event it received. Returns a function that closes the stream.
+export function subscribeToRequestEvents(
+  after: number,
+  onEvent: (type: RequestEventType, data: RequestEventData) => void
+): () => void {
+  const source = new EventSource(`${api.defaults.baseURL}/requests/events?after=${after}`);
+  for (const type of requestEventTypes) {
+    source.addEventListener(type, (event) => onEvent(type, JSON.parse((event as MessageEvent).data)));
+  }
+  return () => source.close();
+}
+
 export async function getRequest(id: number): Promise<ProcurementRequest> {
   const response = await api.get<ProcurementRequest>(`/requests/${id}`);
   return response.data;
 }
 
-export async function createRequest(data: CreateRequestPayload): Promise<ProcurementRequest> {
-  const response = await api.post<ProcurementRequest>('/requests', data);
+export async function createRequest(data: CreateRequestPayload): Promise<CreatedRequest> {
+  const response = await api.post<CreatedRequest>('/requests', data);
+  return response.data;
+}
+
+export async function autocompleteVendors(q: string, limit = 10): Promise<Vendor[]> {
+  const response = await api.get<Vendor[]>('/vendors/autocomplete', { params: { q, limit } });
+  return response.data;
+}
+
+// Values already used in `field` starting with `q`, most used first.
+export async function getSuggestions(field: SuggestionField, q: string, limit = 10): Promise<Suggestion[]> {
+  const response = await api.get<Suggestion[]>(`/suggestions/${field}`, { params: { q, limit } });
+  return response.data;
+}
+
+export async function getDuplicates(id: number): Promise<DuplicateMatch[]> {
+  const response = await api.get<DuplicateMatch[]>(`/requests/${id}/duplicates`);
   return response.data;
 }
 
@@ -67,18 +118,35 @@ export async function getCommodityGroups(): Promise<CommodityGroup[]> {
   return response.data;
 }
 
-export async function uploadPdf(requestId: number, file: File): Promise<void> {
+export async function uploadPdf(requestId: number, file: File, extract = false): Promise<void> {
   const formData = new FormData();
   formData.append('file', file);
   await api.post(`/requests/${requestId}/pdf`, formData, {
+    params: extract ? { extract: true } : {},
     headers: {
       'Content-Type': 'multipart/form-data',
     },
   });
 }
 
+// Extraction of the PDF already stored with the request, without uploading it again.
+export async function startExtraction(requestId: number): Promise<ExtractionRun> {
+  const response = await api.post<ExtractionRun>(`/requests/${requestId}/extractions`);
+  return response.data;
+}
+
+export async function getExtractionRuns(requestId: number): Promise<ExtractionRun[]> {
+  const response = await api.get<ExtractionRun[]>(`/requests/${requestId}/extractions`);
+  return response.data;
+}
+
 export async function deletePdf(requestId: number): Promise<void> {
   await api.delete(`/requests/${requestId}/pdf`);
 }
 
+// Preview images are addressed by the PDF's content hash and cached by the browser for good.
+export function pdfThumbnailUrl(sha256: string, page = 1): string {
+  return `${api.defaults.baseURL}/pdfs/${sha256}/thumbnails/${page}.jpg`;
+}
+
 export default api;
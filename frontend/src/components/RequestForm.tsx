@@ -9,8 +9,10 @@ import {
   classifyCommodity,
   uploadPdf,
   deletePdf,
+  autocompleteVendors,
+  getSuggestions,
 } from '../api/client';
-import type { OrderLine, CommodityGroup, PdfExtractionResult } from '../types';
+import type { OrderLine, CommodityGroup, PdfExtractionResult, Suggestion, SuggestionField, Vendor } from '../types';
 import OrderLineEditor from './OrderLineEditor';
 import PdfUploader from './PdfUploader';
 
@@ -28,6 +30,8 @@ export default function RequestForm({ editMode, requestId, onSuccess }: RequestF
   const [loadingData, setLoadingData] = useState(editMode);
   const [classifying, setClassifying] = useState(false);
   const [commodityGroups, setCommodityGroups] = useState<CommodityGroup[]>([]);
+  const [vendorSuggestions, setVendorSuggestions] = useState<Vendor[]>([]);
+  const [suggestions, setSuggestions] = useState<Partial<Record<SuggestionField, Suggestion[]>>>({});
   const [error, setError] = useState<string | null>(null);
   const [pdfFile, setPdfFile] = useState<File | null>(null);
   const [originalPdfFilename, setOriginalPdfFilename] = useState<string | null>(null);
@@ -99,13 +103,40 @@ export default function RequestForm({ editMode, requestId, onSuccess }: RequestF
     }));
   };
 
+  const handleSuggestedChange = (e: React.ChangeEvent<HTMLInputElement>) => {
+    handleChange(e);
+    const field = e.target.name as SuggestionField;
+    const { value } = e.target;
+    if (!value.trim()) {
+      setSuggestions((prev) => ({ ...prev, [field]: [] }));
+      return;
+    }
+    getSuggestions(field, value)
+      .then((result) => setSuggestions((prev) => ({ ...prev, [field]: result })))
+      .catch((err) => console.error('Suggestions failed:', err));
+  };
+
+  const handleVendorChange = (e: React.ChangeEvent<HTMLInputElement>) => {
+    const { value } = e.target;
+    // Picking a suggestion fills in the vendor's VAT ID as well.
+    const picked = vendorSuggestions.find((vendor) => vendor.name === value);
+    setFormData((prev) => ({ ...prev, vendor_name: value, vat_id: picked?.vat_id || prev.vat_id }));
+    if (!value.trim()) {
+      setVendorSuggestions([]);
+      return;
+    }
+    autocompleteVendors(value)
+      .then(setVendorSuggestions)
+      .catch((err) => console.error('Vendor autocomplete failed:', err));
+  };
+
   const handlePdfExtracted = async (data: PdfExtractionResult) => {
     setFormData((prev) => ({
       ...prev,
       requestor_name: data.requestor_name || prev.requestor_name,
       title: data.title || prev.title,
-      vendor_name: data.vendor_name || prev.vendor_name,
-      vat_id: data.vat_id || prev.vat_id,
+      vendor_name: data.vendor?.name || data.vendor_name || prev.vendor_name,
+      vat_id: data.vendor?.vat_id || data.vat_id || prev.vat_id,
       department: data.department || prev.department,
       currency: data.currency || prev.currency,
       stated_total_cost: data.stated_total_cost,
@@ -167,7 +198,8 @@ export default function RequestForm({ editMode, requestId, onSuccess }: RequestF
       };
 
       if (editMode && requestId) {
-        await updateRequest(requestId, payload);
+        // Keep line ids so the backend only writes the lines that changed
+        await updateRequest(requestId, { ...formData, order_lines: orderLines });
       } else {
         const response = await createRequest(payload);
         requestId = response.id;
@@ -226,11 +258,18 @@ export default function RequestForm({ editMode, requestId, onSuccess }: RequestF
                   type="text"
                   name="requestor_name"
                   value={formData.requestor_name}
-                  onChange={handleChange}
+                  onChange={handleSuggestedChange}
+                  list="requestor_name-suggestions"
+                  autoComplete="off"
                   required
                   className="w-full px-3 py-2 bg-gray-700 border border-gray-600 rounded-lg text-gray-100 focus:ring-2 focus:ring-blue-500 focus:border-transparent"
                   placeholder="Your name"
                 />
+                <datalist id="requestor_name-suggestions">
+                  {(suggestions.requestor_name ?? []).map((suggestion) => (
+                    <option key={suggestion.value} value={suggestion.value} />
+                  ))}
+                </datalist>
               </div>
               <div>
                 <label className="block text-sm text-gray-400 mb-1">Request Title *</label>
@@ -250,11 +289,20 @@ export default function RequestForm({ editMode, requestId, onSuccess }: RequestF
                   type="text"
                   name="vendor_name"
                   value={formData.vendor_name}
-                  onChange={handleChange}
+                  onChange={handleVendorChange}
+                  list="vendor-suggestions"
+                  autoComplete="off"
                   required
                   className="w-full px-3 py-2 bg-gray-700 border border-gray-600 rounded-lg text-gray-100 focus:ring-2 focus:ring-blue-500 focus:border-transparent"
                   placeholder="Supplier company name"
                 />
+                <datalist id="vendor-suggestions">
+                  {vendorSuggestions.map((vendor) => (
+                    <option key={vendor.id} value={vendor.name}>
+                      {vendor.vat_id ?? ''}
+                    </option>
+                  ))}
+                </datalist>
               </div>
               <div>
                 <label className="block text-sm text-gray-400 mb-1">VAT ID</label>
@@ -274,11 +322,18 @@ export default function RequestForm({ editMode, requestId, onSuccess }: RequestF
                   type="text"
                   name="department"
                   value={formData.department}
-                  onChange={handleChange}
+                  onChange={handleSuggestedChange}
+                  list="department-suggestions"
+                  autoComplete="off"
                   required
                   placeholder="Enter department"
                   className="w-full px-3 py-2 bg-gray-700 border border-gray-600 rounded-lg text-gray-100 focus:ring-2 focus:ring-blue-500 focus:border-transparent"
                 />
+                <datalist id="department-suggestions">
+                  {(suggestions.department ?? []).map((suggestion) => (
+                    <option key={suggestion.value} value={suggestion.value} />
+                  ))}
+                </datalist>
               </div>
               <div>
                 <label className="block text-sm text-gray-400 mb-1">Currency *</label>
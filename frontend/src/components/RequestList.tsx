@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { Link } from 'react-router-dom';
 import {
   ChevronDown,
@@ -9,8 +9,22 @@ import {
   Loader2,
   Search,
 } from 'lucide-react';
-import { getRequests, updateStatus, deleteRequest, getCommodityGroups } from '../api/client';
-import type { ProcurementRequest, CommodityGroup } from '../types';
+import {
+  getRequestSummaries,
+  getRequest,
+  updateStatus,
+  deleteRequest,
+  getCommodityGroups,
+  subscribeToRequestEvents,
+  pdfThumbnailUrl,
+} from '../api/client';
+import type {
+  ProcurementRequest,
+  ProcurementRequestSummary,
+  CommodityGroup,
+  RequestEventData,
+  RequestEventType,
+} from '../types';
 
 const statusColors = {
   Open: 'bg-yellow-600',
@@ -21,7 +35,13 @@ const statusColors = {
 const statusOptions = ['Open', 'In Progress', 'Closed'] as const;
 
 export default function RequestList() {
-  const [requests, setRequests] = useState<ProcurementRequest[]>([]);
+  const [requests, setRequests] = useState<ProcurementRequestSummary[]>([]);
+  // Order lines and status history are only fetched once a row is expanded.
+  const [details, setDetails] = useState<Record<number, ProcurementRequest>>({});
+  const detailsRef = useRef(details);
+  detailsRef.current = details;
+  // Change feed position matching the loaded list, see subscribeToRequestEvents.
+  const [feedPosition, setFeedPosition] = useState<number | null>(null);
   const [commodityGroups, setCommodityGroups] = useState<CommodityGroup[]>([]);
   const [loading, setLoading] = useState(true);
   const [expandedId, setExpandedId] = useState<number | null>(null);
@@ -37,11 +57,13 @@ export default function RequestList() {
   const loadRequests = async () => {
     setLoading(true);
     try {
-      const [data, groups] = await Promise.all([
-        getRequests(statusFilter || undefined),
+      const [{ requests: data, lastEventId }, groups] = await Promise.all([
+        getRequestSummaries(statusFilter || undefined),
         getCommodityGroups(),
       ]);
       setRequests(data);
+      setDetails({});
+      setFeedPosition(lastEventId);
       setCommodityGroups(groups);
     } catch (err) {
       console.error('Failed to load requests:', err);
@@ -54,13 +76,70 @@ export default function RequestList() {
     loadRequests();
   }, [statusFilter]);
 
+  const applyEvent = (type: RequestEventType, data: RequestEventData) => {
+    if (type === 'reset') {
+      loadRequests();
+      return;
+    }
+    const id = data.request_id!;
+    const row = data.request ?? null;
+    const visible = type !== 'deleted' && row !== null && (!statusFilter || row.status === statusFilter);
+
+    setRequests((prev) => {
+      const existing = prev.find((r) => r.id === id);
+      if (!visible) return existing ? prev.filter((r) => r.id !== id) : prev;
+      if (existing && existing.version > row!.version) return prev;
+      if (existing) return prev.map((r) => (r.id === id ? row! : r));
+      return [row!, ...prev].sort((a, b) => b.created_at.localeCompare(a.created_at));
+    });
+
+    if (detailsRef.current[id]) {
+      if (visible) {
+        getRequest(id)
+          .then((detail) => setDetails((prev) => ({ ...prev, [id]: detail })))
+          .catch((err) => console.error('Failed to refresh request:', err));
+      } else {
+        setDetails((prev) => {
+          const { [id]: _removed, ...rest } = prev;
+          return rest;
+        });
+      }
+    }
+  };
+
+  useEffect(() => {
+    if (feedPosition === null) return;
+    return subscribeToRequestEvents(feedPosition, applyEvent);
+  }, [feedPosition, statusFilter]);
+
+  const toggleExpanded = async (id: number) => {
+    if (expandedId === id) {
+      setExpandedId(null);
+      return;
+    }
+    setExpandedId(id);
+    if (!details[id]) {
+      try {
+        const detail = await getRequest(id);
+        setDetails((prev) => ({ ...prev, [id]: detail }));
+      } catch (err) {
+        console.error('Failed to load request:', err);
+      }
+    }
+  };
+
   const handleStatusChange = async (id: number, newStatus: string) => {
     setUpdatingStatus(id);
     try {
       const updated = await updateStatus(id, newStatus);
       setRequests((prev) =>
-        prev.map((r) => (r.id === id ? updated : r))
+        prev.map((r) =>
+          r.id === id
+            ? { ...r, status: updated.status, updated_at: updated.updated_at, version: updated.version }
+            : r
+        )
       );
+      setDetails((prev) => ({ ...prev, [id]: updated }));
     } catch (err) {
       console.error('Failed to update status:', err);
     } finally {
@@ -137,9 +216,7 @@ export default function RequestList() {
             >
               <div
                 className="flex items-center justify-between p-4 cursor-pointer hover:bg-gray-750"
-                onClick={() =>
-                  setExpandedId(expandedId === request.id ? null : request.id)
-                }
+                onClick={() => toggleExpanded(request.id)}
               >
                 <div className="flex items-center gap-4 flex-1 min-w-0">
                   <span
@@ -149,6 +226,14 @@ export default function RequestList() {
                   >
                     {request.status}
                   </span>
+                  {request.pdf_sha256 && (
+                    <img
+                      src={pdfThumbnailUrl(request.pdf_sha256)}
+                      alt=""
+                      loading="lazy"
+                      className="h-12 w-9 object-cover object-top rounded border border-gray-700 bg-white flex-shrink-0"
+                    />
+                  )}
                   <div className="min-w-0">
                     <div className="flex items-center gap-2">
                       <h3 className="font-medium text-gray-100 truncate">
@@ -169,7 +254,7 @@ export default function RequestList() {
                       {request.calculated_total_cost.toFixed(2)} {request.currency}
                     </div>
                     <div className="text-xs text-gray-400">
-                      {request.order_lines.length} items
+                      {request.line_count} items
                     </div>
                   </div>
                   {expandedId === request.id ? (
@@ -221,11 +306,17 @@ export default function RequestList() {
                     </div>
                   </div>
 
-                  {request.status_history && request.status_history.length > 0 && (
+                  {!details[request.id] && (
+                    <div className="mb-4 flex justify-center">
+                      <Loader2 className="h-5 w-5 animate-spin text-blue-500" />
+                    </div>
+                  )}
+
+                  {(details[request.id]?.status_history.length ?? 0) > 0 && (
                     <div className="mb-4">
                       <span className="text-xs text-gray-400 block mb-2">Status History</span>
                       <div className="bg-gray-900 rounded-lg p-3 space-y-1 text-sm">
-                        {request.status_history.map((h, idx) => (
+                        {details[request.id].status_history.map((h, idx) => (
                           <div key={idx} className="text-gray-300">
                             {new Date(h.changed_at).toLocaleString()} — {h.from_status || 'Created'} → {h.to_status} (by {h.changed_by})
                           </div>
@@ -234,7 +325,7 @@ export default function RequestList() {
                     </div>
                   )}
 
-                  {request.order_lines.length > 0 && (
+                  {(details[request.id]?.order_lines.length ?? 0) > 0 && (
                     <div className="mb-4">
                       <span className="text-xs text-gray-400 block mb-2">Order Lines</span>
                       <div className="bg-gray-900 rounded-lg overflow-hidden">
@@ -248,7 +339,7 @@ export default function RequestList() {
                             </tr>
                           </thead>
                           <tbody>
-                            {request.order_lines.map((line, idx) => (
+                            {details[request.id].order_lines.map((line, idx) => (
                               <tr key={idx} className="border-t border-gray-800">
                                 <td className="px-3 py-2 text-gray-100">{line.description}</td>
                                 <td className="px-3 py-2 text-gray-100 text-right">
@@ -23,6 +23,7 @@ export interface ProcurementRequest {
   title: string;
   vendor_name: string;
   vat_id: string;
+  vendor_id: number | null;
   department: string;
   commodity_group_id: string;
   currency: string;
@@ -33,8 +34,38 @@ export interface ProcurementRequest {
   order_lines: OrderLine[];
   status_history: StatusHistory[];
   pdf_filename: string | null;
+  pdf_sha256: string | null;
   created_at: string;
   updated_at: string;
+  version: number;
+}
+
+export interface ProcurementRequestSummary {
+  id: number;
+  requestor_name: string;
+  title: string;
+  vendor_name: string;
+  vat_id: string;
+  department: string;
+  commodity_group_id: string;
+  currency: string;
+  status: 'Open' | 'In Progress' | 'Closed';
+  created_at: string;
+  updated_at: string;
+  version: number;
+  calculated_total_cost: number;
+  stated_total_cost: number | null;
+  has_total_mismatch: boolean;
+  line_count: number;
+  pdf_sha256: string | null;
+}
+
+export type RequestEventType = 'created' | 'updated' | 'status_changed' | 'deleted' | 'reset';
+
+export interface RequestEventData {
+  request_id?: number;
+  version?: number;
+  request?: ProcurementRequestSummary | null;
 }
 
 export interface CommodityGroup {
@@ -43,6 +74,29 @@ export interface CommodityGroup {
   name: string;
 }
 
+export type SuggestionField = 'requestor_name' | 'department' | 'unit';
+
+export interface Suggestion {
+  value: string;
+  count: number;
+}
+
+export interface Vendor {
+  id: number;
+  name: string;
+  vat_id: string | null;
+}
+
+// An existing request that is likely the same offer.
+export interface DuplicateMatch {
+  request_id: number;
+  title: string;
+  vendor_name: string;
+  requestor_name: string;
+  created_at: string;
+  similarity: number;
+}
+
 export interface PdfExtractionResult {
   vendor_name: string | null;
   vat_id: string | null;
@@ -52,6 +106,8 @@ export interface PdfExtractionResult {
   currency: string | null;
   stated_total_cost: number | null;
   order_lines: OrderLine[];
+  vendor: Vendor | null;
+  likely_duplicates: DuplicateMatch[];
 }
 
 export interface CreateRequestPayload {
@@ -66,7 +122,14 @@ export interface CreateRequestPayload {
   order_lines: Omit<OrderLine, 'id'>[];
 }
 
-export interface UpdateRequestPayload extends Partial<CreateRequestPayload> {}
+export interface CreatedRequest extends ProcurementRequest {
+  likely_duplicates: DuplicateMatch[];
+}
+
+export interface UpdateRequestPayload extends Partial<Omit<CreateRequestPayload, 'order_lines'>> {
+  // Lines with an id are updated in place, lines without one are added
+  order_lines?: OrderLine[];
+}
 
 export interface ClassificationRequest {
   title: string;
@@ -80,3 +143,23 @@ export interface ClassificationResponse {
   confidence: number;
   rationale: string;
 }
+
+export interface ExtractionRun {
+  id: number;
+  request_id: number;
+  pdf_sha256: string;
+  status: 'pending' | 'running' | 'succeeded' | 'failed';
+  use_vision: boolean;
+  model: string | null;
+  classification_model: string | null;
+  result: PdfExtractionResult | null;
+  classification: ClassificationResponse | null;
+  error: string | null;
+  prompt_tokens: number | null;
+  completion_tokens: number | null;
+  extraction_ms: number | null;
+  classification_ms: number | null;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
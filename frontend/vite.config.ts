@@ -1,7 +1,41 @@
-import { defineConfig } from 'vite'
+import { readdir, readFile, writeFile } from 'node:fs/promises'
+import { join, resolve } from 'node:path'
+import { brotliCompressSync, constants, gzipSync } from 'node:zlib'
+import { defineConfig, type Plugin } from 'vite'
 import react from '@vitejs/plugin-react'
 import tailwindcss from '@tailwindcss/vite'
 
+const COMPRESSIBLE = /\.(js|mjs|css|html|svg|json|txt|map)$/
+const MIN_SIZE = 1024
+
+// Writes .br and .gz files next to the built text files; the backend serves
+// them as-is instead of compressing on every request.
+function precompress(): Plugin {
+  let outDir = 'dist'
+  return {
+    name: 'precompress',
+    apply: 'build',
+    configResolved(config) {
+      outDir = resolve(config.root, config.build.outDir)
+    },
+    async closeBundle() {
+      const files = await readdir(outDir, { recursive: true })
+      for (const file of files.filter((name) => COMPRESSIBLE.test(name))) {
+        const path = join(outDir, file)
+        const data = await readFile(path)
+        if (data.length < MIN_SIZE) continue
+        const variants: [string, Buffer][] = [
+          ['.br', brotliCompressSync(data, { params: { [constants.BROTLI_PARAM_QUALITY]: 11 } })],
+          ['.gz', gzipSync(data, { level: 9 })],
+        ]
+        for (const [suffix, compressed] of variants) {
+          if (compressed.length < data.length) await writeFile(path + suffix, compressed)
+        }
+      }
+    },
+  }
+}
+
 export default defineConfig({
-  plugins: [react(), tailwindcss()],
+  plugins: [react(), tailwindcss(), precompress()],
 })
@@ -0,0 +1,103 @@
+import pytest
+from sqlalchemy import select
+
+from database import spend_summary
+from database.models import SpendSummary
+
+
+def summary_rows(db):
+    return {
+        (row.department, row.currency, row.status): (row.request_count, row.line_count, round(row.total_amount, 2))
+        for row in db.execute(select(SpendSummary)).scalars()
+    }
+
+
+@pytest.fixture
+def seeded(client, sample_request_data, sample_request_data_with_mismatch):
+    ids = [
+        client.post("/api/requests", json=sample_request_data).json()["id"],
+        client.post("/api/requests", json=sample_request_data).json()["id"],
+        client.post("/api/requests", json=sample_request_data_with_mismatch).json()["id"],
+        client.post("/api/requests", json={**sample_request_data, "currency": "USD"}).json()["id"],
+    ]
+    return ids
+
+
+class TestIncrementalSummary:
+    def test_create_update_status_delete_keep_summary_in_sync(self, client, test_db, seeded):
+        assert summary_rows(test_db) == {
+            ("IT", "EUR", "Open"): (2, 2, 2000.0),
+            ("IT", "USD", "Open"): (1, 1, 1000.0),
+            ("HR", "EUR", "Open"): (1, 2, 500.0),
+        }
+        assert spend_summary.find_drift(test_db.connection()) == []
+
+        client.put(f"/api/requests/{seeded[0]}", json={
+            "department": "Finance",
+            "order_lines": [{"description": "Desk", "unit_price": 300.0, "quantity": 2, "unit": "pcs"}],
+        })
+        client.patch(f"/api/requests/{seeded[2]}/status", json={"status": "Closed"})
+        client.delete(f"/api/requests/{seeded[1]}")
+
+        assert spend_summary.find_drift(test_db.connection()) == []
+        assert summary_rows(test_db) == {
+            ("Finance", "EUR", "Open"): (1, 1, 600.0),
+            ("HR", "EUR", "Closed"): (1, 2, 500.0),
+            ("IT", "USD", "Open"): (1, 1, 1000.0),
+        }
+
+    def test_bulk_import_updates_summary(self, client, test_db, sample_request_data):
+        client.post("/api/requests/bulk", json=[sample_request_data] * 3)
+        assert spend_summary.find_drift(test_db.connection()) == []
+        assert test_db.execute(select(SpendSummary.request_count)).scalar() == 3
+
+    def test_rebuild_repairs_drift(self, client, test_db, seeded):
+        test_db.execute(SpendSummary.__table__.update().values(total_amount=0.0))
+        assert spend_summary.find_drift(test_db.connection())
+
+        spend_summary.rebuild(test_db.connection())
+        assert spend_summary.find_drift(test_db.connection()) == []
+
+
+class TestSpendApi:
+    def test_spend_by_department(self, client, seeded):
+        response = client.get("/api/analytics/spend", params={"group_by": "department"})
+        assert response.status_code == 200
+        groups = {(g["department"], g["currency"]): g for g in response.json()}
+
+        assert groups[("IT", "EUR")]["request_count"] == 2
+        assert groups[("IT", "EUR")]["total_amount"] == 2000.0
+        assert groups[("IT", "USD")]["total_amount"] == 1000.0
+        assert groups[("HR", "EUR")]["line_count"] == 2
+        assert groups[("HR", "EUR")]["month"] is None
+
+    def test_spend_multiple_dimensions_and_filters(self, client, seeded):
+        response = client.get(
+            "/api/analytics/spend",
+            params={"group_by": ["commodity_group_id", "month"], "currency": "EUR"},
+        )
+        groups = response.json()
+        assert {g["commodity_group_id"] for g in groups} == {"031", "001"}
+        assert all(g["month"] for g in groups)
+        assert sum(g["total_amount"] for g in groups) == 2500.0
+
+    def test_invalid_dimension_rejected(self, client):
+        response = client.get("/api/analytics/spend", params={"group_by": "title"})
+        assert response.status_code == 422
+
+    def test_pivot(self, client, seeded):
+        response = client.get(
+            "/api/analytics/spend/pivot",
+            params={"rows": "department", "columns": "commodity_group_id", "value": "total_amount"},
+        )
+        assert response.status_code == 200
+        pivot = response.json()
+        assert pivot["row_labels"] == ["HR", "IT"]
+        assert pivot["column_labels"] == ["001", "031"]
+        assert pivot["values"] == [[500.0, 0.0], [0.0, 2000.0]]
+        assert pivot["grand_total"] == 2500.0
+
+    def test_pivot_empty(self, client):
+        pivot = client.get("/api/analytics/spend/pivot").json()
+        assert pivot["values"] == []
+        assert pivot["grand_total"] == 0.0
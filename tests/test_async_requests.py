@@ -0,0 +1,119 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.database import async_database_url, create_async_db_engine, get_async_db, get_db
+from database.models import Base
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def async_client(tmp_path):
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from backend.routers import requests_async, suggestions
+
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+    SyncTestingSession = sessionmaker(bind=sync_engine)
+
+    async_engine = create_async_db_engine(url)
+    AsyncTestingSession = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncTestingSession() as db:
+            yield db
+
+    def override_get_db():
+        with SyncTestingSession() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(requests_async.crud_router)
+    # Sync endpoints next to the async CRUD, as in the app with DB_ASYNC=true.
+    app.include_router(suggestions.router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as c:
+        yield c
+        c.portal.call(async_engine.dispose)
+    sync_engine.dispose()
+
+
+class TestAsyncDatabaseUrl:
+    @pytest.mark.parametrize(
+        "url, expected",
+        [
+            ("sqlite:///./procuro.db", "sqlite+aiosqlite:///./procuro.db"),
+            ("postgresql://u:p@db/procuro", "postgresql+asyncpg://u:p@db/procuro"),
+            ("postgresql+psycopg://u:p@db/procuro", "postgresql+asyncpg://u:p@db/procuro"),
+        ],
+    )
+    def test_driver_mapping(self, url, expected):
+        assert async_database_url(url) == expected
+
+    def test_unknown_dialect_rejected(self):
+        with pytest.raises(ValueError):
+            async_database_url("mysql://u:p@db/procuro")
+
+
+class TestAsyncCrud:
+    def test_full_lifecycle(self, async_client, sample_request_data):
+        response = async_client.post("/api/requests", json=sample_request_data)
+        assert response.status_code == 201
+        request_id = response.json()["id"]
+        assert response.json()["order_lines"][0]["description"] == "Laptop"
+        assert response.json()["status_history"][0]["to_status"] == "Open"
+
+        response = async_client.put(
+            f"/api/requests/{request_id}",
+            json={
+                "title": "Updated",
+                "order_lines": [{"description": "Monitor", "unit_price": 200.0, "quantity": 3, "unit": "pcs"}],
+            },
+        )
+        assert response.status_code == 200
+        assert response.json()["title"] == "Updated"
+        assert [line["description"] for line in response.json()["order_lines"]] == ["Monitor"]
+        assert response.json()["calculated_total_cost"] == 600.0
+
+        response = async_client.patch(
+            f"/api/requests/{request_id}/status", json={"status": "Closed", "changed_by": "admin"}
+        )
+        assert response.status_code == 200
+        assert [h["to_status"] for h in response.json()["status_history"]] == ["Open", "Closed"]
+
+        listed = async_client.get("/api/requests", params={"status": "Closed"}).json()
+        assert [r["id"] for r in listed] == [request_id]
+
+        assert async_client.delete(f"/api/requests/{request_id}").status_code == 204
+        assert async_client.get(f"/api/requests/{request_id}").status_code == 404
+
+    def test_not_found(self, async_client):
+        assert async_client.get("/api/requests/99999").status_code == 404
+        assert async_client.put("/api/requests/99999", json={"title": "x"}).status_code == 404
+        assert async_client.delete("/api/requests/99999").status_code == 404
+
+    def test_conditional_requests(self, async_client, sample_request_data):
+        created = async_client.post("/api/requests", json=sample_request_data)
+        request_id, etag = created.json()["id"], created.headers["etag"]
+
+        assert async_client.get(f"/api/requests/{request_id}", headers={"If-None-Match": etag}).status_code == 304
+        response = async_client.put(f"/api/requests/{request_id}", json={"title": "A"}, headers={"If-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        response = async_client.put(f"/api/requests/{request_id}", json={"title": "B"}, headers={"If-Match": etag})
+        assert response.status_code == 412
+
+
+class TestAsyncWritesReachSyncCaches:
+    def test_suggestions_follow_async_creates(self, async_client, sample_request_data):
+        async_client.post("/api/requests", json=sample_request_data)
+        assert async_client.get("/api/suggestions/department", params={"q": "zo"}).json() == []
+
+        async_client.post("/api/requests", json={**sample_request_data, "department": "Zoo Keeping"})
+        suggested = async_client.get("/api/suggestions/department", params={"q": "zo"}).json()
+        assert suggested == [{"value": "Zoo Keeping", "count": 1}]
@@ -0,0 +1,99 @@
+import json
+import time
+
+from backend.bulk_import import import_records, iter_json_records
+from database.models import ProcurementRequest, OrderLine, StatusHistory
+
+
+CSV_IMPORT = """ref,requestor_name,title,vendor_name,vat_id,department,commodity_group_id,currency,stated_total_cost,line_description,line_unit_price,line_quantity,line_unit,line_stated_total_price
+a,Max Mustermann,Laptops,Nimbus GmbH,DE111111111,IT,029,,1500,Laptop,500,2,pcs,1000
+a,Max Mustermann,Laptops,Nimbus GmbH,DE111111111,IT,029,,1500,Dock,250,2,pcs,
+b,Erika Muster,Chairs,Sitz AG,DE222222222,HR,015,EUR,,Chair,120,not-a-number,pcs,
+c,Erika Muster,Training,Akademie,DE333333333,HR,008,EUR,,,,,,
+"""
+
+
+class TestBulkCreate:
+    def test_json_array_with_row_errors(self, client, test_db, sample_request_data):
+        invalid = {**sample_request_data}
+        del invalid["title"]
+        payload = [sample_request_data, invalid, "not an object", sample_request_data]
+
+        response = client.post("/api/requests/bulk", json=payload)
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["created"] == 2
+        assert data["failed"] == 2
+        assert [error["row"] for error in data["errors"]] == [2, 3]
+        assert data["errors"][0]["errors"] == ["title: Field required"]
+
+        created = client.get(f"/api/requests/{data['created_ids'][0]}").json()
+        assert created["status"] == "Open"
+        assert created["order_lines"][0]["description"] == "Laptop"
+        assert created["status_history"][0]["to_status"] == "Open"
+
+    def test_empty_array(self, client):
+        response = client.post("/api/requests/bulk", json=[])
+        assert response.json() == {"created": 0, "failed": 0, "created_ids": [], "errors": []}
+
+    def test_chunks_are_committed_independently(self, test_db, sample_request_data):
+        records = iter_json_records([sample_request_data] * 5)
+        result = import_records(test_db, records, chunk_size=2)
+
+        assert result.created == 5
+        assert test_db.query(ProcurementRequest).count() == 5
+        assert test_db.query(OrderLine).count() == 5
+        assert test_db.query(StatusHistory).count() == 5
+
+
+class TestFileImport:
+    def test_csv_import_groups_lines_by_ref(self, client):
+        response = client.post(
+            "/api/requests/import",
+            files={"file": ("legacy.csv", CSV_IMPORT.encode(), "text/csv")},
+        )
+        assert response.status_code == 200
+        data = response.json()
+
+        assert data["created"] == 2
+        assert data["errors"] == [{"row": 4, "errors": ["order_lines.0.quantity: Input should be a valid number, unable to parse string as a number"]}]
+
+        laptops = client.get(f"/api/requests/{data['created_ids'][0]}").json()
+        assert laptops["currency"] == "EUR"
+        assert [line["description"] for line in laptops["order_lines"]] == ["Laptop", "Dock"]
+        assert laptops["calculated_total_cost"] == 1500.0
+
+        training = client.get(f"/api/requests/{data['created_ids'][1]}").json()
+        assert training["order_lines"] == []
+
+    def test_ndjson_import(self, client, sample_request_data):
+        body = "\n".join([json.dumps(sample_request_data), "{broken", "", json.dumps(sample_request_data)])
+        response = client.post(
+            "/api/requests/import",
+            files={"file": ("legacy.ndjson", body.encode(), "application/x-ndjson")},
+        )
+        data = response.json()
+
+        assert data["created"] == 2
+        assert data["errors"][0]["row"] == 2
+        assert data["errors"][0]["errors"][0].startswith("Invalid JSON")
+
+    def test_unsupported_file_rejected(self, client):
+        response = client.post(
+            "/api/requests/import",
+            files={"file": ("legacy.xlsx", b"PK", "application/octet-stream")},
+        )
+        assert response.status_code == 400
+
+
+class TestBulkThroughput:
+    def test_ten_thousand_requests(self, test_db, sample_request_data):
+        started = time.perf_counter()
+        result = import_records(test_db, iter_json_records([sample_request_data] * 10_000))
+        elapsed = time.perf_counter() - started
+
+        assert result.created == 10_000
+        assert test_db.query(OrderLine).count() == 10_000
+        # Per-request commit+refresh takes well over a minute for this volume.
+        assert elapsed < 15
@@ -0,0 +1,83 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from backend import crud
+from backend.schemas import StatusUpdateRequest
+from database import spend_summary
+from database.models import StatusHistory
+
+
+class TestBulkStatus:
+    def test_by_ids(self, client, test_db, sample_request_data):
+        ids = [client.post("/api/requests", json=sample_request_data).json()["id"] for _ in range(3)]
+        client.patch(f"/api/requests/{ids[2]}/status", json={"status": "Closed"})
+
+        response = client.post(
+            "/api/requests/bulk-status",
+            json={"ids": [*ids, 99999], "status": "Closed", "changed_by": "controller"},
+        )
+        assert response.status_code == 200
+        assert response.json() == {"changed": ids[:2], "unchanged": [ids[2]], "not_found": [99999]}
+
+        history = client.get(f"/api/requests/{ids[0]}").json()["status_history"]
+        assert [(h["from_status"], h["to_status"], h["changed_by"]) for h in history] == [
+            (None, "Open", "system"),
+            ("Open", "Closed", "controller"),
+        ]
+        assert client.get(f"/api/requests/{ids[1]}").json()["status"] == "Closed"
+        assert spend_summary.find_drift(test_db.connection()) == []
+
+    def test_by_filter(self, client, test_db, sample_request_data):
+        client.post("/api/requests", json=sample_request_data)
+        client.post("/api/requests", json={**sample_request_data, "department": "HR"})
+        client.post("/api/requests", json={**sample_request_data, "department": "HR"})
+
+        response = client.post(
+            "/api/requests/bulk-status",
+            json={"filter": {"department": "HR"}, "status": "In Progress"},
+        )
+        assert len(response.json()["changed"]) == 2
+        assert response.json()["not_found"] == []
+
+        statuses = {r["department"]: r["status"] for r in client.get("/api/requests").json()}
+        assert statuses == {"IT": "Open", "HR": "In Progress"}
+        assert test_db.execute(select(func.count(StatusHistory.id))).scalar() == 5
+
+    def test_repeat_is_idempotent(self, client, sample_request_data):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        body = {"ids": [request_id], "status": "Closed"}
+
+        assert client.post("/api/requests/bulk-status", json=body).json()["changed"] == [request_id]
+        assert client.post("/api/requests/bulk-status", json=body).json()["unchanged"] == [request_id]
+        assert len(client.get(f"/api/requests/{request_id}").json()["status_history"]) == 2
+
+    def test_request_changed_after_read_is_left_alone(self, client, test_db, sample_request_data, monkeypatch):
+        ids = [client.post("/api/requests", json=sample_request_data).json()["id"] for _ in range(2)]
+        tuple_ = crud.tuple_
+
+        def change_after_read(*columns):
+            # Another writer moves the first request between the read and the UPDATE.
+            monkeypatch.setattr(crud, "tuple_", tuple_)
+            with Session(bind=test_db.get_bind()) as other:
+                crud.update_status(other, crud.get_request(other, ids[0]), StatusUpdateRequest(status="In Progress"))
+            return tuple_(*columns)
+
+        monkeypatch.setattr(crud, "tuple_", change_after_read)
+        response = client.post("/api/requests/bulk-status", json={"ids": ids, "status": "Closed"})
+        assert response.json() == {"changed": [ids[1]], "unchanged": [ids[0]], "not_found": []}
+
+        history = client.get(f"/api/requests/{ids[0]}").json()["status_history"]
+        assert [(h["from_status"], h["to_status"]) for h in history] == [(None, "Open"), ("Open", "In Progress")]
+        assert spend_summary.find_drift(test_db.connection()) == []
+
+    def test_requires_exactly_one_selection(self, client):
+        assert client.post("/api/requests/bulk-status", json={"status": "Closed"}).status_code == 422
+        response = client.post(
+            "/api/requests/bulk-status",
+            json={"status": "Closed", "ids": [1], "filter": {"department": "IT"}},
+        )
+        assert response.status_code == 422
+
+    def test_invalid_status_rejected(self, client):
+        response = client.post("/api/requests/bulk-status", json={"status": "Archived", "ids": [1]})
+        assert response.status_code == 422
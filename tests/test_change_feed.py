@@ -0,0 +1,130 @@
+import json
+from datetime import datetime, timedelta, UTC
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from backend import change_feed
+from database import outbox
+from database.models import RequestEvent
+
+
+@pytest.fixture(autouse=True)
+def short_streams(monkeypatch):
+    monkeypatch.setattr(change_feed, "CHANGE_FEED_MAX_SECONDS", 0.2)
+    monkeypatch.setattr(change_feed, "CHANGE_FEED_POLL_INTERVAL", 0.02)
+
+
+def read_events(client, **kwargs) -> list[dict]:
+    response = client.get("/api/requests/events", **kwargs)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = []
+    for block in response.text.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            events.append({"id": int(fields["id"]), "event": fields["event"], "data": json.loads(fields["data"])})
+    return events
+
+
+class TestChangeFeed:
+    def test_replays_changes_in_order(self, client, sample_request_data):
+        first = client.post("/api/requests", json=sample_request_data).json()["id"]
+        second = client.post("/api/requests", json=sample_request_data).json()["id"]
+        client.put(f"/api/requests/{first}", json={"title": "Renamed"})
+        client.patch(f"/api/requests/{first}/status", json={"status": "Closed"})
+        client.delete(f"/api/requests/{second}")
+
+        events = read_events(client, params={"after": 0})
+        assert [(e["event"], e["data"]["request_id"], e["data"]["version"]) for e in events] == [
+            ("created", first, 1),
+            ("created", second, 1),
+            ("updated", first, 2),
+            ("status_changed", first, 3),
+            ("deleted", second, 1),
+        ]
+        assert [e["id"] for e in events] == sorted(e["id"] for e in events)
+        # Payloads carry the current overview row, so stale events still converge.
+        assert events[0]["data"]["request"]["title"] == "Renamed"
+        assert events[0]["data"]["request"]["status"] == "Closed"
+        assert events[1]["data"]["request"] is None
+
+    def test_resumes_after_last_event_id(self, client, sample_request_data):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        seen = read_events(client, params={"after": 0})[-1]["id"]
+        client.patch(f"/api/requests/{request_id}/status", json={"status": "In Progress"})
+
+        events = read_events(client, headers={"Last-Event-ID": str(seen)})
+        assert [e["event"] for e in events] == ["status_changed"]
+        assert events[0]["data"]["request"]["status"] == "In Progress"
+
+    def test_summary_reports_feed_position(self, client, sample_request_data):
+        client.post("/api/requests", json=sample_request_data)
+        position = int(client.get("/api/requests/summary").headers["x-last-event-id"])
+        client.post("/api/requests", json=sample_request_data)
+
+        events = read_events(client, params={"after": position})
+        assert [e["event"] for e in events] == ["created"]
+
+    def test_bulk_operations_publish_events(self, client, sample_request_data):
+        response = client.post("/api/requests/bulk", json=[sample_request_data, sample_request_data])
+        ids = response.json()["created_ids"]
+        client.post("/api/requests/bulk-status", json={"ids": ids, "status": "Closed"})
+
+        events = read_events(client, params={"after": 0})
+        assert [(e["event"], e["data"]["request_id"], e["data"]["version"]) for e in events] == [
+            ("created", ids[0], 1),
+            ("created", ids[1], 1),
+            ("status_changed", ids[0], 2),
+            ("status_changed", ids[1], 2),
+        ]
+
+    def test_new_stream_starts_at_head(self, client, sample_request_data):
+        client.post("/api/requests", json=sample_request_data)
+        assert read_events(client) == []
+
+    def test_reset_after_pruned_events(self, client, test_db, sample_request_data):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        for title in ("A", "B", "C"):
+            client.put(f"/api/requests/{request_id}", json={"title": title})
+
+        test_db.execute(update(RequestEvent).values(created_at=datetime.now(UTC) - timedelta(days=30)))
+        test_db.commit()
+        assert outbox.prune(test_db, timedelta(days=7)) == 3
+        test_db.commit()
+
+        events = read_events(client, params={"after": 1})
+        assert [e["event"] for e in events] == ["reset"]
+        assert events[0]["id"] == outbox.latest_event_id(test_db)
+
+        assert read_events(client, params={"after": events[0]["id"]}) == []
+        assert [e["event"] for e in read_events(client, params={"after": 999})] == ["reset"]
+
+
+class TestEventOrdering:
+    class RecordingSession:
+        def __init__(self, dialect):
+            self.dialect = dialect
+            self.statements = []
+
+        def get_bind(self):
+            return SimpleNamespace(dialect=self.dialect)
+
+        def execute(self, statement, params=None):
+            self.statements.append(str(statement))
+
+    def test_postgres_writers_are_serialized(self):
+        db = self.RecordingSession(postgresql.dialect())
+        outbox.record(db, outbox.CREATED, [(1, 1)])
+        outbox.record_changed(db, outbox.STATUS_CHANGED, [1, 2])
+        locks = [s for s in db.statements if "pg_advisory_xact_lock" in s]
+        assert len(locks) == 2
+        assert db.statements.index(locks[0]) < db.statements.index(next(s for s in db.statements if "INSERT" in s))
+
+    def test_sqlite_writers_take_no_lock(self):
+        db = self.RecordingSession(sqlite.dialect())
+        outbox.record(db, outbox.CREATED, [(1, 1)])
+        assert not any("pg_advisory" in s for s in db.statements)
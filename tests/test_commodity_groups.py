@@ -0,0 +1,177 @@
+import json
+
+import pytest
+
+from backend import classification
+from database import commodity_groups
+from database.models import ClassificationCacheEntry
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    calls = []
+
+    def classify(title, order_lines, vendor_name="", department="", usage=None, commodity_list=None):
+        calls.append(commodity_list)
+        group_id = "029" if "laptop" in title.lower() else "004"
+        return {"commodity_group_id": group_id, "confidence": 0.8, "rationale": "fake"}
+
+    monkeypatch.setattr(classification, "classify_commodity_group", classify)
+    return calls
+
+
+class TestTaxonomy:
+    def test_seeded_and_indexed(self, test_db):
+        taxonomy = commodity_groups.get_taxonomy(test_db)
+        assert list(taxonomy.groups) == [g["id"] for g in commodity_groups.DEFAULT_COMMODITY_GROUPS]
+        assert commodity_groups.get_commodity_group_by_id("031", test_db)["name"] == "Software"
+        assert commodity_groups.get_commodity_group_display("999", test_db) == "Unknown"
+        assert "ID: 031, Category: Information Technology, Name: Software" in taxonomy.prompt_block
+        # Unchanged revision: the same object, prompt block included, is reused.
+        assert commodity_groups.get_taxonomy(test_db) is taxonomy
+
+    def test_list_with_etag(self, client):
+        response = client.get("/api/commodity-groups")
+        assert response.status_code == 200
+        assert {"id": "031", "category": "Information Technology", "name": "Software"} in response.json()
+        etag = response.headers["etag"]
+
+        assert client.get("/api/commodity-groups", headers={"If-None-Match": etag}).status_code == 304
+
+        client.post("/api/commodity-groups", json={"id": "099", "category": "Production", "name": "Tooling"})
+        changed = client.get("/api/commodity-groups", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert changed.json()[-1] == {"id": "099", "category": "Production", "name": "Tooling"}
+
+    def test_admin_crud(self, client, sample_request_data):
+        assert client.post(
+            "/api/commodity-groups", json={"id": "099", "category": "Production", "name": "Tooling"}
+        ).status_code == 201
+        assert client.post(
+            "/api/commodity-groups", json={"id": "099", "category": "Production", "name": "Again"}
+        ).status_code == 409
+        assert client.post("/api/commodity-groups", json={"id": "9x", "category": "A", "name": "B"}).status_code == 422
+
+        response = client.put("/api/commodity-groups/099", json={"category": "Production", "name": "Tools"})
+        assert response.json()["name"] == "Tools"
+        assert client.put("/api/commodity-groups/777", json={"category": "A", "name": "B"}).status_code == 404
+
+        assert client.delete("/api/commodity-groups/099").status_code == 204
+        assert "099" not in {g["id"] for g in client.get("/api/commodity-groups").json()}
+
+        client.post("/api/requests", json=sample_request_data)
+        assert client.delete(f"/api/commodity-groups/{sample_request_data['commodity_group_id']}").status_code == 409
+
+
+class TestClassificationCache:
+    def test_repeated_input_is_cached(self, client, fake_llm):
+        first = client.post("/api/commodity-groups/classify", json={"description": "Laptop  bags"}).json()
+        second = client.post("/api/commodity-groups/classify", json={"description": "laptop bags"}).json()
+
+        assert first["commodity_group_id"] == second["commodity_group_id"] == "029"
+        assert (first["cached"], second["cached"]) == (False, True)
+        assert len(fake_llm) == 1
+        assert "ID: 029" in fake_llm[0]
+
+    def test_failed_classification_is_not_cached(self, client, monkeypatch):
+        replies = [
+            {"commodity_group_id": "009", "confidence": 0.0, "rationale": "Classification failed"},
+            {"commodity_group_id": "029", "confidence": 0.9, "rationale": "recovered"},
+        ]
+        monkeypatch.setattr(classification, "classify_commodity_group", lambda **kwargs: replies.pop(0))
+
+        failed = client.post("/api/commodity-groups/classify", json={"description": "Laptop"}).json()
+        assert (failed["rationale"], failed["cached"]) == ("Classification failed", False)
+        recovered = client.post("/api/commodity-groups/classify", json={"description": "Laptop"}).json()
+        assert (recovered["commodity_group_id"], recovered["cached"]) == ("029", False)
+        assert client.post("/api/commodity-groups/classify", json={"description": "Laptop"}).json()["cached"]
+
+    def test_taxonomy_change_only_drops_affected_entries(self, client, test_db, fake_llm):
+        client.post("/api/commodity-groups/classify", json={"description": "Laptop"})
+        client.post("/api/commodity-groups/classify", json={"description": "Advisory"})
+
+        client.put("/api/commodity-groups/029", json={"category": "Information Technology", "name": "Devices"})
+        client.post("/api/commodity-groups", json={"id": "099", "category": "Production", "name": "Tooling"})
+        test_db.expire_all()
+        assert [e.commodity_group_id for e in test_db.query(ClassificationCacheEntry)] == ["004"]
+
+        assert client.post("/api/commodity-groups/classify", json={"description": "Advisory"}).json()["cached"]
+        assert not client.post("/api/commodity-groups/classify", json={"description": "Laptop"}).json()["cached"]
+        assert "Name: Devices" in fake_llm[-1] and "ID: 099" in fake_llm[-1]
+
+
+class TestBatchClassification:
+    @pytest.fixture
+    def fake_batch_llm(self, monkeypatch):
+        calls = []
+
+        def classify_batch(items, commodity_list, usage=None):
+            calls.append([item["title"] for item in items])
+            # Leaves out "Mystery" so it is retried on its own.
+            return {
+                item["id"]: {"id": item["id"], "commodity_group_id": "029", "confidence": 0.7, "rationale": "batch"}
+                for item in items
+                if item["title"] != "Mystery"
+            }
+
+        monkeypatch.setattr(classification, "classify_commodity_groups_batch", classify_batch)
+        return calls
+
+    def read(self, client, items) -> dict[str, dict]:
+        response = client.post("/api/commodity-groups/classify-batch", json={"items": items})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == len(items)
+        return {line["id"]: line for line in lines}
+
+    def test_packs_uncached_items(self, client, fake_llm, fake_batch_llm, monkeypatch):
+        monkeypatch.setattr(classification, "CLASSIFY_BATCH_SIZE", 10)
+        client.post("/api/commodity-groups/classify", json={"description": "Advisory"})
+
+        items = [{"id": f"r{n}", "title": f"Item {n}"} for n in range(25)]
+        items += [
+            {"id": "dup", "title": "item  0"},
+            {"id": "cached", "title": "advisory"},
+            {"id": "odd", "title": "Mystery"},
+        ]
+        results = self.read(client, items)
+
+        assert results["cached"] == {
+            "id": "cached", "commodity_group_id": "004", "confidence": 0.8, "rationale": "fake", "cached": True,
+        }
+        assert results["r7"]["commodity_group_id"] == "029" and not results["r7"]["cached"]
+        assert results["dup"]["commodity_group_id"] == results["r0"]["commodity_group_id"]
+        assert results["odd"]["commodity_group_id"] == "004"
+        # 26 distinct uncached inputs in chunks of 10, plus one single retry (and the warm-up call).
+        assert sorted(len(call) for call in fake_batch_llm) == [6, 10, 10]
+        assert len(fake_llm) == 2
+
+        again = self.read(client, items)
+        assert all(result["cached"] for result in again.values())
+        assert len(fake_batch_llm) == 3
+
+    def test_failed_retry_is_not_cached(self, client, fake_batch_llm, monkeypatch):
+        def classify(**kwargs):
+            return {"commodity_group_id": "009", "confidence": 0.0, "rationale": "Classification failed"}
+
+        monkeypatch.setattr(classification, "classify_commodity_group", classify)
+        items = [{"id": "a", "title": "Laptop"}, {"id": "odd", "title": "Mystery"}]
+        assert self.read(client, items)["odd"]["rationale"] == "Classification failed"
+
+        again = self.read(client, items)
+        assert again["a"]["cached"] and not again["odd"]["cached"]
+        assert fake_batch_llm == [["Laptop", "Mystery"], ["Mystery"]]
+
+    def test_failed_call_reports_errors(self, client, monkeypatch):
+        def fail(items, commodity_list, usage=None):
+            raise RuntimeError("timeout")
+
+        monkeypatch.setattr(classification, "classify_commodity_groups_batch", fail)
+        results = self.read(client, [{"id": "a", "title": "One"}, {"id": "b", "title": "Two"}])
+        assert results["a"] == {"id": "a", "error": "Classification failed: timeout"}
+
+    def test_rejects_duplicate_ids(self, client):
+        items = [{"id": "a", "title": "One"}, {"id": "a", "title": "Two"}]
+        assert client.post("/api/commodity-groups/classify-batch", json={"items": items}).status_code == 422
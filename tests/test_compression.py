@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from backend import compression
+
+
+class TestNegotiation:
+    @pytest.mark.parametrize(
+        "header, expected",
+        [
+            ("gzip, deflate", "gzip"),
+            ("deflate", None),
+            ("", None),
+            ("gzip;q=0", None),
+            ("*", "br" if compression.brotli else "gzip"),
+            ("br;q=0.5, gzip;q=0.8", "gzip"),
+            ("identity", None),
+        ],
+    )
+    def test_accept_encoding(self, header, expected):
+        assert compression.negotiate_encoding(header) == expected
+
+
+class TestCompressionMiddleware:
+    def test_large_list_gzipped(self, client, sample_request_data):
+        for _ in range(20):
+            client.post("/api/requests", json=sample_request_data)
+
+        response = client.get("/api/requests", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) < len(response.content)
+        assert len(response.json()) == 20
+
+        etag = response.headers["etag"]
+        assert etag.startswith("W/")
+        assert client.get("/api/requests", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_identity_when_not_accepted(self, client, sample_request_data):
+        for _ in range(20):
+            client.post("/api/requests", json=sample_request_data)
+
+        response = client.get("/api/requests", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert not response.headers["etag"].startswith("W/")
+
+    def test_small_response_not_compressed(self, client):
+        response = client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.json() == {"status": "ok"}
+
+    def test_streamed_export_compressed(self, client, sample_request_data):
+        for _ in range(50):
+            client.post("/api/requests", json=sample_request_data)
+
+        response = client.get("/api/requests/export", params={"format": "ndjson"}, headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert len([json.loads(line) for line in response.text.splitlines()]) == 50
+
+    def test_parquet_not_recompressed(self, client, sample_request_data):
+        client.post("/api/requests", json=sample_request_data)
+
+        response = client.get("/api/requests/export", params={"format": "parquet"}, headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+from backend.routers import extraction as extraction_router
+from database import duplicates
+from database.models import RequestLshBucket, RequestSignature
+
+OFFER_LINES = [
+    {"description": "ThinkPad T14 Gen 5", "unit_price": 1249.0, "quantity": 4, "unit": "pcs"},
+    {"description": "USB-C Dock", "unit_price": 189.9, "quantity": 4, "unit": "pcs"},
+    {"description": "Setup and imaging", "unit_price": 45.0, "quantity": 4, "unit": "h"},
+]
+
+
+@pytest.fixture
+def offer(sample_request_data):
+    return {**sample_request_data, "title": "Laptops for new hires", "order_lines": OFFER_LINES}
+
+
+def create(client, data):
+    response = client.post("/api/requests", json=data)
+    assert response.status_code == 201
+    return response.json()
+
+
+class TestMinHash:
+    def test_estimates_jaccard(self):
+        rng = random.Random(7)
+        universe = [f"word:{n}" for n in range(400)]
+        left = set(rng.sample(universe, 200))
+        right = set(rng.sample(sorted(left), 150)) | set(rng.sample(universe, 50))
+        jaccard = len(left & right) / len(left | right)
+
+        estimate = duplicates.similarity(duplicates.signature(left), duplicates.signature(right))
+        assert abs(estimate - jaccard) < 0.2
+        assert duplicates.signature(set()) is None
+
+    def test_features_are_normalized(self):
+        lines = [("USB-C  Dock", 189.9)]
+        assert duplicates.offer_features("Bürobedarf GmbH", "de 123 456 789", lines) == duplicates.offer_features(
+            "BÜROBEDARF gmbh", "DE123456789", [("usb c dock", "189.90")]
+        )
+
+
+class TestDuplicateDetection:
+    def test_create_returns_likely_duplicates(self, client, offer):
+        first = create(client, offer)
+        assert first["likely_duplicates"] == []
+
+        second = create(client, {**offer, "requestor_name": "Erika Musterfrau", "title": "New hire laptops"})
+        [match] = second["likely_duplicates"]
+        assert match["request_id"] == first["id"]
+        assert match["requestor_name"] == "Max Mustermann"
+        assert match["similarity"] == 1.0
+
+        unrelated = create(client, {
+            **offer, "vendor_name": "Papier AG", "vat_id": "DE999999999",
+            "order_lines": [{"description": "A4 paper", "unit_price": 4.5, "quantity": 100, "unit": "pack"}],
+        })
+        assert unrelated["likely_duplicates"] == []
+        assert client.get(f"/api/requests/{first['id']}/duplicates").json()[0]["request_id"] == second["id"]
+
+    def test_index_follows_updates_and_deletes(self, client, test_db, offer):
+        first = create(client, offer)
+        second = create(client, offer)
+
+        lines = [{"description": "Office chair", "unit_price": 320.0, "quantity": 2, "unit": "pcs"}]
+        client.put(f"/api/requests/{first['id']}", json={"order_lines": lines})
+        assert client.get(f"/api/requests/{second['id']}/duplicates").json() == []
+
+        client.put(f"/api/requests/{first['id']}", json={"order_lines": OFFER_LINES})
+        assert [m["request_id"] for m in client.get(f"/api/requests/{second['id']}/duplicates").json()] == [first["id"]]
+
+        client.delete(f"/api/requests/{first['id']}")
+        assert client.get(f"/api/requests/{second['id']}/duplicates").json() == []
+        assert test_db.query(RequestSignature).count() == 1
+        assert test_db.query(RequestLshBucket).count() == duplicates.BANDS
+        assert client.get(f"/api/requests/{first['id']}/duplicates").status_code == 404
+
+    def test_bulk_created_requests_are_indexed(self, client, offer):
+        response = client.post("/api/requests/bulk", json=[offer, offer])
+        assert response.status_code == 200
+        assert create(client, offer)["likely_duplicates"][0]["similarity"] == 1.0
+
+    def test_extraction_response(self, client, offer, monkeypatch):
+        existing = create(client, offer)
+        monkeypatch.setattr(extraction_router, "extract_offer_data_from_pdf", lambda file_bytes: {
+            "vendor_name": "Buerobedarf GmbH", "vat_id": "DE123456789", "title": "Laptops", "order_lines": OFFER_LINES,
+        })
+
+        response = client.post("/api/extraction/pdf", files={"file": ("offer.pdf", b"%PDF-1.4", "application/pdf")})
+        [match] = response.json()["likely_duplicates"]
+        assert match["request_id"] == existing["id"]
+        assert 0.6 <= match["similarity"] < 1.0
+
+    def test_rebuild(self, test_db, client, offer):
+        first = create(client, offer)
+        second = create(client, offer)
+        test_db.query(RequestLshBucket).delete()
+        test_db.query(RequestSignature).delete()
+
+        assert duplicates.rebuild(test_db.connection()) == 2
+        assert [m["request_id"] for m in duplicates.duplicates_of(test_db, second["id"])] == [first["id"]]
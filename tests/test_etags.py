@@ -0,0 +1,160 @@
+from backend import etags
+
+
+def _etag(client, request_id):
+    return client.get(f"/api/requests/{request_id}").headers["etag"]
+
+
+class TestConditionalGet:
+    def test_detail_not_modified(self, client, sample_request_data):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+
+        response = client.get(f"/api/requests/{request_id}")
+        assert response.status_code == 200
+        assert response.json()["version"] == 1
+        etag = response.headers["etag"]
+
+        response = client.get(f"/api/requests/{request_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+
+        weak = client.get(f"/api/requests/{request_id}", headers={"If-None-Match": f"W/{etag}"})
+        assert weak.status_code == 304
+
+    def test_writes_change_etag(self, client, sample_request_data):
+        created = client.post("/api/requests", json=sample_request_data)
+        request_id = created.json()["id"]
+        seen = {created.headers["etag"]}
+        assert _etag(client, request_id) in seen
+
+        client.put(f"/api/requests/{request_id}", json={"title": "Renamed"})
+        seen.add(_etag(client, request_id))
+        client.patch(f"/api/requests/{request_id}/status", json={"status": "In Progress"})
+        seen.add(_etag(client, request_id))
+        line_id = client.get(f"/api/requests/{request_id}").json()["order_lines"][0]["id"]
+        client.patch(f"/api/requests/{request_id}/order-lines/{line_id}", json={"quantity": 5})
+        seen.add(_etag(client, request_id))
+
+        assert len(seen) == 4
+        assert client.get(f"/api/requests/{request_id}").json()["version"] == 4
+
+    def test_list_not_modified_until_change(self, client, sample_request_data):
+        first = client.post("/api/requests", json=sample_request_data).json()["id"]
+        second = client.post("/api/requests", json=sample_request_data).json()["id"]
+
+        response = client.get("/api/requests")
+        etag = response.headers["etag"]
+        assert [r["id"] for r in response.json()] == [second, first]
+        assert client.get("/api/requests", headers={"If-None-Match": etag}).status_code == 304
+
+        client.patch(f"/api/requests/{first}/status", json={"status": "Closed"})
+        response = client.get("/api/requests", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert {r["id"]: r["status"] for r in response.json()} == {first: "Closed", second: "Open"}
+
+        etag = response.headers["etag"]
+        client.delete(f"/api/requests/{second}")
+        response = client.get("/api/requests", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert [r["id"] for r in response.json()] == [first]
+
+    def test_reused_id_gets_new_etag(self, client, sample_request_data):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        etag = _etag(client, request_id)
+        client.delete(f"/api/requests/{request_id}")
+
+        recreated = client.post("/api/requests", json={**sample_request_data, "title": "Other"}).json()
+        assert recreated["id"] == request_id
+        response = client.get(f"/api/requests/{request_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["title"] == "Other"
+
+    def test_bulk_status_changes_etag(self, client, sample_request_data):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        etag = _etag(client, request_id)
+
+        client.post("/api/requests/bulk-status", json={"ids": [request_id], "status": "Closed"})
+        response = client.get(f"/api/requests/{request_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["status"] == "Closed"
+        assert response.json()["version"] == 2
+
+
+class TestIfMatch:
+    def test_stale_write_rejected(self, client, sample_request_data):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        etag = _etag(client, request_id)
+
+        response = client.put(f"/api/requests/{request_id}", json={"title": "Mine"}, headers={"If-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+        response = client.put(f"/api/requests/{request_id}", json={"title": "Theirs"}, headers={"If-Match": etag})
+        assert response.status_code == 412
+        response = client.patch(
+            f"/api/requests/{request_id}/status", json={"status": "Closed"}, headers={"If-Match": etag}
+        )
+        assert response.status_code == 412
+
+        current = client.get(f"/api/requests/{request_id}").json()
+        assert (current["title"], current["status"]) == ("Mine", "Open")
+
+    def test_wildcard_and_missing_header_allowed(self, client, sample_request_data):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        assert client.put(f"/api/requests/{request_id}", json={"title": "A"}, headers={"If-Match": "*"}).status_code == 200
+        assert client.put(f"/api/requests/{request_id}", json={"title": "B"}).status_code == 200
+
+
+class TestResponseCache:
+    def test_serialized_once_per_version(self, client, sample_request_data, monkeypatch):
+        etags.response_cache.clear()
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+
+        renders = []
+        original = etags._render
+        monkeypatch.setattr(etags, "_render", lambda schema, request: renders.append(schema) or original(schema, request))
+
+        first = client.get(f"/api/requests/{request_id}").content
+        assert client.get(f"/api/requests/{request_id}").content == first
+        client.get("/api/requests")
+        client.get("/api/requests")
+        assert len(renders) == 2
+
+        client.put(f"/api/requests/{request_id}", json={"title": "Changed"})
+        assert client.get(f"/api/requests/{request_id}").json()["title"] == "Changed"
+        assert len(renders) == 3
+
+    def test_lru_eviction(self):
+        cache = etags.LRUCache(2)
+        cache.put("a", b"1")
+        cache.put("b", b"2")
+        cache.get("a")
+        cache.put("c", b"3")
+        assert cache.get("b") is None
+        assert cache.get("a") == b"1" and len(cache) == 2
+
+
+class TestVersionMigration:
+    def test_existing_rows_start_at_version_one(self, tmp_path):
+        from sqlalchemy import create_engine, inspect, text
+
+        from database.migrations import run_migrations
+        from database.models import Base
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE procurement_requests DROP COLUMN version"))
+            conn.execute(text(
+                "INSERT INTO procurement_requests (requestor_name, title, vendor_name, vat_id, department, "
+                "commodity_group_id, currency, status, created_at, updated_at) "
+                "VALUES ('A', 'Legacy', 'V', 'DE1', 'IT', '031', 'EUR', 'Open', '2024-01-02 00:00:00', "
+                "'2024-01-02 00:00:00')"
+            ))
+
+        run_migrations(engine)
+        assert "version" in {c["name"] for c in inspect(engine).get_columns("procurement_requests")}
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT version FROM procurement_requests")).scalar_one() == 1
+        engine.dispose()
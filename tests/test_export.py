@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+
+import pytest
+
+from backend import export
+
+
+@pytest.fixture
+def seeded(client, sample_request_data, sample_request_data_with_mismatch):
+    client.post("/api/requests", json=sample_request_data)
+    client.post("/api/requests", json=sample_request_data_with_mismatch)
+    client.post("/api/requests", json={**sample_request_data, "department": "HR", "order_lines": []})
+
+
+class TestExport:
+    def test_csv_has_one_row_per_line(self, client, seeded):
+        response = client.get("/api/requests/export", params={"format": "csv"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="requests.csv"' in response.headers["content-disposition"]
+
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 4  # 1 + 2 lines, plus one request without lines
+        assert [row["line_description"] for row in rows] == ["Laptop", "Item 1", "Item 2", ""]
+        assert rows[0]["vendor_name"] == "Bürobedarf GmbH"
+
+    def test_ndjson_nests_order_lines(self, client, seeded):
+        response = client.get("/api/requests/export", params={"format": "ndjson"})
+        records = [json.loads(line) for line in response.text.splitlines()]
+
+        assert [len(record["order_lines"]) for record in records] == [1, 2, 0]
+        assert records[1]["order_lines"][1] == {
+            "id": records[1]["order_lines"][1]["id"],
+            "description": "Item 2",
+            "unit_price": 150.0,
+            "quantity": 2.0,
+            "unit": "pcs",
+            "stated_total_price": 350.0,
+        }
+
+    def test_parquet_written_in_row_groups(self, client, seeded, monkeypatch):
+        pq = pytest.importorskip("pyarrow.parquet")
+        monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+
+        response = client.get("/api/requests/export", params={"format": "parquet"})
+        assert response.status_code == 200
+
+        parquet = pq.ParquetFile(io.BytesIO(response.content))
+        assert parquet.metadata.num_rows == 4
+        assert parquet.metadata.num_row_groups == 2
+        table = parquet.read()
+        assert table.column("line_description").to_pylist() == ["Laptop", "Item 1", "Item 2", None]
+
+    def test_filters_apply(self, client, seeded):
+        response = client.get("/api/requests/export", params={"format": "ndjson", "department": "HR"})
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert {record["department"] for record in records} == {"HR"}
+        assert len(records) == 2
+
+    def test_ndjson_batches_split_inside_request(self, client, seeded, monkeypatch):
+        monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 1)
+        response = client.get("/api/requests/export", params={"format": "ndjson"})
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert [len(record["order_lines"]) for record in records] == [1, 2, 0]
+
+    def test_unknown_format_rejected(self, client):
+        response = client.get("/api/requests/export", params={"format": "xlsx"})
+        assert response.status_code == 422
+
+    def test_empty_export(self, client):
+        assert client.get("/api/requests/export", params={"format": "ndjson"}).text == ""
+        assert client.get("/api/requests/export").text.startswith("id,requestor_name")
@@ -0,0 +1,108 @@
+import pytest
+
+from backend import classification, extraction_runs
+from database.database import pdf_store
+
+PDF = b"%PDF-1.4 offer" + b"\0" * 2048
+
+
+class FakeResponse:
+    def __init__(self, model, prompt_tokens, completion_tokens):
+        self.model = model
+        self.usage = type("Usage", (), {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens})()
+
+
+@pytest.fixture(autouse=True)
+def blob_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_store, "root", tmp_path / "blobs")
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    from backend.extraction import record_usage
+
+    calls = []
+
+    def extract(file_bytes, use_vision=None, usage=None):
+        calls.append(("extract", file_bytes, use_vision))
+        record_usage(usage, FakeResponse("gpt-4o", 1200, 300))
+        return {"title": "Cloud Storage", "vendor_name": "Nimbus", "order_lines": [{"description": "Storage"}]}
+
+    def classify(title, order_lines, vendor_name="", department="", usage=None, commodity_list=None):
+        calls.append(("classify", title, vendor_name))
+        record_usage(usage, FakeResponse("gpt-5-mini", 400, 50), "classification_model")
+        return {"commodity_group_id": "031", "confidence": 0.9, "rationale": "Software"}
+
+    monkeypatch.setattr(extraction_runs, "extract_offer_data_from_pdf", extract)
+    monkeypatch.setattr(classification, "classify_commodity_group", classify)
+    return calls
+
+
+def upload(client, request_id, **params):
+    return client.post(
+        f"/api/requests/{request_id}/pdf",
+        params=params,
+        files={"file": ("offer.pdf", PDF, "application/pdf")},
+    )
+
+
+class TestExtractionRuns:
+    def test_upload_triggers_extraction(self, client, test_db, sample_request_data, fake_llm):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        run_id = upload(client, request_id, extract="true").json()["extraction_run_id"]
+
+        test_db.expire_all()
+        run = client.get(f"/api/requests/{request_id}/extractions/{run_id}").json()
+        assert run["status"] == "succeeded"
+        assert run["result"]["title"] == "Cloud Storage"
+        assert run["classification"]["commodity_group_id"] == "031"
+        assert (run["model"], run["classification_model"]) == ("gpt-4o", "gpt-5-mini")
+        assert (run["prompt_tokens"], run["completion_tokens"]) == (1600, 350)
+        assert run["extraction_ms"] is not None and run["classification_ms"] is not None
+        assert fake_llm[0][1] == PDF
+        assert fake_llm[1][1:] == ("Cloud Storage", "Nimbus")
+
+    def test_plain_upload_does_not_extract(self, client, sample_request_data, fake_llm):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        assert "extraction_run_id" not in upload(client, request_id).json()
+        assert client.get(f"/api/requests/{request_id}/extractions").json() == []
+        assert fake_llm == []
+
+    def test_rerun_without_upload(self, client, test_db, sample_request_data, fake_llm):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        assert client.post(f"/api/requests/{request_id}/extractions").status_code == 409
+        upload(client, request_id)
+
+        response = client.post(f"/api/requests/{request_id}/extractions", params={"use_vision": "false"})
+        assert response.status_code == 202
+        assert response.json()["status"] == "pending"
+        client.post(f"/api/requests/{request_id}/extractions")
+
+        test_db.expire_all()
+        runs = client.get(f"/api/requests/{request_id}/extractions").json()
+        assert [run["status"] for run in runs] == ["succeeded", "succeeded"]
+        assert runs[0]["id"] > runs[1]["id"]
+        assert [call[2] for call in fake_llm if call[0] == "extract"] == [False, True]
+
+    def test_failure_is_recorded(self, client, test_db, sample_request_data, monkeypatch):
+        def fail(*args, **kwargs):
+            raise RuntimeError("rate limited")
+
+        monkeypatch.setattr(extraction_runs, "extract_offer_data_from_pdf", fail)
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        run_id = upload(client, request_id, extract="true").json()["extraction_run_id"]
+
+        test_db.expire_all()
+        run = client.get(f"/api/requests/{request_id}/extractions/{run_id}").json()
+        assert run["status"] == "failed"
+        assert run["error"] == "rate limited"
+        assert run["finished_at"] is not None
+
+    def test_runs_are_deleted_with_request(self, client, test_db, sample_request_data, fake_llm):
+        from database.models import ExtractionRun
+
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        upload(client, request_id, extract="true")
+        assert client.delete(f"/api/requests/{request_id}").status_code == 204
+        assert test_db.query(ExtractionRun).count() == 0
+        assert client.get(f"/api/requests/{request_id}/extractions").status_code == 404
@@ -0,0 +1,119 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+
+@contextmanager
+def count_writes(db):
+    counts = {"INSERT": 0, "UPDATE": 0, "DELETE": 0}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split(" ", 1)[0].upper()
+        if verb in counts and "order_lines" in statement:
+            counts[verb] += len(parameters) if executemany else 1
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counts
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def large_request(client, sample_request_data):
+    lines = [
+        {"description": f"Item {i}", "unit_price": 10.0, "quantity": 1, "unit": "pcs", "stated_total_price": 10.0}
+        for i in range(300)
+    ]
+    return client.post("/api/requests", json={**sample_request_data, "order_lines": lines}).json()
+
+
+class TestDiffOrderLines:
+    def test_single_quantity_edit_touches_one_row(self, client, test_db, large_request):
+        lines = large_request["order_lines"]
+        lines[5]["quantity"] = 3
+
+        with count_writes(test_db) as writes:
+            response = client.put(f"/api/requests/{large_request['id']}", json={"order_lines": lines})
+
+        assert response.status_code == 200
+        assert writes == {"INSERT": 0, "UPDATE": 1, "DELETE": 0}
+        updated = response.json()["order_lines"]
+        assert [line["id"] for line in updated] == [line["id"] for line in lines]
+        assert updated[5]["quantity"] == 3
+        assert response.json()["calculated_total_cost"] == 3020.0
+
+    def test_insert_update_delete_in_one_request(self, client, test_db, sample_request_data_with_mismatch):
+        created = client.post("/api/requests", json=sample_request_data_with_mismatch).json()
+        first, second = created["order_lines"]
+
+        payload = {
+            "order_lines": [
+                {**second, "description": "Item 2 (renamed)"},
+                {"description": "Item 3", "unit_price": 5.0, "quantity": 4, "unit": "pcs"},
+            ]
+        }
+        with count_writes(test_db) as writes:
+            response = client.put(f"/api/requests/{created['id']}", json=payload)
+
+        assert writes == {"INSERT": 1, "UPDATE": 1, "DELETE": 1}
+        lines = response.json()["order_lines"]
+        assert [line["description"] for line in lines] == ["Item 2 (renamed)", "Item 3"]
+        assert lines[0]["id"] == second["id"]
+        assert first["id"] not in {line["id"] for line in lines}
+
+    def test_lines_without_ids_replace_everything(self, client, sample_request_data):
+        created = client.post("/api/requests", json=sample_request_data).json()
+        response = client.put(
+            f"/api/requests/{created['id']}",
+            json={"order_lines": [{"description": "New", "unit_price": 1.0, "quantity": 1, "unit": "pcs"}]},
+        )
+        lines = response.json()["order_lines"]
+        assert [line["description"] for line in lines] == ["New"]
+        assert lines[0]["id"] != created["order_lines"][0]["id"]
+
+    def test_foreign_line_id_rejected(self, client, sample_request_data):
+        first = client.post("/api/requests", json=sample_request_data).json()
+        second = client.post("/api/requests", json=sample_request_data).json()
+
+        response = client.put(
+            f"/api/requests/{second['id']}",
+            json={"title": "Changed", "order_lines": first["order_lines"]},
+        )
+        assert response.status_code == 400
+        assert client.get(f"/api/requests/{second['id']}").json()["title"] == sample_request_data["title"]
+
+    def test_duplicate_line_id_rejected(self, client, sample_request_data):
+        created = client.post("/api/requests", json=sample_request_data).json()
+        line = created["order_lines"][0]
+        response = client.put(f"/api/requests/{created['id']}", json={"order_lines": [line, line]})
+        assert response.status_code == 400
+
+
+class TestPatchOrderLine:
+    def test_patch_single_line(self, client, test_db, large_request):
+        line = large_request["order_lines"][10]
+
+        with count_writes(test_db) as writes:
+            response = client.patch(
+                f"/api/requests/{large_request['id']}/order-lines/{line['id']}",
+                json={"unit_price": 12.5},
+            )
+
+        assert response.status_code == 200
+        assert writes == {"INSERT": 0, "UPDATE": 1, "DELETE": 0}
+        assert response.json()["id"] == line["id"]
+        assert response.json()["unit_price"] == 12.5
+        assert response.json()["has_price_mismatch"] is True
+        assert client.get(f"/api/requests/{large_request['id']}").json()["calculated_total_cost"] == 3002.5
+
+    def test_patch_unknown_line(self, client, sample_request_data):
+        created = client.post("/api/requests", json=sample_request_data).json()
+        response = client.patch(f"/api/requests/{created['id']}/order-lines/99999", json={"quantity": 1})
+        assert response.status_code == 404
+
+    def test_patch_unknown_request(self, client):
+        response = client.patch("/api/requests/99999/order-lines/1", json={"quantity": 1})
+        assert response.status_code == 404
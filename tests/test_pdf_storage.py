@@ -0,0 +1,362 @@
+import hashlib
+import io
+import os
+import threading
+import time
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import sessionmaker
+
+from backend import crud
+from backend.blob_responses import RangeNotSatisfiable, parse_byte_range
+from backend.schemas import ProcurementRequestCreate
+from database import blob_store
+from database.database import create_db_engine, pdf_store
+from database.migrations import run_migrations
+from database.models import Base, PdfBlob
+
+PDF_A = b"%PDF-1.4 offer A" + b"\0" * 2048
+PDF_B = b"%PDF-1.4 offer B" + b"\0" * 2048
+
+
+@pytest.fixture(autouse=True)
+def blob_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_store, "root", tmp_path / "blobs")
+    return tmp_path / "blobs"
+
+
+def upload(client, request_id, content, filename="offer.pdf"):
+    return client.post(f"/api/requests/{request_id}/pdf", files={"file": (filename, content, "application/pdf")})
+
+
+def ref_counts(test_db) -> dict[str, int]:
+    test_db.expire_all()
+    return dict(test_db.execute(select(PdfBlob.sha256, PdfBlob.ref_count)).all())
+
+
+class TestBlobStore:
+    def test_sharded_atomic_put(self, blob_root):
+        digest, size = pdf_store.put(io.BytesIO(PDF_A))
+        assert digest == hashlib.sha256(PDF_A).hexdigest()
+        assert size == len(PDF_A)
+        path = pdf_store.path_for(digest)
+        assert path == blob_root / digest[:2] / digest[2:4] / digest
+        assert path.read_bytes() == PDF_A
+        assert list((blob_root / "tmp").iterdir()) == []
+
+        assert pdf_store.put(io.BytesIO(PDF_A)) == (digest, size)
+
+
+@pytest.fixture(params=["local", "s3"])
+def store(request, tmp_path):
+    if request.param == "local":
+        yield blob_store.LocalBlobStore(tmp_path / "blobs")
+        return
+
+    # Against a MinIO (or other S3-compatible) server when S3_TEST_ENDPOINT_URL is
+    # set, e.g. `docker compose --profile minio up minio`; otherwise against moto.
+    boto3 = pytest.importorskip("boto3")
+    endpoint = os.getenv("S3_TEST_ENDPOINT_URL")
+    bucket = f"procuro-test-{uuid.uuid4().hex[:8]}"
+    if endpoint:
+        client = boto3.client("s3", endpoint_url=endpoint, region_name="us-east-1")
+        client.create_bucket(Bucket=bucket)
+        yield blob_store.S3BlobStore(bucket, client=client)
+        for item in client.list_objects_v2(Bucket=bucket).get("Contents", []):
+            client.delete_object(Bucket=bucket, Key=item["Key"])
+        client.delete_bucket(Bucket=bucket)
+    else:
+        moto = pytest.importorskip("moto")
+        with moto.mock_aws():
+            client = boto3.client("s3", region_name="us-east-1")
+            client.create_bucket(Bucket=bucket)
+            yield blob_store.S3BlobStore(bucket, client=client)
+
+
+class TestStoreBackends:
+    def test_put_read_delete(self, store):
+        content = bytes(range(256)) * 5000
+        digest, size = store.put(io.BytesIO(content))
+        assert (digest, size) == (hashlib.sha256(content).hexdigest(), len(content))
+        assert store.size(digest) == size
+        assert store.put(io.BytesIO(content)) == (digest, size)
+
+        assert b"".join(store.iter_range(digest, 0, size - 1)) == content
+        assert b"".join(store.iter_range(digest, 1000, 1099)) == content[1000:1100]
+
+        derived = blob_store.derived_key(digest, "preview.jpg")
+        store.write(derived, b"jpeg", "image/jpeg")
+        assert store.read(derived) == b"jpeg"
+
+        store.delete(digest)
+        assert not store.exists(digest)
+        assert not store.exists(derived)
+        store.delete(digest)
+
+    def test_reads_in_chunks(self, store, monkeypatch):
+        monkeypatch.setattr(blob_store, "CHUNK_SIZE", 1024)
+        content = os.urandom(5000)
+        digest, _ = store.put(io.BytesIO(content))
+        chunks = list(store.iter_range(digest, 0, len(content) - 1))
+        assert len(chunks) > 1
+        assert b"".join(chunks) == content
+
+
+class TestByteRanges:
+    @pytest.mark.parametrize("header, expected", [
+        (None, None),
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-100", (900, 999)),
+        ("bytes=-5000", (0, 999)),
+        ("bytes=900-5000", (900, 999)),
+        ("bytes=0-1,5-6", None),
+        ("items=0-1", None),
+        ("bytes=5-2", None),
+        ("bytes=abc", None),
+    ])
+    def test_parse(self, header, expected):
+        assert parse_byte_range(header, 1000) == expected
+
+    @pytest.mark.parametrize("header", ["bytes=1000-", "bytes=-0"])
+    def test_unsatisfiable(self, header):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_byte_range(header, 1000)
+
+
+class TestPdfEndpoints:
+    def test_identical_uploads_share_one_blob(self, client, test_db, sample_request_data):
+        first = client.post("/api/requests", json=sample_request_data).json()["id"]
+        second = client.post("/api/requests", json=sample_request_data).json()["id"]
+
+        digest = upload(client, first, PDF_A).json()["sha256"]
+        assert upload(client, second, PDF_A, filename="copy.pdf").json()["sha256"] == digest
+        assert ref_counts(test_db) == {digest: 2}
+
+        response = client.get(f"/api/requests/{second}/pdf")
+        assert response.content == PDF_A
+        assert 'filename="copy.pdf"' in response.headers["content-disposition"]
+        assert client.get(f"/api/requests/{second}").json()["pdf_sha256"] == digest
+
+        assert client.delete(f"/api/requests/{first}/pdf").status_code == 204
+        assert pdf_store.exists(digest)
+        assert ref_counts(test_db) == {digest: 1}
+
+        assert client.delete(f"/api/requests/{second}").status_code == 204
+        assert not pdf_store.exists(digest)
+        assert ref_counts(test_db) == {}
+
+    def test_replacing_releases_previous_blob(self, client, test_db, sample_request_data):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        old = upload(client, request_id, PDF_A).json()["sha256"]
+        new = upload(client, request_id, PDF_B).json()["sha256"]
+
+        assert not pdf_store.exists(old)
+        assert ref_counts(test_db) == {new: 1}
+        assert client.get(f"/api/requests/{request_id}/pdf").content == PDF_B
+
+        upload(client, request_id, PDF_B)
+        assert ref_counts(test_db) == {new: 1}
+
+    def test_blob_unlinked_before_acquire_is_put_again(self, client, sample_request_data, monkeypatch):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        acquire = blob_store.acquire
+
+        def acquire_after_concurrent_unlink(db, digest, size):
+            # Another request's last reference to the same content was released in between.
+            pdf_store.delete(digest)
+            acquire(db, digest, size)
+
+        monkeypatch.setattr(blob_store, "acquire", acquire_after_concurrent_unlink)
+        digest = upload(client, request_id, PDF_A).json()["sha256"]
+        assert pdf_store.exists(digest)
+        assert client.get(f"/api/requests/{request_id}/pdf").content == PDF_A
+
+    def test_unlink_waits_for_concurrent_acquire(self, tmp_path, sample_request_data, monkeypatch):
+        # release -> (unlinker checks: unreferenced) -> acquire -> exists -> (unlinker deletes)
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'race.db'}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        store = blob_store.LocalBlobStore(tmp_path / "race-blobs")
+        monkeypatch.setattr(crud, "pdf_store", store)
+        with Session() as db:
+            first, second = (crud.create_request(db, ProcurementRequestCreate(**sample_request_data)).id for _ in "ab")
+            digest, size = store.put(io.BytesIO(PDF_A))
+            crud.attach_pdf(db, crud.get_request(db, first), digest, size, "a.pdf")
+
+        checked = threading.Event()
+        delete = store.delete
+
+        def delete_after_check(key):
+            checked.set()
+            time.sleep(0.3)
+            delete(key)
+
+        monkeypatch.setattr(store, "delete", delete_after_check)
+
+        def detach():
+            with Session() as db:
+                crud.detach_pdf(db, crud.get_request(db, first))
+
+        unlinker = threading.Thread(target=detach)
+        unlinker.start()
+        assert checked.wait(5)
+        with Session() as db:
+            digest, size = store.put(io.BytesIO(PDF_A))
+            crud.attach_pdf(db, crud.get_request(db, second), digest, size, "b.pdf", io.BytesIO(PDF_A))
+        unlinker.join()
+
+        assert store.read(digest) == PDF_A
+        with Session() as db:
+            assert dict(db.execute(select(PdfBlob.sha256, PdfBlob.ref_count)).all()) == {digest: 1}
+        engine.dispose()
+
+    def test_rejects_empty_and_missing(self, client, sample_request_data):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        assert upload(client, request_id, b"").status_code == 400
+        assert upload(client, 99999, PDF_A).status_code == 404
+        # The payload is validated before the request is looked up.
+        assert upload(client, 99999, b"").status_code == 400
+        assert upload(client, 99999, PDF_A, filename="offer.txt").status_code == 400
+        assert client.get(f"/api/requests/{request_id}/pdf").status_code == 404
+
+
+    def test_range_requests(self, client, sample_request_data):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        digest = upload(client, request_id, PDF_A).json()["sha256"]
+        url = f"/api/requests/{request_id}/pdf"
+
+        full = client.get(url)
+        assert full.status_code == 200
+        assert full.headers["accept-ranges"] == "bytes"
+        assert full.headers["etag"] == f'"{digest}"'
+        assert full.headers["content-length"] == str(len(PDF_A))
+
+        partial = client.get(url, headers={"Range": "bytes=0-7"})
+        assert partial.status_code == 206
+        assert partial.content == PDF_A[:8]
+        assert partial.headers["content-range"] == f"bytes 0-7/{len(PDF_A)}"
+        assert partial.headers["content-length"] == "8"
+
+        tail = client.get(url, headers={"Range": "bytes=-16"})
+        assert tail.status_code == 206
+        assert tail.content == PDF_A[-16:]
+
+        unsatisfiable = client.get(url, headers={"Range": f"bytes={len(PDF_A)}-"})
+        assert unsatisfiable.status_code == 416
+        assert unsatisfiable.headers["content-range"] == f"bytes */{len(PDF_A)}"
+
+        resumed = client.get(url, headers={"Range": "bytes=8-", "If-Range": f'"{digest}"'})
+        assert resumed.status_code == 206
+        assert resumed.content == PDF_A[8:]
+        stale = client.get(url, headers={"Range": "bytes=8-", "If-Range": '"other"'})
+        assert stale.status_code == 200
+        assert stale.content == PDF_A
+
+
+class TestLegacyMigration:
+    def test_moves_flat_files_into_store(self, tmp_path, monkeypatch):
+        import database.database
+
+        upload_dir = tmp_path / "uploads"
+        upload_dir.mkdir()
+        (upload_dir / "1.pdf").write_bytes(PDF_A)
+        (upload_dir / "2.pdf").write_bytes(PDF_A)
+        monkeypatch.setattr(database.database, "UPLOAD_DIR", upload_dir)
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        with engine.begin() as conn:
+            # The table as it was before PDFs were content-addressed.
+            conn.execute(text(
+                "CREATE TABLE procurement_requests (id INTEGER PRIMARY KEY, requestor_name VARCHAR NOT NULL, "
+                "title VARCHAR NOT NULL, vendor_name VARCHAR NOT NULL, vat_id VARCHAR NOT NULL, "
+                "department VARCHAR NOT NULL, commodity_group_id VARCHAR NOT NULL, currency VARCHAR, "
+                "stated_total_cost FLOAT, status VARCHAR, pdf_filename VARCHAR, created_at DATETIME, "
+                "updated_at DATETIME)"
+            ))
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            for request_id, filename in ((1, "1.pdf"), (2, "2.pdf"), (3, "3.pdf")):
+                conn.execute(text(
+                    "INSERT INTO procurement_requests (id, requestor_name, title, vendor_name, vat_id, department, "
+                    "commodity_group_id, currency, status, pdf_filename, created_at, updated_at) "
+                    f"VALUES ({request_id}, 'A', 'T', 'V', 'DE1', 'IT', '031', 'EUR', 'Open', '{filename}', "
+                    "'2024-01-02 00:00:00', '2024-01-02 00:00:00')"
+                ))
+
+        run_migrations(engine)
+
+        with engine.connect() as conn:
+            rows = dict(conn.execute(text("SELECT id, pdf_sha256 FROM procurement_requests")).all())
+            updated = set(conn.execute(text("SELECT updated_at FROM procurement_requests")).scalars())
+            counts = dict(conn.execute(select(PdfBlob.sha256, PdfBlob.ref_count)).all())
+        digest = rows[1]
+        assert rows == {1: digest, 2: digest, 3: None}
+        assert counts == {digest: 2}
+        assert updated == {"2024-01-02 00:00:00"}
+        assert pdf_store.path_for(digest).read_bytes() == PDF_A
+        assert list(upload_dir.glob("*.pdf")) == []
+        engine.dispose()
+
+
+def make_pdf(pages: int) -> bytes:
+    import pymupdf
+
+    doc = pymupdf.open()
+    for number in range(pages):
+        doc.new_page().insert_text((72, 72), f"Offer page {number + 1}")
+    return doc.tobytes()
+
+
+class TestPreviews:
+    def test_generated_on_upload(self, client, sample_request_data):
+        from backend import previews
+
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        digest = upload(client, request_id, make_pdf(2)).json()["sha256"]
+        assert pdf_store.exists(previews.preview_key(digest))
+        assert pdf_store.exists(previews.thumbnail_key(digest, 2))
+
+        summary = client.get("/api/requests/summary", params={"fields": "pdf_sha256"}).json()
+        assert summary == [{"id": request_id, "pdf_sha256": digest}]
+
+        response = client.get(f"/api/pdfs/{digest}/preview.jpg")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/jpeg"
+        assert "immutable" in response.headers["cache-control"]
+        assert response.content[:2] == b"\xff\xd8"
+
+        assert client.get(f"/api/pdfs/{digest}/thumbnails/2.jpg").status_code == 200
+        assert client.get(f"/api/pdfs/{digest}/thumbnails/3.jpg").status_code == 404
+        etag = response.headers["etag"]
+        assert client.get(f"/api/pdfs/{digest}/preview.jpg", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_regenerated_when_missing(self, client, sample_request_data):
+        from backend import previews
+
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        digest = upload(client, request_id, make_pdf(1)).json()["sha256"]
+        pdf_store.path_for(previews.preview_key(digest)).unlink()
+        pdf_store.path_for(previews.thumbnail_key(digest, 1)).unlink()
+
+        assert client.get(f"/api/pdfs/{digest}/thumbnails/1.jpg").status_code == 200
+        assert pdf_store.exists(previews.preview_key(digest))
+
+    def test_removed_with_blob(self, client, sample_request_data):
+        from backend import previews
+
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        digest = upload(client, request_id, make_pdf(1)).json()["sha256"]
+        client.delete(f"/api/requests/{request_id}/pdf")
+
+        assert not pdf_store.exists(previews.preview_key(digest))
+        assert client.get(f"/api/pdfs/{digest}/preview.jpg").status_code == 404
+
+    def test_unrenderable_and_unknown(self, client, sample_request_data):
+        request_id = client.post("/api/requests", json=sample_request_data).json()["id"]
+        digest = upload(client, request_id, PDF_A).json()["sha256"]
+        assert client.get(f"/api/pdfs/{digest}/preview.jpg").status_code == 404
+        assert client.get(f"/api/pdfs/{'0' * 64}/preview.jpg").status_code == 404
+        assert client.get("/api/pdfs/not-a-hash/preview.jpg").status_code == 422
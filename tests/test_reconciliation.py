@@ -0,0 +1,66 @@
+def make_request(client, sample_request_data, lines, stated_total, **overrides):
+    data = {
+        **sample_request_data,
+        **overrides,
+        "stated_total_cost": stated_total,
+        "order_lines": [
+            {"description": description, "unit_price": price, "quantity": quantity, "unit": "pcs",
+             "stated_total_price": stated}
+            for description, price, quantity, stated in lines
+        ],
+    }
+    return client.post("/api/requests", json=data).json()["id"]
+
+
+def report(client, **params):
+    response = client.get("/api/analytics/reconciliation", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestReconciliation:
+    def test_line_mismatches_in_exact_cents(self, client, sample_request_data):
+        make_request(client, sample_request_data, [
+            ("exact", 19.99, 3, 59.97),  # 0.1-style float noise must not count
+            ("one cent off", 10.0, 1, 10.01),  # Ignored by the float tolerance, reported here
+            ("half cent", 0.01, 0.5, 0.01),  # 0.5 cents rounds away from zero
+            ("no stated total", 5.0, 2, None),
+            ("big", 100.0, 2, 150.0),
+        ], stated_total=None)
+
+        result = report(client)
+        assert result["count"] == 2
+        assert [item["description"] for item in result["items"]] == ["big", "one cent off"]
+        big = result["items"][0]
+        assert (big["unit_price"], big["calculated_total"], big["stated_total"], big["discrepancy"]) == (
+            "100.00", "200.00", "150.00", "-50.00"
+        )
+        assert result["absolute_discrepancy_by_currency"] == {"EUR": "50.01"}
+
+        assert report(client, tolerance_cents=1)["count"] == 1
+        assert [item["description"] for item in report(client, order="asc")["items"]] == ["one cent off", "big"]
+
+    def test_request_totals(self, client, sample_request_data):
+        balanced = make_request(client, sample_request_data, [("a", 0.1, 3, None), ("b", 0.2, 1, None)], 0.5)
+        over = make_request(client, sample_request_data, [("a", 10.0, 1, None)], 12.5)
+        empty = make_request(client, sample_request_data, [], 3.0)
+        make_request(client, sample_request_data, [("a", 10.0, 1, None)], None)
+
+        result = report(client, level="request")
+        assert [item["request_id"] for item in result["items"]] == [empty, over]
+        assert result["items"][0]["line_count"] == 0
+        assert result["items"][1]["discrepancy"] == "2.50"
+        assert "line_id" not in result["items"][0]
+        assert balanced not in [item["request_id"] for item in result["items"]]
+
+    def test_filters_and_paging(self, client, sample_request_data):
+        for index in range(5):
+            make_request(client, sample_request_data, [("x", 1.0, 1, 1.0 + index + 1)], None, department="IT")
+        make_request(client, sample_request_data, [("x", 1.0, 1, 9.0)], None, department="HR", currency="USD")
+
+        assert report(client)["absolute_discrepancy_by_currency"] == {"EUR": "15.00", "USD": "8.00"}
+        assert report(client, department="HR")["count"] == 1
+
+        page = report(client, department="IT", limit=2, offset=2)
+        assert page["count"] == 5
+        assert [item["discrepancy"] for item in page["items"]] == ["3.00", "2.00"]
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from backend.crud import apply_request_filters
+from backend.schemas import RequestFilters
+from database.migrations import MIGRATIONS, run_migrations
+from database.models import Base, ProcurementRequest
+
+
+def explain(db, filters: RequestFilters) -> str:
+    query = apply_request_filters(db.query(ProcurementRequest), filters)
+    query = query.order_by(ProcurementRequest.created_at.desc())
+    sql = query.statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    rows = db.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return "\n".join(row[3] for row in rows)
+
+
+class TestListFilters:
+    @pytest.fixture
+    def seeded(self, client, sample_request_data):
+        variants = [
+            {"department": "IT", "currency": "EUR", "vat_id": "DE111111111", "commodity_group_id": "031"},
+            {"department": "HR", "currency": "EUR", "vat_id": "DE222222222", "commodity_group_id": "001"},
+            {"department": "IT", "currency": "USD", "vat_id": "DE222222222", "commodity_group_id": "029"},
+        ]
+        for variant in variants:
+            client.post("/api/requests", json={**sample_request_data, **variant})
+
+    @pytest.mark.parametrize(
+        "params, expected",
+        [
+            ({"department": "IT"}, 2),
+            ({"currency": "USD"}, 1),
+            ({"vat_id": "DE222222222"}, 2),
+            ({"commodity_group_id": "001"}, 1),
+            ({"requestor_name": "Max Mustermann"}, 3),
+            ({"requestor_name": "Nobody"}, 0),
+            ({"department": "IT", "vat_id": "DE222222222"}, 1),
+            ({"department": "HR", "currency": "USD"}, 0),
+        ],
+    )
+    def test_equality_filters(self, client, seeded, params, expected):
+        response = client.get("/api/requests", params=params)
+        assert response.status_code == 200
+        assert len(response.json()) == expected
+
+    def test_date_range_filters(self, client, seeded):
+        now = datetime.now(UTC).replace(tzinfo=None)
+        past = (now - timedelta(days=1)).isoformat()
+        future = (now + timedelta(days=1)).isoformat()
+
+        assert len(client.get("/api/requests", params={"created_from": past}).json()) == 3
+        assert len(client.get("/api/requests", params={"created_from": future}).json()) == 0
+        assert len(client.get("/api/requests", params={"updated_to": past}).json()) == 0
+        assert len(client.get(
+            "/api/requests", params={"updated_from": past, "updated_to": future, "department": "IT"}
+        ).json()) == 2
+
+    def test_invalid_date_rejected(self, client):
+        response = client.get("/api/requests", params={"created_from": "yesterday"})
+        assert response.status_code == 422
+
+
+class TestFilterIndexes:
+    day = datetime(2024, 1, 1)
+
+    @pytest.mark.parametrize(
+        "filters, index",
+        [
+            ({"status": "Open"}, "ix_procurement_requests_status_created_at"),
+            ({"department": "IT"}, "ix_procurement_requests_department_created_at"),
+            ({"commodity_group_id": "031"}, "ix_procurement_requests_commodity_group_created_at"),
+            ({"vat_id": "DE123456789"}, "ix_procurement_requests_vat_id_created_at"),
+            ({"currency": "EUR"}, "ix_procurement_requests_currency_created_at"),
+            ({"requestor_name": "Max"}, "ix_procurement_requests_requestor_created_at"),
+            ({"created_from": day}, "ix_procurement_requests_created_at"),
+            ({"created_from": day, "created_to": day + timedelta(days=30)}, "ix_procurement_requests_created_at"),
+            ({"updated_from": day, "updated_to": day + timedelta(days=30)}, "ix_procurement_requests_updated_at"),
+            ({"department": "IT", "created_from": day}, "ix_procurement_requests_department_created_at"),
+        ],
+    )
+    def test_filter_uses_index(self, test_db, filters, index):
+        plan = explain(test_db, RequestFilters(**filters))
+        assert f"SEARCH procurement_requests USING INDEX {index}" in plan
+
+
+class TestMigrations:
+    def test_existing_database_gets_indexes(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        with engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                table.create(conn)
+                for index in table.indexes:
+                    index.drop(conn)
+
+        assert "ix_procurement_requests_department_created_at" not in {
+            ix["name"] for ix in inspect(engine).get_indexes("procurement_requests")
+        }
+
+        Base.metadata.create_all(bind=engine)
+        applied = run_migrations(engine)
+
+        assert applied == [version for version, _, _ in MIGRATIONS]
+        names = {ix["name"] for ix in inspect(engine).get_indexes("procurement_requests")}
+        assert "ix_procurement_requests_department_created_at" in names
+        assert {ix["name"] for ix in inspect(engine).get_indexes("order_lines")} >= {"ix_order_lines_request_id"}
+
+        assert run_migrations(engine) == []
+        engine.dispose()
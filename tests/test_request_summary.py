@@ -0,0 +1,63 @@
+from sqlalchemy import event
+
+from database.models import ProcurementRequest
+
+
+class TestRequestSummary:
+    def test_matches_full_list(self, client, sample_request_data, sample_request_data_with_mismatch):
+        client.post("/api/requests", json=sample_request_data)
+        client.post("/api/requests", json=sample_request_data_with_mismatch)
+        client.post("/api/requests", json={**sample_request_data, "order_lines": []})
+
+        full = client.get("/api/requests").json()
+        summary = client.get("/api/requests/summary").json()
+
+        assert [row["id"] for row in summary] == [row["id"] for row in full]
+        for row, request in zip(summary, full):
+            assert row["line_count"] == len(request["order_lines"])
+            assert "order_lines" not in row and "status_history" not in row
+            for key in set(row) - {"line_count"}:
+                assert row[key] == request[key], key
+
+    def test_sparse_fieldset(self, client, sample_request_data):
+        client.post("/api/requests", json=sample_request_data)
+
+        response = client.get("/api/requests/summary", params={"fields": "title,status"})
+        assert response.json() == [{"id": 1, "title": "Office Supplies Order", "status": "Open"}]
+
+        response = client.get("/api/requests/summary", params=[("fields", "line_count"), ("fields", "id")])
+        assert response.json() == [{"id": 1, "line_count": len(sample_request_data["order_lines"])}]
+
+        assert client.get("/api/requests/summary", params={"fields": "order_lines"}).status_code == 422
+
+    def test_filters_apply(self, client, sample_request_data):
+        client.post("/api/requests", json=sample_request_data)
+        client.post("/api/requests", json={**sample_request_data, "department": "HR"})
+
+        response = client.get("/api/requests/summary", params={"department": "HR", "fields": "department"})
+        assert response.json() == [{"id": 2, "department": "HR"}]
+
+    def test_single_query_without_orm_objects(self, client, test_db, sample_request_data):
+        for _ in range(5):
+            client.post("/api/requests", json=sample_request_data)
+
+        statements, loaded = [], []
+
+        def record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        def record_load(target, context):
+            loaded.append(target)
+
+        engine = test_db.get_bind()
+        event.listen(engine, "before_cursor_execute", record_statement)
+        event.listen(ProcurementRequest, "load", record_load)
+        try:
+            assert len(client.get("/api/requests/summary").json()) == 5
+        finally:
+            event.remove(engine, "before_cursor_execute", record_statement)
+            event.remove(ProcurementRequest, "load", record_load)
+
+        request_queries = [s for s in statements if "FROM procurement_requests" in s]
+        assert len(request_queries) == 1
+        assert loaded == []
@@ -0,0 +1,48 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+import backend.main
+
+# Importing the app took about 1.8 s with openai and pypdf loaded eagerly, 1.1 s without.
+IMPORT_TIME_BUDGET_SECONDS = 1.5
+LAZY_MODULES = ("openai", "pypdf", "pymupdf", "boto3")
+
+PROBE = f"""
+import sys, time
+start = time.perf_counter()
+import backend.main
+print(time.perf_counter() - start)
+print(",".join(name for name in {LAZY_MODULES!r} if name in sys.modules))
+"""
+
+
+def import_app() -> tuple[float, str]:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=Path(__file__).parent.parent, capture_output=True, text=True, check=True
+    ).stdout.splitlines()
+    return float(output[0]), output[1] if len(output) > 1 else ""
+
+
+class TestColdStart:
+    def test_heavy_dependencies_are_not_imported(self):
+        assert import_app()[1] == ""
+
+    def test_import_time_budget(self):
+        # Best of three, so a busy machine does not fail the build.
+        assert min(import_app()[0] for _ in range(3)) < IMPORT_TIME_BUDGET_SECONDS
+
+
+class TestProbes:
+    def test_liveness(self, client):
+        assert client.get("/api/health").json() == {"status": "ok"}
+
+    def test_readiness(self, client, tmp_path, monkeypatch):
+        assert client.get("/api/ready").json() == {"status": "ok"}
+
+        monkeypatch.setattr(backend.main, "engine", create_engine(f"sqlite:///{tmp_path / 'missing' / 'x.db'}"))
+        response = client.get("/api/ready")
+        assert response.status_code == 503
+        assert response.json() == {"status": "unavailable"}
@@ -0,0 +1,90 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI, Header
+from fastapi.testclient import TestClient
+
+from backend.compression import CompressionMiddleware
+from backend.static_files import IMMUTABLE, REVALIDATE, StaticFrontend
+
+SCRIPT = b"console.log('procuro');\n" * 100
+
+
+@pytest.fixture
+def dist(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_text('<div id="root"></div><script src="/assets/index-3f2a9c1d.js"></script>')
+    (tmp_path / "vite.svg").write_text("<svg/>")
+    (tmp_path / "assets" / "index-3f2a9c1d.js").write_bytes(SCRIPT)
+    (tmp_path / "assets" / "index-3f2a9c1d.js.gz").write_bytes(gzip.compress(SCRIPT))
+    (tmp_path / "assets" / "index-3f2a9c1d.js.br").write_bytes(b"brotli bytes")
+    return tmp_path
+
+
+@pytest.fixture
+def frontend_client(dist):
+    frontend = StaticFrontend(dist)
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/{full_path:path}")
+    async def serve_frontend(
+        full_path: str, accept_encoding: str = Header(""), if_none_match: str | None = Header(None)
+    ):
+        return frontend.response(full_path, accept_encoding, if_none_match)
+
+    return TestClient(app)
+
+
+def get(client, path, **headers):
+    # httpx decodes gzip bodies itself; ask for the raw stream to see what was sent.
+    with client.stream("GET", path, headers={"Accept-Encoding": "identity", **headers}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+class TestManifest:
+    def test_variants_belong_to_their_file(self, dist):
+        manifest = StaticFrontend(dist).manifest
+        assert sorted(manifest) == ["assets/index-3f2a9c1d.js", "index.html", "vite.svg"]
+        assert sorted(manifest["assets/index-3f2a9c1d.js"].variants) == ["br", "gzip"]
+
+    def test_files_added_later_are_not_probed(self, dist, frontend_client):
+        (dist / "late.txt").write_text("not in the manifest")
+        response, body = get(frontend_client, "/late.txt")
+        assert body.startswith(b'<div id="root">')
+
+
+class TestStaticFrontend:
+    def test_hashed_assets_are_immutable(self, frontend_client):
+        response, body = get(frontend_client, "/assets/index-3f2a9c1d.js")
+        assert body == SCRIPT
+        assert response.headers["cache-control"] == IMMUTABLE
+        assert response.headers["content-type"].endswith("javascript; charset=utf-8")
+        assert "content-encoding" not in response.headers
+
+    @pytest.mark.parametrize("accept, encoding", [("gzip", "gzip"), ("br, gzip", "br"), ("br;q=0.1, gzip", "gzip")])
+    def test_precompressed_variants(self, frontend_client, accept, encoding):
+        response, body = get(frontend_client, "/assets/index-3f2a9c1d.js", **{"Accept-Encoding": accept})
+        assert response.headers["content-encoding"] == encoding
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["etag"].endswith(f'-{encoding}"')
+        if encoding == "gzip":
+            assert gzip.decompress(body) == SCRIPT
+
+    def test_index_revalidates_with_etag(self, frontend_client):
+        response, _ = get(frontend_client, "/")
+        assert response.headers["cache-control"] == REVALIDATE
+        etag = response.headers["etag"]
+
+        not_modified, _ = get(frontend_client, "/", **{"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.headers["etag"] == etag
+        assert get(frontend_client, "/", **{"If-None-Match": '"other"'})[0].status_code == 200
+
+    def test_client_routes_fall_back_to_index(self, frontend_client):
+        index, _ = get(frontend_client, "/")
+        for path in ("/requests/42", "/../../etc/passwd", "/assets/missing.js"):
+            response, body = get(frontend_client, path)
+            assert response.headers["etag"] == index.headers["etag"]
+            assert body.startswith(b'<div id="root">')
+        assert get(frontend_client, "/vite.svg")[1] == b"<svg/>"
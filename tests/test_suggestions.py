@@ -0,0 +1,94 @@
+import random
+import string
+import time
+
+from database import suggestions
+
+
+def suggest(client, field, q, **params):
+    response = client.get(f"/api/suggestions/{field}", params={"q": q, **params})
+    assert response.status_code == 200
+    return [(item["value"], item["count"]) for item in response.json()]
+
+
+def create(client, data, **overrides):
+    return client.post("/api/requests", json={**data, **overrides}).json()
+
+
+class TestSuggestions:
+    def test_ranked_by_frequency(self, client, sample_request_data):
+        for name in ["Max Mustermann", "Maria Schmidt", "Maria Schmidt", "Mia Wong"]:
+            create(client, sample_request_data, requestor_name=name)
+
+        assert suggest(client, "requestor_name", "m") == [
+            ("Maria Schmidt", 2), ("Max Mustermann", 1), ("Mia Wong", 1),
+        ]
+        assert suggest(client, "requestor_name", "MAR") == [("Maria Schmidt", 2)]
+        assert suggest(client, "requestor_name", "m", limit=1) == [("Maria Schmidt", 2)]
+        assert suggest(client, "department", "i") == [("IT", 4)]
+        assert suggest(client, "unit", "pie") == [("pieces", 4)]
+        assert client.get("/api/suggestions/title", params={"q": "a"}).status_code == 422
+
+    def test_follows_writes(self, client, sample_request_data):
+        request = create(client, sample_request_data)
+        assert suggest(client, "department", "i") == [("IT", 1)]
+
+        create(client, sample_request_data, department="Infrastructure")
+        client.put(f"/api/requests/{request['id']}", json={"department": "HR"})
+        assert suggest(client, "department", "i") == [("Infrastructure", 1)]
+        assert suggest(client, "department", "h") == [("HR", 1)]
+
+        line_id = request["order_lines"][0]["id"]
+        client.patch(f"/api/requests/{request['id']}/order-lines/{line_id}", json={"unit": "Stk"})
+        assert suggest(client, "unit", "stk") == [("Stk", 1)]
+
+        client.delete(f"/api/requests/{request['id']}")
+        assert suggest(client, "department", "h") == []
+        assert suggest(client, "unit", "stk") == []
+
+        client.post("/api/requests/bulk", json=[{**sample_request_data, "department": "HR"}] * 3)
+        assert suggest(client, "department", "h") == [("HR", 3)]
+        assert suggest(client, "unit", "p") == [("pieces", 4)]
+
+    def test_rollback_is_not_counted(self, client, test_db, sample_request_data):
+        create(client, sample_request_data)
+        suggest(client, "department", "i")
+
+        from database.models import ProcurementRequest
+
+        request = test_db.query(ProcurementRequest).one()
+        request.department = "Legal"
+        test_db.flush()
+        test_db.rollback()
+        assert suggest(client, "department", "l") == []
+        assert suggest(client, "department", "i") == [("IT", 1)]
+
+
+class TestFrequencyIndex:
+    def test_memory_is_bounded(self):
+        index = suggestions.FrequencyIndex(max_values=100)
+        index.add("common", 50)
+        for n in range(150):
+            index.add(f"value {n}")
+        assert len(index) <= 100
+        assert index.search("c") == [{"value": "common", "count": 50}]
+
+    def test_p99_latency_at_100k_values(self):
+        rng = random.Random(3)
+        names = {
+            "".join(rng.choices(string.ascii_letters, k=rng.randint(4, 12))) + " " + str(n): rng.randint(1, 500)
+            for n in range(100_000)
+        }
+        index = suggestions.FrequencyIndex(max_values=200_000)
+        index.load(names)
+
+        timings = []
+        for _ in range(2000):
+            query = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(1, 4)))
+            if rng.random() < 0.1:
+                index.add(rng.choice(list(names)[:1000]))  # Writes invalidate cached short prefixes
+            start = time.perf_counter()
+            index.search(query)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        assert timings[int(len(timings) * 0.99)] < 0.005
@@ -0,0 +1,149 @@
+import time
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from backend.routers import extraction as extraction_router
+from database import vendors
+from database.models import ProcurementRequest, Vendor
+
+
+def create(client, data, **overrides):
+    response = client.post("/api/requests", json={**data, **overrides})
+    assert response.status_code == 201
+    return response.json()
+
+
+def autocomplete(client, q, **params):
+    response = client.get("/api/vendors/autocomplete", params={"q": q, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestNormalization:
+    @pytest.mark.parametrize("name", ["Bürobedarf GmbH", "BUEROBEDARF gmbh", "Bürobedarf  GmbH.", "Burobedarf GmbH"])
+    def test_folded_names(self, name):
+        expected = "buerobedarf gmbh" if name != "Burobedarf GmbH" else "burobedarf gmbh"
+        assert vendors.normalize_name(name) == expected
+
+    def test_accents_and_vat_ids(self):
+        assert vendors.normalize_name("Café Ørsted & Søn") == "cafe oersted soen"
+        assert vendors.normalize_vat_id("de 123.456-789") == "DE123456789"
+        assert vendors.normalize_vat_id(" ") is None
+
+
+class TestVendorResolution:
+    def test_batch_matches_single_resolution(self, test_db):
+        pairs = [
+            ("Papier AG", ""), ("PAPIER AG", "DE111111111"), ("Papier AG", "DE222222222"),
+            ("Nimbus", "IE9999999X"), ("Nimbus Ltd", "ie 9999999x"), ("", ""),
+        ]
+        resolved = vendors.resolve_vendors(test_db, pairs)
+        test_db.commit()
+
+        assert resolved[("", "")] is None
+        # The name-only vendor adopts the first VAT ID; the second one is another vendor.
+        assert resolved[("Papier AG", "")] == resolved[("PAPIER AG", "DE111111111")] != resolved[("Papier AG", "DE222222222")]
+        assert resolved[("Nimbus", "IE9999999X")] == resolved[("Nimbus Ltd", "ie 9999999x")]
+        assert test_db.query(Vendor).count() == 3
+        assert vendors.resolve_vendors(test_db, pairs) == resolved
+
+
+    def test_requests_share_vendors(self, client, sample_request_data):
+        first = create(client, sample_request_data)
+        same_vat = create(client, sample_request_data, vendor_name="Buerobedarf G.m.b.H.", vat_id="de123456789")
+        other_vat = create(client, sample_request_data, vat_id="DE000000001")
+
+        assert first["vendor_id"] is not None
+        assert same_vat["vendor_id"] == first["vendor_id"]
+        assert other_vat["vendor_id"] != first["vendor_id"]
+
+        by_vendor = client.get("/api/requests", params={"vendor_id": first["vendor_id"]}).json()
+        assert {row["id"] for row in by_vendor} == {first["id"], same_vat["id"]}
+
+    def test_name_only_vendor_adopts_vat_id(self, client, test_db, sample_request_data):
+        without_vat = create(client, sample_request_data, vendor_name="Papier AG", vat_id="")
+        again = create(client, sample_request_data, vendor_name="PAPIER AG", vat_id="")
+        with_vat = create(client, sample_request_data, vendor_name="Papier AG", vat_id="ATU12345678")
+
+        assert without_vat["vendor_id"] == again["vendor_id"] == with_vat["vendor_id"]
+        test_db.expire_all()
+        assert test_db.get(Vendor, with_vat["vendor_id"]).vat_id == "ATU12345678"
+
+    def test_update_resolves_new_vendor(self, client, sample_request_data):
+        request = create(client, sample_request_data)
+        updated = client.put(f"/api/requests/{request['id']}", json={"vendor_name": "Nimbus", "vat_id": "IE9999999X"})
+        assert updated.json()["vendor_id"] not in (None, request["vendor_id"])
+        assert client.get(f"/api/vendors/{updated.json()['vendor_id']}").json()["name"] == "Nimbus"
+
+    def test_bulk_import(self, client, test_db, sample_request_data):
+        client.post("/api/requests/bulk", json=[sample_request_data, {**sample_request_data, "vendor_name": "Other"}])
+        assert test_db.query(Vendor).count() == 1
+        assert {r.vendor_id for r in test_db.query(ProcurementRequest)} == {test_db.query(Vendor).one().id}
+
+    def test_backfill_keeps_updated_at(self, client, test_db, sample_request_data):
+        request = create(client, sample_request_data)
+        test_db.query(ProcurementRequest).update({"vendor_id": None, "updated_at": ProcurementRequest.updated_at})
+        test_db.query(Vendor).delete()
+        test_db.commit()
+
+        assert vendors.backfill(test_db.connection()) == 1
+        stored = test_db.get(ProcurementRequest, request["id"])
+        assert stored.vendor_id == test_db.query(Vendor).one().id
+        assert stored.updated_at.isoformat() == request["updated_at"].removesuffix("Z")
+
+    def test_extraction_returns_known_vendor(self, client, sample_request_data, monkeypatch):
+        request = create(client, sample_request_data)
+        monkeypatch.setattr(extraction_router, "extract_offer_data_from_pdf", lambda file_bytes: {
+            "vendor_name": "BUEROBEDARF GMBH", "vat_id": None, "order_lines": [],
+        })
+        response = client.post("/api/extraction/pdf", files={"file": ("offer.pdf", b"%PDF-1.4", "application/pdf")})
+        assert response.json()["vendor"] == {"id": request["vendor_id"], "name": "Bürobedarf GmbH", "vat_id": "DE123456789"}
+
+
+class TestAutocomplete:
+    def test_prefix_search(self, client, sample_request_data):
+        create(client, sample_request_data)
+        create(client, sample_request_data, vendor_name="Hans Müller KG", vat_id="DE222222222")
+        create(client, sample_request_data, vendor_name="Bürobau AG", vat_id="DE333333333")
+
+        assert [v["name"] for v in autocomplete(client, "Büro")] == ["Bürobau AG", "Bürobedarf GmbH"]
+        assert [v["name"] for v in autocomplete(client, "buerobe")] == ["Bürobedarf GmbH"]
+        assert [v["name"] for v in autocomplete(client, "muel")] == ["Hans Müller KG"]
+        assert [v["vat_id"] for v in autocomplete(client, "DE2222")] == ["DE222222222"]
+        assert len(autocomplete(client, "b", limit=1)) == 1
+        assert autocomplete(client, "xyz") == []
+
+    def test_index_is_refreshed_incrementally(self, client, sample_request_data):
+        create(client, sample_request_data)
+        assert len(autocomplete(client, "b")) == 1
+        create(client, sample_request_data, vendor_name="Bürobau AG", vat_id="DE333333333")
+        assert len(autocomplete(client, "b")) == 2
+
+    def test_late_commit_with_older_timestamp_is_picked_up(self, test_db):
+        now = datetime.now(UTC)
+        test_db.add(Vendor(name="Newer AG", normalized_name="newer ag", updated_at=now))
+        test_db.commit()
+        index = vendors.get_vendor_index(test_db)
+        assert index.search("newer")
+
+        # Written by a transaction that began earlier but committed after the refresh.
+        test_db.add(Vendor(name="Older AG", normalized_name="older ag", updated_at=now - timedelta(seconds=2)))
+        test_db.commit()
+        index.refresh(test_db)
+        assert [v["name"] for v in index.search("older")] == ["Older AG"]
+
+    def test_lookup_stays_fast(self):
+        index = vendors.VendorIndex()
+        for n in range(30_000):
+            name = f"Vendor {n:05d} Handels GmbH"
+            index.upsert(n, name, vendors.normalize_name(name), f"DE{n:09d}")
+
+        queries = [f"vendor {n % 300:03d}" for n in range(1000)]
+        start = time.perf_counter()
+        for query in queries:
+            assert len(index.search(query)) == 10
+        assert (time.perf_counter() - start) / len(queries) < 0.001
+
+        index.remove(1)
+        assert [v["id"] for v in index.search("vendor 0000")] == [0, 2, 3, 4, 5, 6, 7, 8, 9]